@@ -0,0 +1,214 @@
+"""Headless batch mode: screen many resumes against many job URLs.
+
+Usage::
+
+    python batch.py manifest.json -o results.jsonl --workers 8 [--trace-log trace.jsonl]
+
+The manifest is a JSON object ``{"resumes": [paths...], "urls": [urls...]}``;
+relative resume paths are resolved against the manifest's directory. One
+JSONL record is written per (resume, job) as soon as it is analysed. Re-running
+with the same output file skips every pair that already has a successful
+record, so an interrupted run picks up where it stopped. ``--trace-log`` writes a
+JSON line per traced stage; a p50/p95 summary per stage is printed at the end.
+Every extracted job is kept in the local job store; ``--top-k 5`` analyses
+only each resume's five best-fitting jobs.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from chains import Chain
+from fetcher import get_fetcher
+from job_index import get_job_index
+from job_store import get_job_store
+from llm_cache import LLMCache
+from resume_store import get_resume_store
+from scheduler import BATCH
+from tracing import logger as trace_logger, propagate, tracer
+
+
+def load_manifest(path):
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    resumes = [r if os.path.isabs(r) else os.path.join(base, r) for r in manifest.get("resumes", [])]
+    return resumes, list(manifest.get("urls", []))
+
+
+def load_progress(output_path):
+    """Return ``{(resume, url): (job_count, {finished job indices})}`` from an earlier run."""
+    progress = {}
+    if not os.path.exists(output_path):
+        return progress
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a torn last line from a crash
+            if record.get("errors") or record.get("job_index") is None:
+                continue
+            count, done = progress.setdefault((record["resume"], record["url"]), (record["job_count"], set()))
+            done.add(record["job_index"])
+    return progress
+
+
+def is_complete(progress, resume, url):
+    count, done = progress.get((resume, url), (None, ()))
+    return count is not None and len(done) >= count
+
+
+def open_output(output_path):
+    """Open the JSONL output for appending, ending a torn last line first so the next record starts clean."""
+    if os.path.exists(output_path) and os.path.getsize(output_path):
+        with open(output_path, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    return open(output_path, "a", encoding="utf-8")
+
+
+def parse_resume(chain, path):
+    with open(path, "rb") as f:
+        resume = get_resume_store().ingest(f, chain=chain)
+    return resume.text, resume.sections
+
+
+def extract_jobs_from_url(chain, url):
+    return chain.extract_jobs(get_fetcher().fetch(url).text)
+
+
+def analyze_pair(chain, resume, resume_text, resume_sections, url, job_index, job_count, job, combined=False):
+    start = time.perf_counter()
+    with tracer.request(f"{resume} x {url} #{job_index}"):
+        analysis = chain.analyze_job(job, resume_text, resume_sections.get("skills", []), combined=combined,
+                                     resume_sections=resume_sections)
+    errors = {task: str(result) for task, result in analysis.items() if isinstance(result, Exception)}
+    return {
+        "resume": resume,
+        "url": url,
+        "job_index": job_index,
+        "job_count": job_count,
+        "job": job,
+        "analysis": {task: result for task, result in analysis.items() if task not in errors},
+        "errors": errors,
+        "elapsed": round(time.perf_counter() - start, 3),
+    }
+
+
+def run_batch(chain, resumes, urls, output_path, workers=4, log=print, combined=False, top_k=None):
+    """Analyse every (resume, job) pair and append one JSONL record per pair.
+
+    Extracted jobs are added to the local job store. With ``top_k`` only each
+    resume's ``top_k`` best-fitting jobs (by local skill match) are analysed.
+    Returns the number of records written by this run.
+    """
+    progress = load_progress(output_path)
+    todo_resumes = [r for r in resumes if not all(is_complete(progress, r, u) for u in urls)]
+    todo_urls = [u for u in urls if not all(is_complete(progress, r, u) for r in resumes)]
+    written = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool, open_output(output_path) as out:
+        def emit(record):
+            out.write(json.dumps(record, default=str) + "\n")
+            out.flush()
+
+        # Stage 1: parse resumes and extract jobs from pages, all concurrently.
+        resume_futures = {pool.submit(propagate(parse_resume), chain, r): r for r in todo_resumes}
+        url_futures = {pool.submit(propagate(extract_jobs_from_url), chain, u): u for u in todo_urls}
+        parsed, pages = {}, {}
+        for future in as_completed(list(resume_futures) + list(url_futures)):
+            source = resume_futures.get(future) or url_futures.get(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                log(f"failed: {source}: {e}")
+                resume, url = (source, None) if future in resume_futures else (None, source)
+                emit({"resume": resume, "url": url, "job_index": None, "errors": {"load": str(e)}})
+                written += 1
+                continue
+            if future in resume_futures:
+                parsed[source] = result
+            else:
+                pages[source] = result
+
+        store = get_job_store()
+        stored = {}
+        for url, jobs in pages.items():
+            for job_index, job_id in enumerate(store.add(jobs, url=url)):
+                stored[job_id] = (url, job_index)
+
+        # Stage 2: every unfinished (resume, job) pair goes through the pool.
+        pair_futures = []
+        for resume, (resume_text, resume_sections) in parsed.items():
+            shortlist = None
+            if top_k is not None:
+                # Rank this run's jobs for the resume in one pass; spend LLM calls on the best only.
+                ranked = store.rank(resume_sections.get("skills", []), k=top_k, ids=stored)
+                shortlist = {stored[entry["id"]] for entry in ranked}
+            for url, jobs in pages.items():
+                _, done = progress.get((resume, url), (None, set()))
+                for job_index, job in enumerate(jobs):
+                    if job_index in done or (shortlist is not None and (url, job_index) not in shortlist):
+                        continue
+                    pair_futures.append(pool.submit(
+                        analyze_pair, chain, resume, resume_text, resume_sections, url, job_index, len(jobs), job, combined,
+                    ))
+        for future in as_completed(pair_futures):
+            record = future.result()
+            emit(record)
+            written += 1
+            status = "errors: " + ", ".join(record["errors"]) if record["errors"] else "ok"
+            log(f"{record['resume']} x {record['url']} #{record['job_index']}: {status} ({record['elapsed']}s)")
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch resume x job analysis with JSONL output.")
+    parser.add_argument("manifest", help='JSON file: {"resumes": [...], "urls": [...]}')
+    parser.add_argument("-o", "--output", default="batch_results.jsonl", help="JSONL file to append results to")
+    parser.add_argument("--workers", type=int, default=4, help="(resume, job) pairs processed at once")
+    parser.add_argument("--max-concurrency", type=int, default=4, help="LLM calls in flight per pair")
+    parser.add_argument("--no-cache", action="store_true", help="do not use the on-disk LLM cache")
+    parser.add_argument("--fuzzy", action="store_true", help="count near-synonym skills towards the fit score")
+    parser.add_argument("--no-dedupe", action="store_true",
+                        help="analyse near-duplicate jobs again instead of reusing stored analyses")
+    parser.add_argument("--combined", action="store_true", help="one LLM call per job for attribution, suggestions and email")
+    parser.add_argument("--full-resume", action="store_true",
+                        help="send the whole resume with every job instead of its compact profile")
+    parser.add_argument("--top-k", type=int, help="analyse only each resume's K best-fitting jobs by local skill match")
+    parser.add_argument("--trace-log", help="append one JSON line per traced stage to this file")
+    args = parser.parse_args(argv)
+
+    if args.trace_log:
+        handler = logging.FileHandler(args.trace_log, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        trace_logger.addHandler(handler)
+        trace_logger.setLevel(logging.INFO)
+
+    if "GROQ_API_KEY" not in os.environ and os.getenv("LLM_BACKEND", "groq") == "groq":
+        parser.error("GROQ_API_KEY must be set")
+    resumes, urls = load_manifest(args.manifest)
+    chain = Chain(max_concurrency=args.max_concurrency, cache=None if args.no_cache else LLMCache(), priority=BATCH,
+                  fuzzy_matching=args.fuzzy, job_index=None if args.no_dedupe else get_job_index(),
+                  full_resume=args.full_resume)
+    written = run_batch(chain, resumes, urls, args.output, workers=args.workers,
+                        log=lambda msg: print(msg, file=sys.stderr), combined=args.combined, top_k=args.top_k)
+    print(f"wrote {written} records to {args.output}", file=sys.stderr)
+    saved = tracer.totals()["resume_tokens_saved"]
+    if saved:
+        print(f"  resume profile saved ~{saved} prompt tokens", file=sys.stderr)
+    for name, stage in tracer.snapshot().items():
+        print(f"  {name:32} {stage['count']:>5} calls  p50 {stage['p50_s']:.3f}s  p95 {stage['p95_s']:.3f}s  "
+              f"{stage['prompt_tokens']} + {stage['completion_tokens']} tokens  {stage['cache_hits']} cache hits  "
+              f"{stage['escalations']} escalations  {stage['parse_repairs']} repaired  "
+              f"{stage['parse_failures']} unparseable",
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,675 @@
+"""Offline benchmarks.
+
+    python benchmark.py [--json out.json] clean [CORPUS_DIR]
+    python benchmark.py [--json out.json] pipeline [--jobs 1 10 100] [--latency 0.2]
+    python benchmark.py [--json out.json] ratelimit [--server-rps 5] [--jobs 20]
+    python benchmark.py [--json out.json] dedupe [--stored 200000] [--queries 1000]
+    python benchmark.py [--json out.json] startup [--repeat 5]
+    python benchmark.py [--json out.json] parse [--responses 2000]
+    python benchmark.py [--json out.json] mails [--jobs 50] [--pack 5] [--latency 0.5]
+
+``clean`` compares the current ``clean_text`` against the old regex cleaner
+on a corpus of saved careers pages: ``*.html`` files, or the page cache the
+fetcher writes to ``.cache/pages``. It reports bytes in, tokens out (what
+``extract_jobs`` would be sent) and time per page.
+
+``pipeline`` runs the whole app pipeline against the fake LLM backend and a
+local HTTP server, for careers pages with 1, 10 and 100 postings. It
+reports end-to-end latency, per-stage timings, peak traced memory and LLM
+calls/tokens. With ``--json`` the results can be diffed between commits.
+
+``ratelimit`` points the real Groq client at a local stand-in for the Groq
+API that answers 429 (with ``Retry-After``) above ``--server-rps`` and
+fails a share of calls with 503, then analyses ``--jobs`` jobs through the
+scheduler. It reports wall time, 429s served, retries and failed calls,
+with and without retries.
+
+``dedupe`` fills a temporary ``JobIndex`` with ``--stored`` synthetic jobs,
+then looks up near-duplicates of stored jobs (a few words changed) and
+unseen jobs. It reports lookup p50/p95, how many near-duplicates were found
+and how many unseen jobs were wrongly matched.
+
+``startup`` starts fresh interpreters and times ``import main`` and the
+app's first render (``AppTest.run()`` with no inputs), median over
+``--repeat`` runs. It also lists which heavy libraries (LangChain, Groq,
+chromadb, pandas, document readers) were imported by then; the first
+screen needs none of them.
+
+``parse`` runs well-formed and defective JSON completions (preamble,
+trailing commas, single quotes, Python literals, raw newlines, cut-off
+output) through LangChain's ``JsonOutputParser`` and through
+``llm_json``, checking each value against the method's schema. It reports
+how many each accepts per defect -- every rejection is a repeated LLM call
+-- and the parse time.
+
+``mails`` writes cold emails for ``--jobs`` short postings against the fake
+backend three ways: one ``write_mail`` call after another, ``write_mails``
+(batched, bounded concurrency) and ``write_mails`` with ``--pack`` jobs per
+prompt. It reports LLM round trips, wall time and tokens for each.
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils import clean_text, estimate_tokens
+
+
+def count_tokens(text):
+    try:
+        import tiktoken
+    except ImportError:
+        return estimate_tokens(text)
+    return len(tiktoken.get_encoding("cl100k_base").encode(text))
+
+
+def legacy_clean_text(html):
+    """The pre-extractor pipeline: WebBaseLoader's get_text() followed by the regex cleaner."""
+    from bs4 import BeautifulSoup
+
+    text = BeautifulSoup(html, "html.parser").get_text()
+    text = re.sub(r'<[^>]*?>', '', text)
+    text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
+    text = re.sub(r'[^a-zA-Z0-9 ]', '', text)
+    text = re.sub(r'\s{2,}', ' ', text)
+    return ' '.join(text.strip().split())
+
+
+def load_corpus(directory):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.html")) + glob.glob(os.path.join(directory, "*.htm"))):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            pages.append((os.path.basename(path), f.read()))
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except ValueError:
+            continue
+        if isinstance(entry, dict) and entry.get("html"):
+            pages.append((entry.get("url") or os.path.basename(path), entry["html"]))
+    return pages
+
+
+def time_call(fn, arg, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return out, best
+
+
+def bench_clean(args):
+    pages = load_corpus(args.corpus)
+    if not pages:
+        sys.exit(f"no pages found in {args.corpus} (save *.html files there or run the app to fill the page cache)")
+    rows = []
+    for name, html in pages:
+        row = {"page": name, "bytes_in": len(html.encode("utf-8"))}
+        for label, fn in (("legacy", legacy_clean_text), ("current", clean_text)):
+            text, seconds = time_call(fn, html, args.repeat)
+            row[f"{label}_tokens"] = count_tokens(text)
+            row[f"{label}_ms"] = round(seconds * 1000, 3)
+        rows.append(row)
+        print(f"{name[:60]:60} {row['bytes_in']:>9} B  tokens {row['legacy_tokens']:>7} -> {row['current_tokens']:<7}"
+              f" time {row['legacy_ms']:>8.2f} -> {row['current_ms']:.2f} ms")
+
+    totals = {key: sum(r[key] for r in rows) for key in ("bytes_in", "legacy_tokens", "current_tokens", "legacy_ms", "current_ms")}
+    totals["token_reduction"] = round(1 - totals["current_tokens"] / max(totals["legacy_tokens"], 1), 4)
+    print(f"total: {totals['bytes_in']} B in, tokens {totals['legacy_tokens']} -> {totals['current_tokens']}"
+          f" ({totals['token_reduction']:.1%} fewer), time {totals['legacy_ms']:.1f} -> {totals['current_ms']:.1f} ms")
+    return {"benchmark": "clean", "pages": rows, "totals": totals}
+
+
+class StageTimer:
+    """Collects wall time per named stage; safe to use from worker threads."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.samples[name].append(time.perf_counter() - start)
+
+    def wrap(self, name, fn):
+        def timed(*args, **kwargs):
+            with self.stage(name):
+                return fn(*args, **kwargs)
+        return timed
+
+    def summary(self):
+        return {
+            name: {
+                "calls": len(times),
+                "total_s": round(sum(times), 4),
+                "mean_s": round(sum(times) / len(times), 4),
+                "max_s": round(max(times), 4),
+            }
+            for name, times in sorted(self.samples.items())
+        }
+
+
+TIMED_CHAIN_METHODS = (
+    "extract_jobs", "extract_resume_sections", "skill_matching",
+    "explain_skill_match", "improve_resume", "write_mail", "analyze_job_combined",
+)
+
+
+def synthetic_careers_page(n_jobs):
+    postings = "".join(
+        f"<article><h2>Data Scientist {i}</h2><p>Job ID {i}. Build ML models with Python, SQL and "
+        f"Kubernetes on AWS. 3+ years of experience with PyTorch and Docker.</p>"
+        f"<ul><li>Python</li><li>SQL</li><li>CI/CD</li></ul><a href='/apply/{i}'>Apply now</a></article>"
+        for i in range(n_jobs)
+    )
+    return f"<html><body><nav>Home Careers About</nav><main>{postings}</main><footer>Privacy</footer></body></html>"
+
+
+# Achievement bullets that make the synthetic resume about as long as a real one.
+RESUME_BULLETS = [
+    "Built and maintained {} forecasting pipelines in Python and SQL serving {} business teams.",
+    "Reduced model training time by {}% by moving feature generation to Spark and caching on S3.",
+    "Deployed {} PyTorch models behind Docker-based REST services on AWS with CI/CD.",
+    "Mentored {} junior analysts and ran a weekly reading group on {} recent ML papers.",
+]
+
+
+def synthetic_resume():
+    from docx import Document
+
+    doc = Document()
+    for line in ("Alex Doe", "Skills: Python, SQL, Docker, PyTorch, AWS",
+                 "Experience: Data Scientist, Example Corp, 2019-2024", "Projects: CNN image classifier"):
+        doc.add_paragraph(line)
+    for i in range(6):
+        doc.add_paragraph(RESUME_BULLETS[i % len(RESUME_BULLETS)].format(i + 3, 2 * i + 4))
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    buffer.name = "resume.docx"
+    return buffer
+
+
+@contextmanager
+def serve_pages(pages):
+    """Serve ``{path: html}`` from a local HTTP server; yields the base URL."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = pages.get(self.path, "").encode("utf-8")
+            self.send_response(200 if body else 404)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+
+
+@contextmanager
+def serve_stand_in_llm(rps, failure_rate=0.0, latency=0.0):
+    """A local stand-in for Groq's chat completions API; yields ``(base_url, counters)``.
+
+    More than ``rps`` requests within a second get a 429 with ``Retry-After: 1``;
+    a ``failure_rate`` share of the rest get a 503. Answers come from the fake backend.
+    """
+    from llm_backends import fake_response
+
+    counters = {"requests": 0, "ok": 0, "429": 0, "503": 0}
+    recent = deque()
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            now = time.monotonic()
+            with lock:
+                counters["requests"] += 1
+                while recent and now - recent[0] > 1:
+                    recent.popleft()
+                limited = len(recent) >= rps
+                if not limited:
+                    recent.append(now)
+                failed = not limited and random.random() < failure_rate
+                counters["429" if limited else "503" if failed else "ok"] += 1
+            if limited or failed:
+                return self.reply(429 if limited else 503, {"error": {
+                    "message": "Rate limit reached" if limited else "Service unavailable",
+                    "type": "requests", "code": "rate_limit_exceeded" if limited else "unavailable",
+                }}, {"Retry-After": "1"} if limited else {})
+            time.sleep(latency)
+            prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+            content = fake_response(prompt)
+            usage = {"prompt_tokens": estimate_tokens(prompt), "completion_tokens": estimate_tokens(content)}
+            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+            self.reply(200, {
+                "id": f"chatcmpl-{counters['requests']}", "object": "chat.completion", "created": int(time.time()),
+                "model": body.get("model", "stand-in"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+
+        def reply(self, status, payload, headers=()):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in dict(headers).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}", counters
+    finally:
+        server.shutdown()
+
+
+def run_pipeline_once(n_jobs, base_url, args):
+    from chains import Chain
+    from fetcher import PageFetcher
+    from chains import tier_report
+    from llm_backends import MODEL_TIERS, make_llm
+    from tracing import tracer
+    from utils import extract_text_from_resume
+
+    timer = StageTimer()
+    llms = {tier: make_llm("fake", model_name=name, latency=args.latency, tokens_per_second=args.token_rate)
+            for tier, name in MODEL_TIERS.items()}
+    chain = Chain(llms=llms, max_concurrency=args.max_concurrency, full_resume=args.full_resume)
+    for name in TIMED_CHAIN_METHODS:
+        setattr(chain, name, timer.wrap(name, getattr(chain, name)))
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        fetcher = PageFetcher(cache_dir=cache_dir)
+        tracer.clear()
+        tracemalloc.start()
+        start = time.perf_counter()
+        with timer.stage("parse"):
+            resume_text = extract_text_from_resume(synthetic_resume())
+        with timer.stage("fetch"):
+            page = fetcher.fetch(f"{base_url}/jobs/{n_jobs}")
+        with timer.stage("clean"):
+            clean_text(page.html)
+        parsed = chain.extract_resume_sections(resume_text)
+        jobs = chain.extract_jobs(page.text)
+        with timer.stage("analyze_jobs"):
+            for _ in chain.analyze_jobs(jobs, resume_text, parsed.get("skills", []), combined=args.combined,
+                                        resume_sections=parsed):
+                pass
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    stats = {key: sum(llm.stats[key] for llm in llms.values()) for key in ("calls", "prompt_tokens", "completion_tokens")}
+    return {
+        "jobs": n_jobs,
+        "jobs_extracted": len(jobs),
+        "end_to_end_s": round(elapsed, 4),
+        "stages": timer.summary(),
+        "peak_memory_bytes": peak,
+        "llm_calls": stats["calls"],
+        "prompt_tokens": stats["prompt_tokens"],
+        "completion_tokens": stats["completion_tokens"],
+        "tiers": tier_report(tracer.snapshot()),
+        "resume_tokens_saved": tracer.totals()["resume_tokens_saved"],
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_pipeline(args):
+    pages = {f"/jobs/{n}": synthetic_careers_page(n) for n in args.jobs}
+    runs = []
+    with serve_pages(pages) as base_url:
+        for n_jobs in args.jobs:
+            run = run_pipeline_once(n_jobs, base_url, args)
+            runs.append(run)
+            print(f"{n_jobs:>4} jobs: {run['end_to_end_s']:.3f}s end-to-end, {run['llm_calls']} LLM calls, "
+                  f"{run['prompt_tokens']} prompt + {run['completion_tokens']} completion tokens, "
+                  f"peak {run['peak_memory_bytes'] / 2**20:.1f} MiB, "
+                  f"{run['resume_tokens_saved']} resume tokens saved by the profile")
+            for name, stage in run["stages"].items():
+                print(f"       {name:24} {stage['calls']:>4} calls  total {stage['total_s']:.3f}s  mean {stage['mean_s']:.4f}s")
+            for tier in run["tiers"]:
+                print(f"       tier {tier['tier']:19} {tier['calls']:>4} calls  p50 {tier['p50_s']:.3f}s  "
+                      f"p95 {tier['p95_s']:.3f}s  escalated {tier['escalation_rate']:.1%}")
+    return {
+        "benchmark": "pipeline",
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "settings": {
+            "latency_s": args.latency,
+            "tokens_per_second": args.token_rate,
+            "max_concurrency": args.max_concurrency,
+            "combined": args.combined,
+            "full_resume": args.full_resume,
+        },
+        "runs": runs,
+    }
+
+
+def run_ratelimit_once(args, max_retries):
+    from chains import Chain
+    from llm_backends import make_llm
+    from scheduler import LLMScheduler
+
+    jobs = [{"role": f"Data Scientist {i}", "description": "Build ML models.", "skills": ["Python", "SQL"]}
+            for i in range(args.jobs)]
+    with serve_stand_in_llm(args.server_rps, args.failure_rate, args.latency) as (base_url, served):
+        scheduler = LLMScheduler(rpm=args.rpm, max_concurrency=args.max_concurrency, max_retries=max_retries,
+                                 base_delay=args.base_delay)
+        llm = make_llm("groq", api_key="stand-in", groq_api_base=base_url)
+        chain = Chain(llm=llm, max_concurrency=args.max_concurrency, scheduler=scheduler)
+        start = time.perf_counter()
+        failed = sum(
+            isinstance(result, Exception)
+            for _, _, result in chain.analyze_jobs(jobs, "Python and SQL data scientist.", ["Python", "SQL"])
+        )
+        elapsed = time.perf_counter() - start
+    stats = scheduler.snapshot()
+    return {
+        "max_retries": max_retries,
+        "wall_s": round(elapsed, 3),
+        "served": dict(served),
+        "retries": stats["retries"],
+        "failed_tasks": failed,
+        "final_concurrency_limit": stats["limit"],
+    }
+
+
+def bench_ratelimit(args):
+    runs = []
+    for max_retries in (0, args.max_retries):
+        run = run_ratelimit_once(args, max_retries)
+        runs.append(run)
+        served = run["served"]
+        print(f"max_retries={max_retries}: {run['wall_s']:.2f}s, {served['requests']} requests "
+              f"({served['429']} x 429, {served['503']} x 503), {run['retries']} retries, "
+              f"{run['failed_tasks']} failed tasks, concurrency limit {run['final_concurrency_limit']}")
+    return {
+        "benchmark": "ratelimit",
+        "commit": git_commit(),
+        "settings": {key: getattr(args, key) for key in (
+            "jobs", "server_rps", "failure_rate", "latency", "rpm", "max_concurrency", "max_retries")},
+        "runs": runs,
+    }
+
+
+def synthetic_job(rng, vocabulary, words=80):
+    return {
+        "role": " ".join(rng.choice(vocabulary) for _ in range(3)).title(),
+        "description": " ".join(rng.choice(vocabulary) for _ in range(words)),
+        "skills": rng.sample(vocabulary[:200], 5),
+    }
+
+
+def near_duplicate(rng, job, vocabulary, changes=2):
+    words = job["description"].split()
+    for _ in range(changes):
+        words[rng.randrange(len(words))] = rng.choice(vocabulary)
+    return dict(job, description=" ".join(words) + " Apply via our partner site.")
+
+
+def bench_dedupe(args):
+    from job_index import JobIndex
+
+    rng = random.Random(0)
+    vocabulary = [f"w{i}" for i in range(5000)]
+    with tempfile.TemporaryDirectory() as directory:
+        index = JobIndex(os.path.join(directory, "jobs.sqlite3"))
+        stored = []
+        start = time.perf_counter()
+        for offset in range(0, args.stored, 1000):
+            jobs = [synthetic_job(rng, vocabulary) for _ in range(min(1000, args.stored - offset))]
+            index.add_many(jobs)
+            stored.extend(jobs[:args.queries - len(stored)])
+        build_s = time.perf_counter() - start
+        size = os.path.getsize(index.path)
+
+        def timed_lookups(jobs):
+            times, found = [], 0
+            for job in jobs:
+                start = time.perf_counter()
+                found += index.find(job) is not None
+                times.append(time.perf_counter() - start)
+            times.sort()
+            return found, times[len(times) // 2] * 1000, times[int(len(times) * 0.95)] * 1000
+
+        near_found, near_p50, near_p95 = timed_lookups([near_duplicate(rng, job, vocabulary) for job in stored])
+        new_found, new_p50, new_p95 = timed_lookups([synthetic_job(rng, vocabulary) for _ in range(args.queries)])
+    print(f"{args.stored} jobs stored in {build_s:.1f}s ({size / 2**20:.1f} MiB)")
+    print(f"near-duplicates: {near_found}/{len(stored)} found, lookup p50 {near_p50:.3f} ms  p95 {near_p95:.3f} ms")
+    print(f"unseen jobs:     {new_found}/{args.queries} wrongly matched, lookup p50 {new_p50:.3f} ms  p95 {new_p95:.3f} ms")
+    return {
+        "benchmark": "dedupe",
+        "commit": git_commit(),
+        "settings": {"stored": args.stored, "queries": args.queries},
+        "build_s": round(build_s, 3),
+        "bytes": size,
+        "near_duplicates": {"found": near_found, "queries": len(stored), "p50_ms": near_p50, "p95_ms": near_p95},
+        "unseen": {"matched": new_found, "queries": args.queries, "p50_ms": new_p50, "p95_ms": new_p95},
+    }
+
+
+# Libraries that take over a tenth of a second to import.
+HEAVY_MODULES = ["langchain_core", "langchain_groq", "langchain_community", "chromadb", "pandas", "docx",
+                 "pdfplumber"]
+
+_STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+if sys.argv[1] == "import":
+    import main
+else:
+    from streamlit.testing.v1 import AppTest
+    start = time.perf_counter()
+    at = AppTest.from_file("main.py", default_timeout=120)
+    at.run()
+    assert not at.exception, at.exception
+elapsed = time.perf_counter() - start
+print(json.dumps({"s": elapsed, "loaded": [m for m in json.loads(sys.argv[2]) if m in sys.modules]}))
+"""
+
+
+def bench_startup(args):
+    env = dict(os.environ, LLM_BACKEND="fake")
+    results = {}
+    for mode in ("import", "render"):
+        runs = []
+        for _ in range(args.repeat):
+            out = subprocess.run([sys.executable, "-c", _STARTUP_SCRIPT, mode, json.dumps(HEAVY_MODULES)],
+                                 capture_output=True, text=True, env=env, check=True).stdout
+            runs.append(json.loads(out.strip().splitlines()[-1]))
+        times = sorted(run["s"] for run in runs)
+        results[mode] = {"median_s": times[len(times) // 2], "min_s": times[0], "heavy_modules": runs[-1]["loaded"]}
+        label = "import main " if mode == "import" else "first render"
+        print(f"{label}  median {results[mode]['median_s'] * 1000:7.0f} ms  min {times[0] * 1000:7.0f} ms  "
+              f"heavy modules: {', '.join(runs[-1]['loaded']) or 'none'}")
+    return {"benchmark": "startup", "commit": git_commit(), "settings": {"repeat": args.repeat}, **results}
+
+
+def _defective_responses(count):
+    """``(defect, schema name, completion)`` triples built from the fake backend's answers."""
+    from llm_backends import FAKE_EXPLANATION, FAKE_IMPROVEMENTS, FAKE_RESUME
+
+    samples = [("resume_sections", FAKE_RESUME), ("explanation", FAKE_EXPLANATION),
+               ("improvements", FAKE_IMPROVEMENTS), ("jobs", [{"role": "Data Scientist", "skills": ["Python"]}])]
+    defects = {
+        "none": lambda text: text,
+        "fenced": lambda text: f"```json\n{text}\n```",
+        "preamble": lambda text: f"Sure! Here is the JSON you asked for:\n{text}\nLet me know if you need more.",
+        "trailing_comma": lambda text: re.sub(r"([\]}\"])(\s*[\]}])", r"\1,\2", text),
+        "single_quotes": lambda text: text.replace('"', "'"),
+        "python_literals": lambda text: text.replace("[]", "None").replace("true", "True"),
+        "raw_newlines": lambda text: text.replace("\\n", "\n").replace(", ", ",\n"),
+        "truncated": lambda text: text[:int(len(text) * 0.9)],
+    }
+    rng = random.Random(0)
+    for i in range(count):
+        defect = list(defects)[i % len(defects)]
+        name, value = rng.choice(samples)
+        yield defect, name, defects[defect](json.dumps(value, indent=rng.choice([None, 2])))
+
+
+def bench_parse(args):
+    from langchain_core.output_parsers import JsonOutputParser
+    from chains import SCHEMAS, _matches
+    from llm_json import parse_json
+
+    def old(text, schema):
+        return JsonOutputParser().parse(text)
+
+    def new(text, schema):
+        return parse_json(text, accept=lambda value: _matches(value, schema))
+
+    responses = list(_defective_responses(args.responses))
+    results = {}
+    for label, parse in (("JsonOutputParser", old), ("llm_json", new)):
+        accepted, start = defaultdict(lambda: [0, 0]), time.perf_counter()
+        for defect, name, text in responses:
+            try:
+                ok = _matches(parse(text, SCHEMAS[name]), SCHEMAS[name])
+            except Exception:
+                ok = False
+            accepted[defect][0] += ok
+            accepted[defect][1] += 1
+        elapsed = time.perf_counter() - start
+        total = sum(ok for ok, _ in accepted.values())
+        results[label] = {"accepted": total, "responses": len(responses), "mean_ms": elapsed / len(responses) * 1000,
+                          "by_defect": {defect: ok for defect, (ok, _) in accepted.items()}}
+        print(f"{label:17} {total:>5}/{len(responses)} accepted  {results[label]['mean_ms']:.3f} ms/response  "
+              + "  ".join(f"{defect} {ok}/{n}" for defect, (ok, n) in accepted.items()))
+    return {"benchmark": "parse", "commit": git_commit(), "settings": {"responses": args.responses}, **results}
+
+
+def bench_mails(args):
+    from chains import Chain
+    from llm_backends import make_llm
+
+    jobs = [{"role": f"Data Scientist {i}", "description": f"Build ML models in Python (posting {i}).",
+             "skills": ["Python", "SQL"]} for i in range(args.jobs)]
+    resume = "Data scientist. Skills: Python, SQL, Docker, PyTorch, AWS."
+    llm = make_llm("fake", latency=args.latency, tokens_per_second=args.token_rate)
+    chain = Chain(llm=llm, max_concurrency=args.max_concurrency)
+    modes = {
+        "one by one": lambda: [chain.write_mail(job, resume) for job in jobs],
+        "write_mails": lambda: chain.write_mails(jobs, resume),
+        f"write_mails pack={args.pack}": lambda: chain.write_mails(jobs, resume, pack=args.pack),
+    }
+    results = {}
+    for label, write in modes.items():
+        llm.reset_stats()
+        start = time.perf_counter()
+        emails = write()
+        elapsed = time.perf_counter() - start
+        stats = llm.stats
+        results[label] = {"emails": sum(isinstance(e, str) for e in emails), "wall_s": round(elapsed, 3), **stats}
+        print(f"{label:20} {results[label]['emails']:>4} emails  {stats['calls']:>4} LLM calls  {elapsed:7.2f}s  "
+              f"{stats['prompt_tokens']} prompt + {stats['completion_tokens']} completion tokens")
+    return {
+        "benchmark": "mails",
+        "commit": git_commit(),
+        "settings": {"jobs": args.jobs, "pack": args.pack, "latency_s": args.latency,
+                     "max_concurrency": args.max_concurrency},
+        "runs": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--json", help="also write the results as JSON to this file")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    clean = sub.add_parser("clean", help="clean_text: bytes in, tokens out, time")
+    clean.add_argument("corpus", nargs="?", default=".cache/pages", help="directory of saved pages")
+    clean.add_argument("--repeat", type=int, default=3, help="runs per page; the fastest is reported")
+    clean.set_defaults(run=bench_clean)
+
+    pipeline = sub.add_parser("pipeline", help="end-to-end pipeline against the fake LLM")
+    pipeline.add_argument("--jobs", type=int, nargs="+", default=[1, 10, 100], help="postings per careers page")
+    pipeline.add_argument("--latency", type=float, default=0.2, help="fake LLM time to first token (s)")
+    pipeline.add_argument("--token-rate", type=float, default=500.0, help="fake LLM tokens per second (0 = instant)")
+    pipeline.add_argument("--max-concurrency", type=int, default=8, help="Chain thread-pool size")
+    pipeline.add_argument("--combined", action="store_true", help="one analyze_job_combined call per job")
+    pipeline.add_argument("--full-resume", action="store_true", help="send the whole resume instead of its profile")
+    pipeline.set_defaults(run=bench_pipeline)
+
+    ratelimit = sub.add_parser("ratelimit", help="scheduler against a local API stand-in that returns 429s")
+    ratelimit.add_argument("--jobs", type=int, default=20, help="jobs to analyse (3 LLM calls each)")
+    ratelimit.add_argument("--server-rps", type=int, default=5, help="requests per second the stand-in accepts")
+    ratelimit.add_argument("--failure-rate", type=float, default=0.05, help="share of accepted calls failing with 503")
+    ratelimit.add_argument("--latency", type=float, default=0.05, help="stand-in response time (s)")
+    ratelimit.add_argument("--rpm", type=float, help="client-side requests/min budget (default: none)")
+    ratelimit.add_argument("--max-concurrency", type=int, default=8, help="scheduler and Chain concurrency")
+    ratelimit.add_argument("--max-retries", type=int, default=8, help="retries per call in the second run")
+    ratelimit.add_argument("--base-delay", type=float, default=0.25, help="backoff base delay (s)")
+    ratelimit.set_defaults(run=bench_ratelimit)
+
+    dedupe = sub.add_parser("dedupe", help="JobIndex near-duplicate lookups against many stored jobs")
+    dedupe.add_argument("--stored", type=int, default=200000, help="synthetic jobs in the index")
+    dedupe.add_argument("--queries", type=int, default=1000, help="lookups of each kind")
+    dedupe.set_defaults(run=bench_dedupe)
+
+    startup = sub.add_parser("startup", help="import time and time to first render of the Streamlit app")
+    startup.add_argument("--repeat", type=int, default=5, help="fresh interpreters per measurement")
+    startup.set_defaults(run=bench_startup)
+
+    parse = sub.add_parser("parse", help="JSON parsing of well-formed and defective LLM completions")
+    parse.add_argument("--responses", type=int, default=2000, help="completions to parse")
+    parse.set_defaults(run=bench_parse)
+
+    mails = sub.add_parser("mails", help="cold emails for many jobs: one by one, batched and packed")
+    mails.add_argument("--jobs", type=int, default=50, help="job postings")
+    mails.add_argument("--pack", type=int, default=5, help="jobs per prompt in the packed run")
+    mails.add_argument("--latency", type=float, default=0.5, help="fake LLM time to first token (s)")
+    mails.add_argument("--token-rate", type=float, default=0.0, help="fake LLM tokens per second (0 = instant)")
+    mails.add_argument("--max-concurrency", type=int, default=8, help="calls in flight for the batched runs")
+    mails.set_defaults(run=bench_mails)
+
+    args = parser.parse_args(argv)
+    result = args.run(args)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,442 @@
 import os
-from langchain_groq import ChatGroq
+import queue
+import threading
+import types
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.exceptions import OutputParserException
+from langchain_core.runnables import RunnableLambda
+
+from llm_backends import MODEL_TIERS, get_llm
+from job_index import skill_set
+from llm_json import JsonStreamParser, TruncatedOutput
+from resume_features import get_resume_features
+from resume_profile import get_resume_profile
+from skill_similarity import get_similarity_index
+from scheduler import EXPECTED_COMPLETION_TOKENS, INTERACTIVE, get_scheduler
+from tracing import propagate, traced, tracer, usage_from
+from utils import estimate_tokens, match_skills, merge_jobs, split_job_postings
 # from dotenv import load_dotenv
 
 # load_dotenv()
 
+# Intermediate snapshot yielded by Chain.analyze_jobs(stream=True).
+Partial = namedtuple("Partial", "value")
+
+
+def _accumulate(deltas):
+    text = ""
+    for delta in deltas:
+        text += delta
+        yield text
+
+
+def _completed_items(partial, parser):
+    """Drop the list item ``parser`` is still reading (the last item of the last list), if any."""
+    if not isinstance(partial, dict) or not partial:
+        return None
+    last_key = list(partial)[-1]
+    if isinstance(partial[last_key], list) and parser.item_open:
+        partial = dict(partial, **{last_key: partial[last_key][:-1]})
+    return partial
+
+
+# Pages longer than this (estimated tokens) are extracted in parallel chunks.
+JOB_CHUNK_TOKENS = 6000
+MIN_JOB_CHUNK_TOKENS = 750
+
+
+def _is_context_error(e):
+    # Output cut off before the JSON ended, or a provider "context length exceeded"
+    # rejection. Other unparseable output is not about size.
+    return (
+        isinstance(e, TruncatedOutput)
+        or getattr(e, "status_code", None) == 413
+        or not isinstance(e, OutputParserException) and "context" in str(e).lower()
+    )
+
+
+# Model tier per Chain task: small and fast for extraction and scoring, large
+# for writing. A small-tier answer that fails validation is retried on the
+# next larger tier.
+TASK_TIERS = {
+    "extract_jobs": "small",
+    "extract_resume_sections": "small",
+    "skill_matching": "small",
+    "explain_skill_match": "small",
+    "improve_resume": "large",
+    "write_mail": "large",
+    "analyze_job_combined": "large",
+    "write_mail_packed": "large",
+    "improve_resume_packed": "large",
+}
+
+# A dict key the response may leave out (or set to null); it is filled in with ``default``.
+OptionalKey = namedtuple("OptionalKey", "schema default")
+
+# Shape each JSON response (or combined section) must have. Only what the
+# app indexes directly is required; lists it iterates over may be missing.
+SCHEMAS = {
+    "jobs": [dict],
+    "resume_sections": dict,
+    "skill_match": {"fit_percentage": (int, float), "matched_skills": [str]},
+    "explanation": {
+        "matched_skills": OptionalKey([{"skill": str, "location": str}], []),
+        "unmatched_skills": OptionalKey([{"skill": str, "suggestion": str}], []),
+    },
+    "improvements": {
+        "missing_skills": OptionalKey([str], []),
+        "suggested_changes": OptionalKey([str], []),
+        "new_section_ideas": OptionalKey([str], []),
+    },
+    "email": str,
+    # One object per job, keyed by "id"; each item is checked against its task's schema.
+    "packed": [dict],
+}
+
+# Per-job tasks that analyze_job_combined answers in a single LLM call, and
+# the prompt text for each.
+COMBINED_TASKS = ("explanation", "improvements", "email")
+COMBINED_SECTIONS = {
+    "explanation": (
+        "- `explanation`: which job-required skills are present in the resume and where they are mentioned "
+        "(e.g., Skills section, Project section, Experience line), and which are missing, with a suggestion "
+        "on how each could be added or better represented.",
+        """"explanation": {{
+                    "matched_skills": [{{"skill": "Python", "location": "Skills section"}}],
+                    "unmatched_skills": [{{"skill": "JAX", "suggestion": "Add a project using JAX"}}]
+                }}""",
+    ),
+    "improvements": (
+        "- `improvements`: missing but relevant skills that should be added, rewording of vague or generic "
+        "resume lines, and new sections (e.g., projects, certifications) that should be added.",
+        """"improvements": {{
+                    "missing_skills": ["JAX"],
+                    "suggested_changes": ["Reword 'Worked on AI projects' to 'Built a CNN using PyTorch'."],
+                    "new_section_ideas": ["Add a project using Spark"]
+                }}""",
+    ),
+    "email": (
+        "- `email`: a **cold email** expressing interest in the job, in **first-person voice** from the "
+        "applicant (me). State who I am, explain how my skills and experience make me a strong fit, show "
+        "alignment with the job requirements, and be clear, confident, professional and concise. No "
+        "preamble or headings; use \\n for line breaks.",
+        '"email": "Dear Hiring Team,\\n\\n..."',
+    ),
+}
+
+
+# Packing for Chain.write_mails / improve_resume_batch: jobs up to PACK_JOB_TOKENS
+# (estimated) can share a prompt, with at most PACK_TOKENS of jobs per prompt.
+PACK_JOB_TOKENS = 400
+PACK_TOKENS = 3000
+# Batch task -> (single-job task, COMBINED_SECTIONS entry for its instructions).
+PACKED_TASKS = {
+    "write_mail_packed": ("write_mail", "email"),
+    "improve_resume_packed": ("improve_resume", "improvements"),
+}
+
+
+def _pack(jobs, pack):
+    """Split job indices into prompts: short jobs ``pack`` at a time, long ones alone."""
+    groups, current, tokens = [], [], 0
+    for idx, job in enumerate(jobs):
+        size = estimate_tokens(str(job))
+        if pack <= 1 or size > PACK_JOB_TOKENS:
+            groups.append([idx])
+            continue
+        if current and (len(current) >= pack or tokens + size > PACK_TOKENS):
+            groups.append(current)
+            current, tokens = [], 0
+        current.append(idx)
+        tokens += size
+    if current:
+        groups.append(current)
+    return groups
+
+
+def _matches(value, schema):
+    if isinstance(schema, dict):
+        # An object holding none of the expected keys (including ``{}``) is not an
+        # answer, even when every key is optional: it may be a list item picked
+        # up as a candidate, or the model may have returned nothing.
+        if not isinstance(value, dict) or (schema and not value.keys() & schema.keys()):
+            return False
+        return all(
+            _matches(value[k], s.schema if isinstance(s, OptionalKey) else s) if value.get(k) is not None
+            else isinstance(s, OptionalKey)
+            for k, s in schema.items()
+        )
+    if isinstance(schema, list):
+        return isinstance(value, list) and all(_matches(v, schema[0]) for v in value)
+    return isinstance(value, schema)
+
+
+def _with_defaults(value, schema):
+    """``value`` (which matches ``schema``) with its missing optional keys filled in."""
+    if not isinstance(schema, dict):
+        return value
+    missing = {k: list(s.default) for k, s in schema.items() if isinstance(s, OptionalKey) and value.get(k) is None}
+    return dict(value, **missing) if missing else value
+
+
+def _validated(value, schema):
+    if not _matches(value, schema):
+        tracer.annotate(parse_failures=1)
+        raise OutputParserException(f"Response does not match the expected schema: {str(value)[:200]}")
+    return _with_defaults(value, schema)
+
+
+def _parse(parser, schema=None, accept=None):
+    """Finish a ``JsonStreamParser`` and check the value against ``schema``.
+
+    ``accept`` (default: matches ``schema``) picks among candidate values
+    when the response has more than one bracketed value. Repairs and
+    failures are counted on the current span.
+    """
+    if accept is None and schema is not None:
+        def accept(value):
+            return _matches(value, schema)
+    try:
+        value = parser.finish(accept)
+    except OutputParserException:
+        tracer.annotate(parse_failures=1)
+        raise
+    if parser.repairs:
+        tracer.annotate(parse_repairs=1, **{"repaired_" + kind: n for kind, n in parser.repairs.items()})
+    return value if schema is None else _validated(value, schema)
+
+
+def _json_validator(schema):
+    """Parser for ``Chain._invoke``: parse (and repair) JSON and check it against ``schema``."""
+    return lambda text: _parse(JsonStreamParser().feed(text), schema)
+
+
+def _conforms(schema):
+    """Predicate for ``Chain._stream``: is a completion complete JSON matching ``schema``?"""
+    def check(text):
+        parser = JsonStreamParser().feed(text)
+        try:
+            value = parser.finish(lambda value: _matches(value, schema))
+        except OutputParserException:
+            return False
+        return not parser.truncated and _matches(value, schema)
+    return check
+
+
+def _cut_off(message):
+    # The provider stopped at the output token limit.
+    return (getattr(message, "response_metadata", None) or {}).get("finish_reason") == "length"
+
+
+def match_resume_skills(resume_skills, job_skills, fuzzy=False):
+    """Local fit score: exact taxonomy matches, or with ``fuzzy`` near-synonyms too. No LLM or API key needed."""
+    if fuzzy:
+        return get_similarity_index().fuzzy_match(resume_skills, job_skills)
+    return match_skills(resume_skills, job_skills)
+
+
+def tier_report(stages):
+    """Calls, escalation rate and latency per model tier, from a ``Tracer.snapshot()`` of ``llm.<tier>`` spans."""
+    return [
+        {
+            "tier": name[len("llm."):],
+            "calls": m["count"],
+            "escalations": m["escalations"],
+            "escalation_rate": round(m["escalations"] / m["count"], 3),
+            "p50_s": m["p50_s"],
+            "p95_s": m["p95_s"],
+        }
+        for name, m in stages.items() if name.startswith("llm.")
+    ]
+
+
 class Chain:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, max_concurrency=8, cache=None, cache_bypass=(), llm=None, backend=None,
+                 scheduler=None, priority=INTERACTIVE, llms=None, routing=None, fuzzy_matching=False, job_index=None,
+                 full_resume=False):
         # if api_key:
         #     os.environ["GROQ_API_KEY"] = api_key
         # elif not os.getenv("GROQ_API_KEY"):
         #     raise ValueError("GROQ_API_KEY must be set either as an environment variable or passed as an argument.")
-        self.llm = ChatGroq(temperature=0, groq_api_key=os.getenv("GROQ_API_KEY"), model_name="meta-llama/llama-4-maverick-17b-128e-instruct")
+        # One chat model per tier. ``llms`` ({tier: model}) or a single ``llm`` for
+        # every tier can be injected; otherwise ``backend`` ("groq" or "fake",
+        # default $LLM_BACKEND or groq) picks pooled clients for MODEL_TIERS.
+        if llms:
+            self.llms = dict(llms)
+        elif llm is not None:
+            self.llms = dict.fromkeys(MODEL_TIERS, llm)
+        else:
+            # ``api_key`` is passed to each model rather than set in os.environ, so
+            # chains for different users can share a process.
+            self.llms = {
+                tier: get_llm(backend, model_name=name, api_key=api_key) for tier, name in MODEL_TIERS.items()
+            }
+        self.routing = dict(TASK_TIERS, **(routing or {}))
+        self.llm = self.llms["large"]
+        self.model_name = self.model_for("write_mail")
+        self.max_concurrency = max_concurrency
+        # Optional LLMCache; methods named in cache_bypass always hit the LLM.
+        self.cache = cache
+        self.cache_bypass = set(cache_bypass)
+        # Every LLM call goes through a rate-limit scheduler, shared per process by default.
+        self.scheduler = scheduler or get_scheduler()
+        self.priority = priority
+        # Per-job skill matching: exact taxonomy matches, or also near-synonyms.
+        self.fuzzy_matching = fuzzy_matching
+        # Optional JobIndex; analyze_jobs reuses the stored analysis of near-duplicate jobs.
+        self.job_index = job_index
+        # Per-job prompts get a compact profile of the parsed resume unless this is set.
+        self.full_resume = full_resume
+
+    def _tier_model(self, tier):
+        return getattr(self.llms[tier], "model_name", None) or MODEL_TIERS[tier]
+
+    def model_for(self, task):
+        """Name of the model a task is routed to first."""
+        return self._tier_model(self.routing.get(task, "large"))
 
-    def extract_jobs(self, cleaned_text):
+    def _tiers(self, task):
+        """The task's routed tier followed by the larger tiers it can escalate to."""
+        tiers = list(self.llms)
+        tiers = tiers[tiers.index(self.routing.get(task, "large")):]
+        # Escalating to the very same model would only repeat the answer.
+        return [t for i, t in enumerate(tiers) if i == 0 or self.llms[t] is not self.llms[tiers[i - 1]]]
+
+    def _invoke(self, task, prompt, inputs, parse=None):
+        """Run the task's prompt on its model tier and return the completion text.
+
+        With ``parse`` the parsed value is returned instead; if parsing
+        raises ``OutputParserException`` the call is repeated on the next
+        larger tier, unless the output was merely cut off. Only completions
+        that parse are cached.
+        """
+        tiers = self._tiers(task)
+        for tier in tiers:
+            with tracer.span(f"llm.{tier}", task=task, model=self._tier_model(tier)) as span:
+                key = self._cache_key(task, tier, prompt, inputs)
+                cached = self._cached(key, parse)
+                if cached is not None:
+                    return cached[1]
+                message = self._complete(tier, prompt, inputs)
+                content = message.content
+                try:
+                    value = content if parse is None else parse(content)
+                except TruncatedOutput:
+                    # A larger model would hit the same output limit.
+                    raise
+                except OutputParserException:
+                    if tier == tiers[-1]:
+                        raise
+                    span.add(escalations=1)
+                    continue
+                if key is not None and not _cut_off(message):
+                    self.cache.set(key, content)
+                return value
+
+    def _cache_key(self, task, tier, prompt, inputs):
+        if self.cache is None or task in self.cache_bypass:
+            return None
+        return self.cache.key(self._tier_model(tier), prompt.template, inputs)
+
+    def _cached(self, key, parse=None, check=None):
+        """``(content, value)`` from the cache, or ``None`` on a miss.
+
+        An entry that no longer parses or passes ``check`` (e.g. written
+        before responses were validated) counts as a miss and is replaced by
+        the next good answer.
+        """
+        if key is None:
+            return None
+        content = self.cache.get(key)
+        if content is None or check is not None and not check(content):
+            return None
+        try:
+            value = content if parse is None else parse(content)
+        except OutputParserException:
+            return None
+        tracer.annotate(cache_hits=1)
+        return content, value
+
+    def _complete(self, tier, prompt, inputs):
+        """Run ``prompt | llm`` for one tier through the scheduler and return the message."""
+        llm = self.llms[tier]
+        estimate = self._estimate_tokens(prompt, inputs)
+        message = self.scheduler.call(lambda: (prompt | llm).invoke(inputs), estimate, self.priority)
+        self._record_usage(message, estimate)
+        return message
+
+    def _stream(self, task, prompt, inputs, check=None):
+        """Yield completion text chunks as they arrive; a cache hit yields the whole text at once.
+
+        Streams run on the task's tier without escalation. The completion is
+        cached once it is complete and, with ``check``, only if it passes.
+        """
+        tier = self._tiers(task)[0]
+        llm = self.llms[tier]
+        with tracer.span(f"llm.{tier}", task=task, model=self._tier_model(tier)):
+            key = self._cache_key(task, tier, prompt, inputs)
+            cached = self._cached(key, check=check)
+            if cached is not None:
+                yield cached[0]
+                return
+            content, cut_off = "", False
+            estimate = self._estimate_tokens(prompt, inputs)
+            for chunk in self.scheduler.stream(lambda: (prompt | llm).stream(inputs), estimate, self.priority):
+                if chunk.usage_metadata:
+                    self._record_usage(chunk, estimate)
+                cut_off = cut_off or _cut_off(chunk)
+                content += chunk.content
+                yield chunk.content
+            if key is not None and not cut_off and (check is None or check(content)):
+                self.cache.set(key, content)
+
+    @staticmethod
+    def _estimate_tokens(prompt, inputs):
+        return estimate_tokens(prompt.format(**inputs)) + EXPECTED_COMPLETION_TOKENS
+
+    def _record_usage(self, message, estimate):
+        usage = usage_from(message)
+        tracer.annotate(**usage)
+        if any(usage.values()):
+            self.scheduler.charge(sum(usage.values()) - estimate)
+
+    @traced("chain.extract_jobs")
+    def extract_jobs(self, cleaned_text, max_chunk_tokens=JOB_CHUNK_TOKENS):
+        """Extract job dicts from a careers page of any size.
+
+        Pages over ``max_chunk_tokens`` are split on posting boundaries, the
+        chunks are extracted in parallel and the results merged and
+        deduplicated. A chunk the model cannot handle is halved and retried
+        instead of failing the whole page.
+        """
+        chunks = split_job_postings(cleaned_text, max_chunk_tokens)
+        if len(chunks) == 1:
+            return self._extract_jobs_chunk(chunks[0], max_chunk_tokens)
+        with ThreadPoolExecutor(max_workers=min(len(chunks), self.max_concurrency)) as pool:
+            futures = [pool.submit(propagate(self._extract_jobs_chunk), chunk, max_chunk_tokens) for chunk in chunks]
+        results, errors = [], []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                errors.append(e)
+        if not results:
+            raise errors[0]
+        return merge_jobs(results)
+
+    def _extract_jobs_chunk(self, page_data, max_chunk_tokens):
+        try:
+            return self._extract_jobs(page_data)
+        except Exception as e:
+            half = max_chunk_tokens // 2
+            if not _is_context_error(e) or half < MIN_JOB_CHUNK_TOKENS or estimate_tokens(page_data) <= half:
+                raise
+        tracer.annotate(retries=1)
+        return self.extract_jobs(page_data, half)
+
+    def _extract_jobs(self, cleaned_text):
         prompt_extract = PromptTemplate.from_template(
             """
             ### SCRAPED TEXT FROM WEBSITE:
@@ -33,16 +454,33 @@ class Chain:
             ### VALID JSON (NO PREAMBLE):
             """
         )
-        chain_extract = prompt_extract | self.llm
-        res = chain_extract.invoke(input={"page_data": cleaned_text})
+        def as_list(value):
+            return value if isinstance(value, list) else [value]
+
+        def parse(text):
+            parser = JsonStreamParser().feed(text)
+            res = _parse(parser, accept=lambda value: _matches(as_list(value), SCHEMAS["jobs"]))
+            if parser.truncated:
+                # Repairing would silently drop the jobs after the cut; the caller halves the chunk instead.
+                tracer.annotate(parse_failures=1)
+                raise TruncatedOutput("The job list was cut off before it ended")
+            return _validated(as_list(res), SCHEMAS["jobs"])
+
         try:
-            json_parser = JsonOutputParser()
-            res = json_parser.parse(res.content)
-        except OutputParserException:
-            raise OutputParserException("Context too big. Unable to parse jobs.")
-        return res if isinstance(res, list) else [res]
+            return self._invoke("extract_jobs", prompt_extract, {"page_data": cleaned_text}, parse=parse)
+        except OutputParserException as e:
+            raise type(e)(f"Unable to parse jobs from the model response: {e}")
 
+    @traced("chain.write_mail")
     def write_mail(self, job, resume_text):
+        return self._invoke("write_mail", *self._mail_prompt(job, resume_text))
+
+    @traced("chain.write_mail")
+    def stream_mail(self, job, resume_text):
+        """Like ``write_mail`` but yields the email text token by token."""
+        yield from self._stream("write_mail", *self._mail_prompt(job, resume_text))
+
+    def _mail_prompt(self, job, resume_text):
         prompt_email = PromptTemplate.from_template(
             """
             ### JOB DESCRIPTION:
@@ -67,13 +505,12 @@ class Chain:
             """
         )
 
-        chain_email = prompt_email | self.llm
-        res = chain_email.invoke({
+        return prompt_email, {
         "job_description": str(job),
         # "link_list": links,
         "resume_text": resume_text
-        })
-        return res.content
+        }
+    @traced("chain.extract_resume_sections")
     def extract_resume_sections(self, resume_text):
         prompt = PromptTemplate.from_template(
             """
@@ -107,13 +544,16 @@ class Chain:
             ONLY return valid JSON.
             """
         )
-        chain = prompt | self.llm
-        response = chain.invoke({"resume_text": resume_text})
-        
-        parser = JsonOutputParser()
-        return parser.parse(response.content)
+        return self._invoke("extract_resume_sections", prompt, {"resume_text": resume_text},
+                            parse=_json_validator(SCHEMAS["resume_sections"]))
 
-    def skill_matching(self, resume_skills, job_skills):
+    @traced("chain.skill_matching")
+    def skill_matching(self, resume_skills, job_skills, use_llm=False, fuzzy=None):
+            # Matching is a set intersection over the skill taxonomy, or with
+            # ``fuzzy`` a local similarity search that also accepts near-synonyms;
+            # the LLM is only consulted when explicitly asked for.
+            if not use_llm:
+                return match_resume_skills(resume_skills, job_skills, self.fuzzy_matching if fuzzy is None else fuzzy)
             prompt_extract = PromptTemplate.from_template(
                 """
                 ### SKILLS FROM RESUME:
@@ -134,50 +574,12 @@ class Chain:
                 ONLY return valid JSON.
                 """
             )
-            chain_extract = prompt_extract | self.llm
-            res = chain_extract.invoke(input={"resume_skills": resume_skills, "job_skills": job_skills})
             try:
-                json_parser = JsonOutputParser()
-                res = json_parser.parse(res.content)
-            except OutputParserException:
-                raise OutputParserException("Context too big. Unable to parse jobs.")
-            return res
-    def improve_resume(self, resume_text, job_description, job_skills):
-        prompt_improve = PromptTemplate.from_template(
-            """
-            ### JOB DESCRIPTION:
-            {job_description}
-            ### JOB SKILLS:
-            {job_skills}
-
-            ### RESUME:
-            {resume_text}
-
-            ### INSTRUCTION:
-            Identify missing or weakly represented job skills in the resume. Suggest exact changes to the resume to improve the match, such as:
-            - Rewording existing bullets to better align
-            - Adding new projects/skills (if relevant)
-            - Reordering sections for impact
-            Do not add any preamble, headings, or external commentary.
-            ### FORMAT:
-            {{
-                "missing_skills": ["Python", "TensorFlow"],
-                "suggested_changes": [
-                    "Add a project on machine learning with TensorFlow",
-                    "Reword the Python experience to highlight data analysis"
-                ]
-            }}
-
-            """
-        )
-        chain_improve = prompt_improve | self.llm
-        res = chain_improve.invoke(input={"resume_text": resume_text, "job_description": job_description,"job_skills": job_skills})
-        try:
-                json_parser = JsonOutputParser()
-                res = json_parser.parse(res.content)
-        except OutputParserException:
-                raise OutputParserException("Context too big. Unable to parse jobs.")
-        return res
+                return self._invoke("skill_matching", prompt_extract, {"resume_skills": resume_skills, "job_skills": job_skills},
+                                    parse=_json_validator(SCHEMAS["skill_match"]))
+            except OutputParserException as e:
+                raise OutputParserException(f"Unable to parse skill match: {e}")
+    @traced("chain.explain_skill_match")
     def explain_skill_match(self, resume_text, job_skills):
         prompt = PromptTemplate.from_template(
             """
@@ -210,16 +612,42 @@ class Chain:
         )
 
 
-        chain = prompt | self.llm
-        result = chain.invoke({"resume_text": resume_text, "job_skills": job_skills})
-
         try:
-            json_parser = JsonOutputParser()
-            result = json_parser.parse(result.content)
-        except Exception as e:
+            return self._invoke("explain_skill_match", prompt, {"resume_text": resume_text, "job_skills": job_skills},
+                                parse=_json_validator(SCHEMAS["explanation"]))
+        except OutputParserException as e:
             raise RuntimeError(f"Failed to parse skill match explanation: {e}")
-        return result
+    @traced("chain.improve_resume")
     def improve_resume(self, resume_text, job_description, job_skills):
+        prompt, inputs = self._improve_prompt(resume_text, job_description, job_skills)
+        try:
+            return self._invoke("improve_resume", prompt, inputs, parse=_json_validator(SCHEMAS["improvements"]))
+        except OutputParserException as e:
+            raise RuntimeError(f"Unable to parse resume improvement suggestions: {e}")
+
+    @traced("chain.improve_resume")
+    def stream_improve_resume(self, resume_text, job_description, job_skills):
+        """Like ``improve_resume`` but yields growing partial results.
+
+        Each yielded dict only holds list items that are complete; the item
+        the model is still writing is held back. The last value yielded is
+        the fully parsed response.
+        """
+        prompt, inputs = self._improve_prompt(resume_text, job_description, job_skills)
+        parser, last = JsonStreamParser(), None
+        for delta in self._stream("improve_resume", prompt, inputs, check=_conforms(SCHEMAS["improvements"])):
+            partial = _completed_items(parser.feed(delta).partial(), parser)
+            if partial and partial != last:
+                last = partial
+                yield partial
+        try:
+            result = _parse(parser, SCHEMAS["improvements"])
+        except Exception as e:
+            raise RuntimeError(f"Unable to parse resume improvement suggestions: {e}")
+        if result != last:
+            yield result
+
+    def _improve_prompt(self, resume_text, job_description, job_skills):
         prompt = PromptTemplate.from_template(
             """
             ### RESUME TEXT:
@@ -250,44 +678,376 @@ class Chain:
             Only return valid JSON.
             """
         )
-        chain = prompt | self.llm
-        response = chain.invoke({
+        return prompt, {
             "resume_text": resume_text,
             "job_description": job_description,
             "job_skills": job_skills
-        })
+        }
+
+    def job_tasks(self, job, resume_text, resume_skills, stream=False):
+        """Return the independent per-job calls as ``{task: (fn, args)}``.
+
+        With ``stream=True`` the email and suggestion calls are generators of
+        growing snapshots instead of plain calls.
+        """
+        job_skills = job.get("skills", [])
+        improve_args = (resume_text, job.get("description", ""), job_skills)
+        return {
+            "skill_match": (self.skill_matching, (resume_skills, job_skills)),
+            "explanation": (self.explain_skill_match, (resume_text, job_skills)),
+            "improvements": (self.stream_improve_resume if stream else self.improve_resume, improve_args),
+            "email": (lambda *a: _accumulate(self.stream_mail(*a)), (job, resume_text)) if stream
+            else (self.write_mail, (job, resume_text)),
+        }
+
+    @traced("chain.analyze_job_combined")
+    def analyze_job_combined(self, job, resume_text, tasks=COMBINED_TASKS):
+        """Explanation, improvements and email for one job from a single LLM call.
+
+        The job and resume are sent once instead of once per task. Returns
+        ``{task: result}`` shaped like the separate methods' results; a section
+        that is missing or fails its schema is regenerated with its own method.
+        """
+        prompt, inputs = self._combined_prompt(job, resume_text, tasks)
         try:
-            parser = JsonOutputParser()
-            return parser.parse(response.content)
-        except Exception as e:
-            raise RuntimeError(f"Unable to parse resume improvement suggestions: {e}")
-    def analyze_resume_categories(self, resume_text, skills_list):
-        categories = {
-            "Technical Skills": 0,
-            "Tools & Frameworks": 0,
-            "Cloud Experience": 0,
-            "NLP / LLM Relevance": 0,
-            "Soft Skills": 0,
-            "Projects": 0
+            data = self._invoke("analyze_job_combined", prompt, inputs, parse=_json_validator(dict))
+        except OutputParserException:
+            data = {}
+        return self._combined_results(data, job, resume_text, tasks)
+
+    @traced("chain.analyze_job_combined")
+    def stream_job_combined(self, job, resume_text, tasks=COMBINED_TASKS):
+        """Like ``analyze_job_combined`` but yields ``(task, value)`` pairs.
+
+        While the response streams in, improvements and the email are yielded
+        as ``Partial`` snapshots; the final result of every task comes last.
+        """
+        prompt, inputs = self._combined_prompt(job, resume_text, tasks)
+        parser, last = JsonStreamParser(), {}
+        for delta in self._stream("analyze_job_combined", prompt, inputs, check=_conforms(dict)):
+            partial = parser.feed(delta).partial()
+            if not isinstance(partial, dict) or not partial:
+                continue
+            writing = list(partial)[-1]
+            for task in ("improvements", "email"):
+                value = partial.get(task)
+                if task == "improvements" and task == writing:
+                    value = _completed_items(value, parser)
+                if task not in tasks or not value or not _matches(value, SCHEMAS[task]):
+                    continue
+                value = _with_defaults(value, SCHEMAS[task])
+                if value != last.get(task):
+                    last[task] = value
+                    yield task, Partial(value)
+        try:
+            data = _parse(parser, dict)
+        except OutputParserException:
+            data = {}
+        yield from self._combined_results(data, job, resume_text, tasks).items()
+
+    def _combined_prompt(self, job, resume_text, tasks):
+        sections = [COMBINED_SECTIONS[task] for task in COMBINED_TASKS if task in tasks]
+        instructions = "\n            ".join(instruction for instruction, _ in sections)
+        example = ",\n                ".join(example for _, example in sections)
+        prompt = PromptTemplate.from_template(
+            """
+            ### JOB DESCRIPTION:
+            {job_description}
+
+            ### MY RESUME:
+            {resume_text}
+
+            ### INSTRUCTION:
+            Analyze this job application in one pass and return a single JSON object with these keys:
+            """ + instructions + """
+
+            Do not add any preamble, headings, or external commentary.
+
+            ### FORMAT:
+            {{
+                """ + example + """
+            }}
+            ONLY return valid JSON.
+            """
+        )
+        return prompt, {"job_description": str(job), "resume_text": resume_text}
+
+    def _combined_results(self, data, job, resume_text, tasks):
+        fallbacks = self.job_tasks(job, resume_text, ())
+        results = {}
+        for task in COMBINED_TASKS:
+            if task not in tasks:
+                continue
+            value = data.get(task)
+            if _matches(value, SCHEMAS[task]):
+                value = _with_defaults(value, SCHEMAS[task])
+            else:
+                # Fall back to the task's own prompt for this section only.
+                tracer.annotate(retries=1)
+                fn, args = fallbacks[task]
+                try:
+                    value = fn(*args)
+                except Exception as e:
+                    value = e
+            results[task] = value
+        return results
+
+    def _prompt_resume(self, resume_text, resume_sections=None):
+        """``(text, profile)``: the resume as per-job prompts get it, and its ``ResumeProfile`` if one is used."""
+        resume_text = get_resume_features(resume_text).text
+        if not resume_sections or self.full_resume:
+            return resume_text, None
+        profile = get_resume_profile(resume_text, resume_sections)
+        return profile.text, profile
+
+    @staticmethod
+    def _record_profile(profile, prompts):
+        if profile is not None:
+            with tracer.span("resume_profile", tokens=profile.tokens, full_tokens=profile.full_tokens,
+                             prompts=prompts) as span:
+                span.add(resume_tokens_saved=profile.saved * prompts)
+
+    @traced("chain.write_mails")
+    def write_mails(self, jobs, resume_text, max_concurrency=None, pack=1, resume_sections=None):
+        """Cold emails for many jobs, in job order; a job whose call failed gets the exception.
+
+        Calls run through ``RunnableLambda.batch`` with at most
+        ``max_concurrency`` in flight. With ``pack`` > 1, up to ``pack``
+        short jobs share one prompt that returns a JSON array keyed by job;
+        a job missing from the answer is written on its own.
+        """
+        return self._batch("write_mail_packed", jobs, resume_text, max_concurrency, pack, resume_sections)
+
+    @traced("chain.improve_resume_batch")
+    def improve_resume_batch(self, resume_text, jobs, max_concurrency=None, pack=1, resume_sections=None):
+        """``improve_resume`` for many jobs, batched and optionally packed like ``write_mails``."""
+        return self._batch("improve_resume_packed", jobs, resume_text, max_concurrency, pack, resume_sections)
+
+    def _batch(self, task, jobs, resume_text, max_concurrency, pack, resume_sections):
+        resume_text, profile = self._prompt_resume(resume_text, resume_sections)
+        groups = _pack(jobs, pack)
+        self._record_profile(profile, len(groups))
+
+        def run(group):
+            if len(group) == 1:
+                return [self._single(task, jobs[group[0]], resume_text)]
+            return self._packed(task, [jobs[idx] for idx in group], resume_text)
+
+        results = [None] * len(jobs)
+        outputs = RunnableLambda(run).batch(
+            groups, config={"max_concurrency": max_concurrency or self.max_concurrency}, return_exceptions=True,
+        )
+        for group, output in zip(groups, outputs):
+            for pos, idx in enumerate(group):
+                results[idx] = output if isinstance(output, Exception) else output[pos]
+        return results
+
+    def _single(self, task, job, resume_text):
+        if PACKED_TASKS[task][0] == "write_mail":
+            return self.write_mail(job, resume_text)
+        return self.improve_resume(resume_text, job.get("description", ""), job.get("skills", []))
+
+    def _packed(self, task, jobs, resume_text):
+        """One prompt for several jobs; returns a result (or exception) per job."""
+        section = PACKED_TASKS[task][1]
+        instruction, example = COMBINED_SECTIONS[section]
+        prompt = PromptTemplate.from_template(
+            """
+            {jobs}
+
+            ### MY RESUME:
+            {resume_text}
+
+            ### INSTRUCTION:
+            For each job above, write the following, using the job's id as `id`:
+            """ + instruction + """
+
+            Return a JSON array with one object per job. Do not add any preamble, headings, or external commentary.
+
+            ### FORMAT:
+            [
+                {{"id": "1", """ + example + """}}
+            ]
+            ONLY return valid JSON.
+            """
+        )
+        blocks = "\n\n".join(f"### JOB {key}:\n{job}" for key, job in enumerate(jobs, 1))
+        try:
+            items = self._invoke(task, prompt, {"jobs": blocks, "resume_text": resume_text},
+                                 parse=_json_validator(SCHEMAS["packed"]))
+        except OutputParserException:
+            items = []
+        by_key = {str(item.get("id")): item.get(section) for item in items}
+        results = []
+        for key, job in enumerate(jobs, 1):
+            value = by_key.get(str(key))
+            if _matches(value, SCHEMAS[section]):
+                value = _with_defaults(value, SCHEMAS[section])
+            else:
+                # Write this job on its own prompt instead.
+                tracer.annotate(retries=1)
+                try:
+                    value = self._single(task, job, resume_text)
+                except Exception as e:
+                    value = e
+            results.append(value)
+        return results
+
+    def analyze_jobs(self, jobs, resume_text, resume_skills, max_concurrency=None, stream=False, tasks=None,
+                     combined=False, resume_sections=None):
+        """Run every per-job call for every job at once on a thread pool.
+
+        Yields ``(job_index, task, result)`` in completion order, so callers can
+        render each result as soon as it arrives. A failed call yields the
+        exception instead of a result and does not stop the other calls.
+        With ``stream=True``, streaming tasks also yield ``Partial`` snapshots
+        before their final result. ``tasks`` optionally limits which calls run.
+        With ``combined=True`` the explanation, improvements and email of a job
+        come from one ``analyze_job_combined`` call instead of three.
+        With a ``job_index``, a job that near-duplicates one analysed before
+        (or an earlier job in ``jobs``) reuses that analysis instead of
+        calling the LLM; new results are stored for next time.
+        Given ``resume_sections`` (``extract_resume_sections`` output), the
+        prompts carry a token-budgeted profile built from them instead of
+        the whole resume, unless the chain was made with ``full_resume=True``.
+        """
+        workers = max_concurrency or self.max_concurrency
+        events = queue.Queue()
+        # Resume-only work happens once here, not per job: prompts get the
+        # compacted text (or the profile) and the matcher the canonical skill list.
+        resume_skills = get_resume_features(resume_text).skills(resume_skills)
+        resume_text, profile = self._prompt_resume(resume_text, resume_sections)
+
+        def run(idx, task, fn, args):
+            with tracer.job(idx):
+                try:
+                    result = fn(*args)
+                    if isinstance(result, types.GeneratorType):
+                        final = None
+                        for final in result:
+                            events.put((idx, task, Partial(final)))
+                        result = final
+                except Exception as e:
+                    result = e
+            events.put((idx, task, result))
+
+        def run_combined(idx, group, job):
+            with tracer.job(idx):
+                try:
+                    if stream:
+                        for task, result in self.stream_job_combined(job, resume_text, group):
+                            events.put((idx, task, result))
+                        return
+                    results = self.analyze_job_combined(job, resume_text, group)
+                except Exception as e:
+                    results = dict.fromkeys(group, e)
+            for task, result in results.items():
+                events.put((idx, task, result))
+
+        # Look every job up before any LLM call: near-duplicates of a job earlier
+        # in this call become copies of it, and stored analyses are reused.
+        # Only the LLM tasks are shared; skill_match is local and always run
+        # for the job itself.
+        job_ids, copies, reused = {}, {}, []
+        if self.job_index is not None:
+            key = self.job_index.analysis_key(
+                resume_text, sorted(resume_skills), {task: self.model_for(task) for task in self.routing},
+                self.fuzzy_matching,
+            )
+            with tracer.span("job_index.lookup", jobs=len(jobs)):
+                first = {}
+                for idx, job in enumerate(jobs):
+                    job_id, duplicate = self.job_index.find_or_add(job)
+                    if job_id is None:
+                        continue
+                    # A near-duplicate asking for other skills needs its own analysis.
+                    entry = (job_id, self.job_index.analysis_key(key, skill_set(job)))
+                    if entry in first:
+                        copies.setdefault(first[entry], []).append(idx)
+                        continue
+                    first[entry], job_ids[idx] = idx, entry
+                    if duplicate:
+                        stored = self.job_index.analyses(*entry)
+                        reused.extend((idx, task, stored[task]) for task in stored
+                                      if task in COMBINED_TASKS and (tasks is None or task in tasks))
+                tracer.annotate(cache_hits=len(reused))
+        copied = {idx for dups in copies.values() for idx in dups}
+
+        def fan_out(event):
+            idx, task, result = event
+            yield event
+            for dup in copies.get(idx, ()) if task in COMBINED_TASKS else ():
+                yield dup, task, result
+
+        for event in reused:
+            yield from fan_out(event)
+        done = {(idx, task) for idx, task, _ in reused}
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = prompts = 0
+            for idx, job in enumerate(jobs):
+                job_tasks = self.job_tasks(job, resume_text, resume_skills, stream)
+                wanted = [
+                    task for task in job_tasks
+                    if (tasks is None or task in tasks) and (idx, task) not in done
+                    and not (idx in copied and task in COMBINED_TASKS)
+                ]
+                group = tuple(task for task in wanted if task in COMBINED_TASKS) if combined else ()
+                if len(group) > 1:
+                    pool.submit(propagate(run_combined), idx, group, job)
+                    pending += len(group)
+                    prompts += 1
+                    wanted = [task for task in wanted if task not in group]
+                for task in wanted:
+                    fn, args = job_tasks[task]
+                    pool.submit(propagate(run), idx, task, fn, args)
+                    pending += 1
+                    prompts += task in COMBINED_TASKS  # skill_match never sees the resume
+            self._record_profile(profile, prompts)
+            while pending:
+                event = events.get()
+                idx, task, result = event
+                if not isinstance(result, Partial):
+                    pending -= 1
+                    if idx in job_ids and task in COMBINED_TASKS and not isinstance(result, Exception):
+                        self.job_index.save_analysis(*job_ids[idx], task, result)
+                yield from fan_out(event)
+
+    def analyze_job(self, job, resume_text, resume_skills, combined=False, resume_sections=None):
+        """Blocking helper returning ``{task: result}`` for a single job."""
+        return {
+            task: result
+            for _, task, result in self.analyze_jobs([job], resume_text, resume_skills, combined=combined,
+                                                     resume_sections=resume_sections)
         }
 
-        resume_lower = resume_text.lower()
-
-        # Define category-specific keywords
-        tools = ["tensorflow", "pytorch", "keras", "docker", "git", "onnx", "scikit", "opencv"]
-        cloud = ["aws", "azure", "gcp", "google cloud", "s3", "lambda"]
-        nlp = ["nlp", "bert", "gpt", "llm", "langchain", "transformers"]
-        soft = ["communication", "leadership", "collaboration", "team", "initiative"]
-        
-        # Count matches
-        categories["Technical Skills"] = len(skills_list)
-        categories["Tools & Frameworks"] = sum(t in resume_lower for t in tools)
-        categories["Cloud Experience"] = sum(c in resume_lower for c in cloud)
-        categories["NLP / LLM Relevance"] = sum(n in resume_lower for n in nlp)
-        categories["Soft Skills"] = sum(s in resume_lower for s in soft)
-        categories["Projects"] = resume_lower.count("project")  # basic proxy
-
-        return categories
+    @traced("chain.analyze_resume_categories")
+    def analyze_resume_categories(self, resume_text, skills_list):
+        """Radar chart scores, read from the resume's cached feature index."""
+        return get_resume_features(resume_text).categories(skills_list)
+
+
+# Chains handed out by get_chain, most recently used last.
+MAX_POOLED_CHAINS = 32
+_chains = OrderedDict()
+_chains_lock = threading.Lock()
+
+
+def get_chain(api_key=None, **options):
+    """Process-wide ``Chain`` per API key and options (``cache=``, ``fuzzy_matching=``, ...).
+
+    Reruns and worker tasks reuse one warm ``Chain`` and its pooled model
+    clients instead of building new ones on every button press.
+    """
+    key = (api_key, repr(sorted(options.items())))
+    with _chains_lock:
+        chain = _chains.get(key)
+        if chain is None:
+            chain = _chains[key] = Chain(api_key=api_key, **options)
+        _chains.move_to_end(key)
+        while len(_chains) > MAX_POOLED_CHAINS:
+            _chains.popitem(last=False)
+        return chain
 
 
 if __name__ == "__main__":
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tracing import propagate, tracer
+from utils import clean_text
+
+# Bump when clean_text changes so cached page text is regenerated.
+CACHE_VERSION = 4
+USER_AGENT = "Mozilla/5.0 (compatible; ResuIntelGenAI/1.0)"
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: int
+    html: str
+    text: str            # cleaned page text, ready for Chain.extract_jobs
+    from_cache: bool     # True when the server answered 304 Not Modified
+    elapsed: float       # seconds spent on the request
+    bytes: int
+
+
+class PageFetcher:
+    """Fetch job pages over a shared, pooled HTTP session with an on-disk cache.
+
+    Pages are stored with their ``ETag``/``Last-Modified`` validators and
+    revalidated with conditional requests; a 304 reuses both the stored HTML
+    and its already-cleaned text. ``per_host`` caps concurrent requests to
+    any one site when fetching many URLs at once.
+    """
+
+    def __init__(self, cache_dir=".cache/pages", per_host=4, max_workers=16, timeout=20, pool_size=32):
+        self.cache_dir = cache_dir
+        self.per_host = per_host
+        self.max_workers = max_workers
+        self.timeout = timeout
+        os.makedirs(cache_dir, exist_ok=True)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = USER_AGENT
+        self._host_limits = {}
+        self._lock = threading.Lock()
+
+    def _host_limit(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.Semaphore(self.per_host)
+            return self._host_limits[host]
+
+    def _cache_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _load_cached(self, url):
+        try:
+            with open(self._cache_path(url), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Entries cleaned by an older clean_text are refetched rather than reused.
+        return entry if entry.get("version") == CACHE_VERSION else None
+
+    def _store(self, url, entry):
+        path = self._cache_path(url)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+    def fetch(self, url):
+        with tracer.span("fetch", url=url) as span:
+            result = self._fetch(url)
+            span.update(status=result.status, bytes=result.bytes)
+            if result.from_cache:
+                span.add(cache_hits=1)
+            return result
+
+    def _fetch(self, url):
+        cached = self._load_cached(url)
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        with self._host_limit(url):
+            start = time.perf_counter()
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            elapsed = time.perf_counter() - start
+
+        if response.status_code == 304 and cached:
+            return FetchResult(url, 304, cached["html"], cached["text"], True, elapsed, 0)
+        response.raise_for_status()
+
+        html = response.text
+        entry = {
+            "version": CACHE_VERSION,
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "html": html,
+            "text": clean_text(html),
+        }
+        if entry["etag"] or entry["last_modified"]:
+            self._store(url, entry)
+        return FetchResult(url, response.status_code, html, entry["text"], False, elapsed, len(response.content))
+
+    def fetch_many(self, urls):
+        """Fetch ``urls`` concurrently; yields ``FetchResult`` (or the raised exception) per URL as it completes."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(propagate(self.fetch), url): url for url in urls}
+            for future in as_completed(futures):
+                try:
+                    yield future.result()
+                except Exception as e:
+                    e.url = futures[future]
+                    yield e
+
+
+_default_fetcher = None
+_default_lock = threading.Lock()
+
+
+def get_fetcher():
+    """Process-wide fetcher so every caller shares one connection pool and page cache."""
+    global _default_fetcher
+    with _default_lock:
+        if _default_fetcher is None:
+            _default_fetcher = PageFetcher()
+        return _default_fetcher
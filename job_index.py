@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from llm_cache import _Transaction
+from resume_features import TOKEN_PATTERN
+from skill_matcher import get_taxonomy, normalize_skill
+
+# MinHash signature length, split into LSH bands of ROWS_PER_BAND rows. Two
+# jobs share a band with probability s ** ROWS_PER_BAND per band, so jobs
+# with Jaccard similarity s become candidates with probability
+# 1 - (1 - s ** 4) ** 32: ~0.23 at s = 0.3, ~0.9996 at s = 0.7.
+NUM_PERM = 128
+BANDS = 32
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+# Estimated Jaccard similarity of word 3-grams at which a job counts as a
+# near-duplicate: about two words in a hundred changed, or a short footer added.
+DUPLICATE_THRESHOLD = 0.7
+
+# Multiply-shift hashing, one random odd multiplier per signature row.
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(0, 1 << 63, NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_PERM_B = _rng.randint(0, 1 << 63, NUM_PERM, dtype=np.uint64)
+# Per-row multipliers and per-band salts that fold a band's rows into one bucket id.
+_BAND_A = _rng.randint(0, 1 << 63, ROWS_PER_BAND, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_BAND_SALT = _rng.randint(0, 1 << 63, BANDS, dtype=np.uint64)
+
+
+def _skills(job):
+    skills = job.get("skills") or []
+    return [str(skills)] if isinstance(skills, str) else [str(s) for s in skills]
+
+
+def skill_set(job):
+    """The job's canonical skills, sorted: near-duplicates share analyses only if these are equal."""
+    return sorted({skill.lower() for skill in get_taxonomy().canonicalize(_skills(job))})
+
+
+def job_text(job):
+    """The fields two postings must share to be the same job: role, description and skills."""
+    return " ".join([str(job.get("role") or ""), str(job.get("description") or "")] + _skills(job))
+
+
+def shingles(job):
+    tokens = TOKEN_PATTERN.findall(job_text(job).lower())
+    if len(tokens) < SHINGLE_SIZE:
+        return set(tokens)
+    return {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+
+def signature(job):
+    """MinHash signature of the job's word shingles, or ``None`` for a job with no text."""
+    grams = shingles(job)
+    if not grams:
+        return None
+    hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+    # (a * x + b) mod 2**64, keeping the high 32 bits; uint64 arithmetic wraps.
+    permuted = (hashes[:, None] * _PERM_A + _PERM_B) >> np.uint64(32)
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def _buckets(sig):
+    """One signed 64-bit bucket id per band, salted per band so equal rows in different bands differ."""
+    rows = sig.reshape(BANDS, ROWS_PER_BAND).astype(np.uint64)
+    return ((rows * _BAND_A).sum(axis=1) ^ _BAND_SALT).view(np.int64).tolist()
+
+
+def _digest(job):
+    payload = json.dumps(
+        [str(job.get("role") or "").strip().lower(), " ".join(str(job.get("description") or "").lower().split()),
+         sorted(normalize_skill(s) for s in _skills(job))],
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class JobIndex:
+    """Near-duplicate index of extracted jobs, with their stored analyses.
+
+    Each job's role, description and skills are reduced to a MinHash
+    signature of word 3-grams and filed under LSH band buckets in SQLite
+    (WAL mode, like ``LLMCache``). A lookup is one indexed query for the
+    job's bucket ids plus a signature comparison against the few jobs that
+    share a bucket, so it stays sub-millisecond with hundreds of thousands
+    of stored jobs. Analyses are stored per job and per ``analysis_key``
+    (the resume and settings they were run with), so a posting seen before
+    under another URL reuses them instead of calling the LLM again.
+    """
+
+    def __init__(self, path=".cache/job_index.sqlite3", threshold=DUPLICATE_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id INTEGER PRIMARY KEY, digest TEXT UNIQUE NOT NULL, role TEXT, "
+                "signature BLOB NOT NULL, created REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "bucket INTEGER NOT NULL, job_id INTEGER NOT NULL, PRIMARY KEY (bucket, job_id)) WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS analyses ("
+                "job_id INTEGER NOT NULL, key TEXT NOT NULL, task TEXT NOT NULL, value TEXT NOT NULL, "
+                "created REAL NOT NULL, PRIMARY KEY (job_id, key, task)) WITHOUT ROWID"
+            )
+
+    def _connect(self):
+        # One connection per thread and per process, as in LLMCache.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._connect())
+
+    @staticmethod
+    def analysis_key(*parts):
+        """Key for stored analyses: a hash of whatever the results depend on (resume, models, options)."""
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def find(self, job, sig=None):
+        """``(job_id, similarity)`` of the closest stored job at or above the threshold, else ``None``."""
+        conn = self._connect()
+        row = conn.execute("SELECT id FROM jobs WHERE digest = ?", (_digest(job),)).fetchone()
+        if row is not None:
+            return row[0], 1.0
+        sig = signature(job) if sig is None else sig
+        if sig is None:
+            return None
+        buckets = _buckets(sig)
+        candidates = conn.execute(
+            "SELECT id, signature FROM jobs WHERE id IN "
+            f"(SELECT DISTINCT job_id FROM buckets WHERE bucket IN ({','.join('?' * len(buckets))}))",
+            buckets,
+        ).fetchall()
+        best = None
+        for job_id, blob in candidates:
+            similarity = float(np.mean(np.frombuffer(blob, dtype=np.uint32) == sig))
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (job_id, similarity)
+        return best
+
+    def add(self, job, sig=None):
+        """Store ``job`` (if not stored verbatim already) and return its id."""
+        sig = signature(job) if sig is None else sig
+        if sig is None:
+            return None
+        with self._transaction() as conn:
+            return self._insert(conn, job, sig)
+
+    def add_many(self, jobs):
+        """``add`` for many jobs in one transaction; returns their ids."""
+        sigs = [signature(job) for job in jobs]
+        with self._transaction() as conn:
+            return [None if sig is None else self._insert(conn, job, sig) for job, sig in zip(jobs, sigs)]
+
+    @staticmethod
+    def _insert(conn, job, sig):
+        digest = _digest(job)
+        row = conn.execute("SELECT id FROM jobs WHERE digest = ?", (digest,)).fetchone()
+        if row is not None:
+            return row[0]
+        job_id = conn.execute(
+            "INSERT INTO jobs (digest, role, signature, created) VALUES (?, ?, ?, ?)",
+            (digest, str(job.get("role") or ""), sig.tobytes(), time.time()),
+        ).lastrowid
+        conn.executemany("INSERT OR IGNORE INTO buckets VALUES (?, ?)", [(b, job_id) for b in _buckets(sig)])
+        return job_id
+
+    def find_or_add(self, job):
+        """``(job_id, duplicate)``: the near-duplicate already stored, or the newly added job.
+
+        Returns ``(None, False)`` for a job without any text to compare.
+        """
+        sig = signature(job)
+        match = self.find(job, sig)
+        if match is not None:
+            return match[0], True
+        return self.add(job, sig), False
+
+    def analyses(self, job_id, key):
+        """Stored ``{task: result}`` for a job under ``key``."""
+        rows = self._connect().execute(
+            "SELECT task, value FROM analyses WHERE job_id = ? AND key = ?", (job_id, key)
+        ).fetchall()
+        return {task: json.loads(value) for task, value in rows}
+
+    def save_analysis(self, job_id, key, task, result):
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?, ?)",
+                (job_id, key, task, json.dumps(result), time.time()),
+            )
+
+    def stats(self):
+        conn = self._connect()
+        jobs = conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+        analysed = conn.execute("SELECT COUNT(DISTINCT job_id) FROM analyses").fetchone()[0]
+        return {"jobs": jobs, "analysed_jobs": analysed}
+
+    def clear(self):
+        with self._transaction() as conn:
+            for table in ("analyses", "buckets", "jobs"):
+                conn.execute(f"DELETE FROM {table}")
+
+
+_default_index = None
+_default_lock = threading.Lock()
+
+
+def get_job_index():
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            _default_index = JobIndex()
+        return _default_index
@@ -0,0 +1,243 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from llm_cache import _Transaction
+from skill_matcher import get_taxonomy
+
+# Set bits per byte value, for counting the skills two bit rows share.
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _canonical_skills(job):
+    """Canonical skill names of a job; ``skills`` may be a list or one comma-separated string."""
+    skills = job.get("skills") or []
+    if isinstance(skills, str):
+        skills = [skills]
+    return get_taxonomy().canonicalize(skills)
+
+
+def _job_skills(job):
+    """Canonical, lowercased skill names of a job (what ``match_skills`` compares)."""
+    return list(dict.fromkeys(skill.lower() for skill in _canonical_skills(job)))
+
+
+def _digest(job):
+    payload = json.dumps(job, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _fts_query(text):
+    # Every word must appear; quoting keeps user input from being read as FTS5 syntax.
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+class JobStore:
+    """Persistent store of extracted jobs, searchable and rankable against a resume.
+
+    Job dicts from ``Chain.extract_jobs`` go into SQLite (WAL mode, like
+    ``LLMCache``) with an FTS5 index over role, description and skills.
+    Each job's canonical skills are also kept as a row of a jobs x skills
+    bit matrix in memory, so ``rank`` scores every stored job against a
+    resume's skills in one vectorized pass -- the same fit percentage
+    ``match_skills`` computes, without an LLM call per job.
+    """
+
+    def __init__(self, path=".cache/job_store.sqlite3"):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id INTEGER PRIMARY KEY, digest TEXT UNIQUE NOT NULL, url TEXT, role TEXT, description TEXT, "
+                "skills TEXT, job TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS skills (col INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_skills ("
+                "job_id INTEGER NOT NULL, col INTEGER NOT NULL, PRIMARY KEY (job_id, col)) WITHOUT ROWID"
+            )
+            try:
+                conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5("
+                    "role, description, skills, content='jobs', content_rowid='id')"
+                )
+                self.full_text = True
+            except sqlite3.OperationalError:
+                # SQLite built without FTS5: search falls back to LIKE.
+                self.full_text = False
+        # In-memory bit matrix, extended with jobs added since the last rank().
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._bits = np.zeros((0, 0), dtype=np.uint8)
+        self._counts = np.zeros(0, dtype=np.int32)
+        self._columns = {}
+        self._names = []
+
+    def _connect(self):
+        # One connection per thread and per process, as in LLMCache.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._connect())
+
+    def add(self, jobs, url=None):
+        """Store job dicts (skipping exact copies already stored) and return their ids."""
+        ids = []
+        with self._transaction() as conn:
+            for job in jobs:
+                digest = _digest(job)
+                row = conn.execute("SELECT id FROM jobs WHERE digest = ?", (digest,)).fetchone()
+                if row is not None:
+                    ids.append(row[0])
+                    continue
+                skills = _job_skills(job)
+                values = (str(job.get("role") or ""), str(job.get("description") or ""), " ".join(skills))
+                job_id = conn.execute(
+                    "INSERT INTO jobs (digest, url, role, description, skills, job, created) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (digest, url, *values, json.dumps(job, default=str), time.time()),
+                ).lastrowid
+                if self.full_text:
+                    conn.execute("INSERT INTO jobs_fts (rowid, role, description, skills) VALUES (?, ?, ?, ?)",
+                                 (job_id, *values))
+                conn.executemany("INSERT OR IGNORE INTO skills (name) VALUES (?)", [(s,) for s in skills])
+                conn.execute(
+                    "INSERT INTO job_skills SELECT ?, col FROM skills WHERE name IN "
+                    f"({','.join('?' * len(skills))})",
+                    (job_id, *skills),
+                )
+                ids.append(job_id)
+        return ids
+
+    def get(self, ids):
+        """``{id: {"id", "url", "job"}}`` for the given job ids."""
+        ids = [int(i) for i in ids]
+        if not ids:
+            return {}
+        rows = self._connect().execute(
+            f"SELECT id, url, job FROM jobs WHERE id IN ({','.join('?' * len(ids))})", ids
+        ).fetchall()
+        return {job_id: {"id": job_id, "url": url, "job": json.loads(job)} for job_id, url, job in rows}
+
+    def search(self, query, limit=50):
+        """Ids of stored jobs mentioning every word of ``query``, best matches first.
+
+        A query without words matches every job, most recently stored first.
+        """
+        conn = self._connect()
+        if not query.split():
+            rows = conn.execute("SELECT id FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        elif self.full_text:
+            rows = conn.execute(
+                "SELECT rowid FROM jobs_fts WHERE jobs_fts MATCH ? ORDER BY rank LIMIT ?", (_fts_query(query), limit)
+            ).fetchall()
+        else:
+            words = query.lower().split()
+            where = " AND ".join(["lower(role || ' ' || description || ' ' || skills) LIKE ?"] * len(words))
+            rows = conn.execute(
+                f"SELECT id FROM jobs WHERE {where} ORDER BY id DESC LIMIT ?", [f"%{w}%" for w in words] + [limit]
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def _refresh(self):
+        """Append jobs stored since the last call (by any process) to the bit matrix."""
+        conn = self._connect()
+        last = int(self._ids[-1]) if len(self._ids) else 0
+        # One read transaction, so the three queries see the same snapshot.
+        conn.execute("BEGIN")
+        try:
+            new_skills = conn.execute("SELECT col, name FROM skills WHERE col > ? ORDER BY col",
+                                      (len(self._names),)).fetchall()
+            ids = [row[0] for row in conn.execute("SELECT id FROM jobs WHERE id > ? ORDER BY id", (last,))]
+            pairs = conn.execute("SELECT job_id, col FROM job_skills WHERE job_id > ?", (last,)).fetchall()
+        finally:
+            conn.execute("COMMIT")
+        for col, name in new_skills:
+            self._columns[name] = col - 1
+            self._names.append(name)
+        width = (len(self._names) + 7) // 8
+        if width > self._bits.shape[1]:
+            self._bits = np.pad(self._bits, ((0, 0), (0, width - self._bits.shape[1])))
+        if not ids:
+            return
+        ids = np.array(ids, dtype=np.int64)
+        pairs = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+        dense = np.zeros((len(ids), width * 8), dtype=bool)
+        dense[np.searchsorted(ids, pairs[:, 0]), pairs[:, 1] - 1] = True
+        self._ids = np.concatenate([self._ids, ids])
+        self._bits = np.vstack([self._bits, np.packbits(dense, axis=1)])
+        self._counts = np.concatenate([self._counts, dense.sum(axis=1).astype(np.int32)])
+
+    def rank(self, resume_skills, k=10, ids=None):
+        """The ``k`` stored jobs (optionally only ``ids``) that best fit ``resume_skills``.
+
+        Returns ``[{"id", "url", "job", "fit_percentage", "matched_skills"}, ...]``
+        best first; fit is the share of the job's skills found in the resume,
+        as in ``match_skills``.
+        """
+        with self._lock:
+            self._refresh()
+            job_ids, bits, counts, names = self._ids, self._bits, self._counts, list(self._names)
+            columns = self._columns
+        resume = np.zeros(bits.shape[1] * 8, dtype=bool)
+        for skill in get_taxonomy().canonicalize(resume_skills):
+            col = columns.get(skill.lower())
+            if col is not None:
+                resume[col] = True
+        resume = np.packbits(resume)
+        if ids is not None:
+            rows = np.flatnonzero(np.isin(job_ids, np.fromiter(ids, dtype=np.int64)))
+            job_ids, bits, counts = job_ids[rows], bits[rows], counts[rows]
+        if not len(job_ids) or k <= 0:
+            return []
+        hits = _POPCOUNT[bits & resume].sum(axis=1, dtype=np.int32)
+        fit = np.where(counts > 0, hits / np.maximum(counts, 1) * 100, 0.0)
+        k = min(k, len(job_ids))
+        top = np.argpartition(-fit, k - 1)[:k]
+        # Best fit first; among equal fits, the most recently stored job.
+        top = top[np.lexsort((-job_ids[top], -fit[top]))]
+        stored = self.get(job_ids[top])
+        results = []
+        for row in top:
+            entry = stored[int(job_ids[row])]
+            matched = np.flatnonzero(np.unpackbits(bits[row] & resume))
+            names_matched = {names[col] for col in matched}
+            entry["fit_percentage"] = round(float(fit[row]), 2)
+            entry["matched_skills"] = [s for s in _canonical_skills(entry["job"]) if s.lower() in names_matched]
+            results.append(entry)
+        return results
+
+    def stats(self):
+        conn = self._connect()
+        return {
+            "jobs": conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0],
+            "skills": conn.execute("SELECT COUNT(*) FROM skills").fetchone()[0],
+        }
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_job_store():
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = JobStore()
+        return _default_store
@@ -0,0 +1,195 @@
+import json
+import os
+import re
+import threading
+import time
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+from utils import estimate_tokens
+
+DEFAULT_MODEL = "meta-llama/llama-4-maverick-17b-128e-instruct"
+
+# Model per routing tier, smallest first; Chain maps each task to a tier.
+MODEL_TIERS = {
+    "small": os.getenv("LLM_SMALL_MODEL", "llama-3.1-8b-instant"),
+    "large": os.getenv("LLM_LARGE_MODEL", DEFAULT_MODEL),
+}
+
+
+def make_llm(backend=None, model_name=DEFAULT_MODEL, api_key=None, **kwargs):
+    """Build the chat model ``Chain`` talks to.
+
+    ``backend`` is ``"groq"`` (default) or ``"fake"``; it falls back to the
+    ``LLM_BACKEND`` environment variable. Extra keyword arguments go to the
+    model class (e.g. ``latency=`` for the fake).
+
+    Groq's own client retries are off: ``Chain`` retries through its
+    rate-limit scheduler instead, so attempts are not multiplied.
+    """
+    backend = backend or os.getenv("LLM_BACKEND", "groq")
+    if backend == "groq":
+        from langchain_groq import ChatGroq
+
+        kwargs.setdefault("max_retries", 0)
+        return ChatGroq(temperature=0, groq_api_key=api_key or os.getenv("GROQ_API_KEY"), model_name=model_name, **kwargs)
+    if backend == "fake":
+        return FakeChatModel(model_name=f"fake:{model_name}", **kwargs)
+    raise ValueError(f"Unknown LLM backend: {backend!r}")
+
+
+# Idle keep-alive connections are reused for this long (seconds).
+KEEPALIVE_EXPIRY = 120.0
+
+_http_client = None
+_llms = {}
+_llms_lock = threading.Lock()
+
+
+def _shared_http_client():
+    # One connection pool for every Groq client in the process, so a new
+    # model or API key still reuses warm TLS connections to the API.
+    global _http_client
+    if _http_client is None:
+        import httpx
+
+        _http_client = httpx.Client(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=KEEPALIVE_EXPIRY),
+            timeout=httpx.Timeout(60.0, connect=10.0),
+        )
+    return _http_client
+
+
+def get_llm(backend=None, model_name=DEFAULT_MODEL, api_key=None):
+    """Process-wide ``make_llm`` result per backend, model and API key.
+
+    Building a Groq client is slow (import, config validation) and each
+    new client opens new connections; pooled clients share one keep-alive
+    HTTP connection pool instead.
+    """
+    backend = backend or os.getenv("LLM_BACKEND", "groq")
+    key = (backend, model_name, api_key or os.getenv("GROQ_API_KEY"))
+    with _llms_lock:
+        llm = _llms.get(key)
+        if llm is None:
+            kwargs = {"http_client": _shared_http_client()} if backend == "groq" else {}
+            llm = _llms[key] = make_llm(backend, model_name=model_name, api_key=key[2], **kwargs)
+        return llm
+
+
+# Canned completions, chosen by a marker in the prompt of each Chain method.
+FAKE_RESUME = {
+    "name": "Alex Doe",
+    "email": "alex@example.com",
+    "phone": "555-0100",
+    "skills": ["Python", "SQL", "Docker", "PyTorch", "AWS"],
+    "education": ["B.Sc. Computer Science, Example University, 2019"],
+    "experience": ["Data Scientist, Example Corp, 2019-2024"],
+    "certifications": [],
+    "projects": ["CNN image classifier"],
+}
+FAKE_EXPLANATION = {
+    "matched_skills": [{"skill": "Python", "location": "Skills section"}],
+    "unmatched_skills": [{"skill": "Kubernetes", "suggestion": "Mention container orchestration work"}],
+}
+FAKE_IMPROVEMENTS = {
+    "missing_skills": ["Kubernetes"],
+    "suggested_changes": ["Quantify the impact of the image classifier project."],
+    "new_section_ideas": ["Add a certifications section"],
+}
+FAKE_EMAIL = (
+    "Dear Hiring Team,\n\nI am a data scientist with five years of experience building Python and SQL "
+    "pipelines and deploying PyTorch models on AWS. I would welcome the chance to bring that experience "
+    "to your team.\n\nBest regards,\nAlex Doe"
+)
+JOB_MARKER = re.compile(r"Job ID:?\s*(\w+)")
+PACKED_JOB_MARKER = re.compile(r"### JOB (\w+):")
+
+
+def fake_response(prompt):
+    if "SCRAPED TEXT FROM WEBSITE" in prompt:
+        ids = list(dict.fromkeys(JOB_MARKER.findall(prompt))) or ["1"]
+        return json.dumps([
+            {
+                "role": f"Data Scientist {job_id}",
+                "experience": "3+ years",
+                "description": f"Build and deploy machine learning models (posting {job_id}).",
+                "skills": ["Python", "SQL", "Kubernetes"],
+            }
+            for job_id in ids
+        ])
+    if "Return a JSON array with one object per job" in prompt:
+        key, value = ("email", FAKE_EMAIL) if '"email":' in prompt else ("improvements", FAKE_IMPROVEMENTS)
+        return json.dumps([{"id": job_id, key: value} for job_id in PACKED_JOB_MARKER.findall(prompt)], indent=2)
+    if "Analyze this job application in one pass" in prompt:
+        sections = {"explanation": FAKE_EXPLANATION, "improvements": FAKE_IMPROVEMENTS, "email": FAKE_EMAIL}
+        return json.dumps({key: value for key, value in sections.items() if f'"{key}":' in prompt}, indent=2)
+    if "Extract the following fields from the resume" in prompt:
+        return json.dumps(FAKE_RESUME)
+    if "Calculate the percentage of skills" in prompt:
+        return json.dumps({"fit_percentage": 67, "matched_skills": ["Python", "SQL"]})
+    if "Identify which of the job-required skills" in prompt:
+        return json.dumps(FAKE_EXPLANATION)
+    if "Analyze the resume in context of the job" in prompt:
+        return json.dumps(FAKE_IMPROVEMENTS)
+    return FAKE_EMAIL
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic offline stand-in for Groq.
+
+    Returns canned JSON for each ``Chain`` prompt and simulates a provider:
+    ``latency`` seconds before the first token, then ``tokens_per_second``
+    (0 means instant). Call and token counters are kept for benchmarks.
+    """
+
+    model_name: str = "fake"
+    latency: float = 0.0
+    tokens_per_second: float = 0.0
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _stats: dict = PrivateAttr(default_factory=lambda: {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+
+    @property
+    def _llm_type(self):
+        return "fake"
+
+    @property
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    def _respond(self, messages):
+        prompt = "\n".join(str(m.content) for m in messages)
+        content = fake_response(prompt)
+        usage = {"input_tokens": estimate_tokens(prompt), "output_tokens": estimate_tokens(content)}
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["prompt_tokens"] += usage["input_tokens"]
+            self._stats["completion_tokens"] += usage["output_tokens"]
+        return content, usage
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        content, usage = self._respond(messages)
+        time.sleep(self.latency + (usage["output_tokens"] / self.tokens_per_second if self.tokens_per_second else 0))
+        message = AIMessage(content=content, usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        content, usage = self._respond(messages)
+        time.sleep(self.latency)
+        pieces = re.findall(r"\S+\s*|\s+", content)
+        for i, piece in enumerate(pieces):
+            if self.tokens_per_second:
+                time.sleep(estimate_tokens(piece) / self.tokens_per_second)
+            chunk = AIMessageChunk(content=piece, usage_metadata=usage if i == len(pieces) - 1 else None)
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield ChatGenerationChunk(message=chunk)
@@ -0,0 +1,197 @@
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Lookups only read the database. Hit/miss counts and access times are kept in
+# memory and written out every FLUSH_EVERY lookups or FLUSH_INTERVAL seconds;
+# an entry's last_access is only rewritten once it is TOUCH_INTERVAL old, so
+# the LRU order is accurate to that many seconds.
+FLUSH_EVERY = 100
+FLUSH_INTERVAL = 5.0
+TOUCH_INTERVAL = 60.0
+
+
+class LLMCache:
+    """On-disk, content-addressed cache for LLM completions.
+
+    Entries are keyed by a hash of model name, prompt template and prompt
+    inputs, so a temperature-0 call with the same arguments is answered from
+    disk. The store is a SQLite database in WAL mode: several Streamlit
+    sessions, threads and worker processes can share one file safely.
+    Eviction is least-recently-used once ``max_entries`` (or ``max_bytes``)
+    is exceeded; ``ttl`` (seconds) optionally expires old entries.
+    Lookups take no write lock (see ``FLUSH_EVERY``), so they never wait
+    behind another process's writes.
+    """
+
+    def __init__(self, path=".cache/llm_cache.sqlite3", max_entries=10000, max_bytes=None, ttl=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # Counts and access times not yet written to the database.
+        self._pending = {"hits": 0, "misses": 0}
+        self._touched = {}
+        self._flushed = time.monotonic()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access)")
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO counters VALUES ('hits', 0), ('misses', 0)")
+
+    def _connect(self):
+        # One connection per thread and per process; sqlite3 connections must not
+        # cross either boundary.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._connect())
+
+    @staticmethod
+    def key(model_name, template, inputs):
+        payload = json.dumps(
+            {"model": model_name, "template": template, "inputs": inputs},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        # A plain read: in WAL mode it sees the last commit without taking the write lock.
+        row = self._connect().execute(
+            "SELECT value, created, last_access FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+            row = None  # deleted by the next eviction
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                self._pending["misses"] += 1
+            else:
+                self.hits += 1
+                self._pending["hits"] += 1
+                if now - row[2] > TOUCH_INTERVAL:
+                    self._touched[key] = now
+            due = (sum(self._pending.values()) >= FLUSH_EVERY
+                   or time.monotonic() - self._flushed >= FLUSH_INTERVAL)
+        if due:
+            self.flush()
+        return None if row is None else row[0]
+
+    def set(self, key, value):
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), now, now),
+            )
+            self._write_pending(conn)
+            self._evict(conn)
+
+    def flush(self):
+        """Write the hit/miss counts and access times gathered by ``get`` since the last flush."""
+        with self._transaction() as conn:
+            self._write_pending(conn)
+
+    def _write_pending(self, conn):
+        with self._lock:
+            pending, touched = self._pending, self._touched
+            self._pending, self._touched = {"hits": 0, "misses": 0}, {}
+            self._flushed = time.monotonic()
+        conn.executemany("UPDATE counters SET value = value + ? WHERE name = ?",
+                         [(n, name) for name, n in pending.items() if n])
+        conn.executemany("UPDATE entries SET last_access = MAX(last_access, ?) WHERE key = ?",
+                         [(at, key) for key, at in touched.items()])
+
+    def _evict(self, conn):
+        if self.ttl is not None:
+            conn.execute("DELETE FROM entries WHERE created < ?", (time.time() - self.ttl,))
+        if self.max_entries is not None:
+            conn.execute(
+                "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+        if self.max_bytes is not None:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall():
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                total -= size
+
+    def stats(self):
+        """Hit/miss counters for this process and across every user of the file.
+
+        Totals include other processes' lookups up to their last flush.
+        """
+        self.flush()
+        conn = self._connect()
+        totals = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "total_hits": totals.get("hits", 0),
+            "total_misses": totals.get("misses", 0),
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._pending, self._touched = {"hits": 0, "misses": 0}, {}
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM entries")
+            conn.execute("UPDATE counters SET value = 0")
+
+
+class _Transaction:
+    """Wrap a connection in an immediate transaction so writers from other processes queue up."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """One on-disk LLM response cache per process, shared by every session and worker thread."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = LLMCache()
+            # Lookups counted since the last flush would otherwise be lost.
+            atexit.register(_default_cache.flush)
+        return _default_cache
@@ -0,0 +1,338 @@
+import json
+import re
+from collections import Counter
+
+from langchain_core.exceptions import OutputParserException
+
+# Python and JavaScript literals models write in place of JSON ones.
+LITERALS = {
+    "true": "true", "false": "false", "null": "null",
+    "True": "true", "False": "false", "None": "null", "undefined": "null", "NaN": "null",
+}
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+_VALID_ESCAPES = set('"\\/bfnrtu')
+# A ``\u`` escape cut off before its four hex digits.
+_PARTIAL_UNICODE = re.compile(r"\\u[0-9a-fA-F]{0,3}$")
+# Opening brackets tried before a response counts as unparseable; the first
+# one may belong to the preamble ("Here are the [3] jobs: ...").
+MAX_STARTS = 3
+
+
+class TruncatedOutput(OutputParserException):
+    """The response stopped before its JSON value was complete (e.g. the output token limit)."""
+
+
+class JsonStreamParser:
+    """Incremental JSON extraction from LLM output, repairing common defects.
+
+    ``feed`` text as it arrives; each character is scanned once. Anything
+    before the first ``{`` or ``[`` (a preamble or a markdown fence) and
+    after the value closes is skipped. While scanning, trailing and missing
+    commas, single-quoted strings, unquoted keys, Python literals and raw
+    newlines inside strings are rewritten into valid JSON. ``partial()``
+    closes whatever is still open (a string, a dangling key, brackets) so a
+    streaming response can be shown before it is complete; ``finish()``
+    returns the final value. ``repairs`` counts the fixes by kind.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.repairs = Counter()
+        self.truncated = False
+        self._start = None
+        self._end = None
+        self._pos = 0
+        self._out = []
+        # Open containers, innermost last: [bracket, state, key_start]. ``state`` is
+        # what comes next: "key", "colon", "value" or "comma".
+        self._stack = []
+        self._quote = None
+        self._escape = False
+        self._is_key = False
+        self._token = None
+        self._partial = (None, None)
+
+    @property
+    def done(self):
+        return self._end is not None
+
+    @property
+    def item_open(self):
+        """True while the last element of the innermost open array is only partly written."""
+        lists = [i for i, entry in enumerate(self._stack) if entry[0] == "["]
+        if not lists:
+            return False
+        # Anything open below that array is its last element.
+        return lists[-1] < len(self._stack) - 1 or self._quote is not None or self._token is not None
+
+    def feed(self, text):
+        """Scan more text; returns ``self`` so ``JsonStreamParser().feed(text).finish()`` works."""
+        self.text += text
+        while self._pos < len(self.text) and not self.done:
+            self._scan(self.text[self._pos])
+            self._pos += 1
+        return self
+
+    def _scan(self, c):
+        if self._start is None:
+            if c in "{[":
+                self._start = self._pos
+                preamble = self.text[:self._pos].replace("```json", "").replace("```", "").strip()
+                if preamble:
+                    self.repairs["preamble"] += 1
+                self._open(c)
+            return
+        if self._quote is not None:
+            self._string_char(c)
+            return
+        if self._token is not None:
+            if c.isalnum() or c in "+-._":
+                self._token.append(c)
+                return
+            self._end_token()
+        if c.isspace():
+            return
+        if c in "{[":
+            self._before_value()
+            self._open(c)
+        elif c in "}]":
+            self._close(c)
+        elif c in "\"'":
+            if c == "'":
+                self.repairs["single_quotes"] += 1
+            self._begin_string(c)
+        elif c == ":":
+            if self._stack and self._stack[-1][1] == "colon":
+                self._out.append(":")
+                self._stack[-1][1] = "value"
+            else:
+                self.repairs["stray"] += 1
+        elif c == ",":
+            if self._stack and self._stack[-1][1] == "comma":
+                self._out.append(",")
+                self._stack[-1][1] = "key" if self._stack[-1][0] == "{" else "value"
+            else:
+                self.repairs["extra_comma"] += 1
+        elif c.isalnum() or c in "+-.":
+            self._begin_token(c)
+        else:
+            self.repairs["stray"] += 1
+
+    def _open(self, bracket):
+        if self._stack:
+            # The new container is the enclosing one's value; once it closes a comma is due.
+            self._stack[-1][1:] = ["comma", None]
+        self._out.append(bracket)
+        self._stack.append([bracket, "key" if bracket == "{" else "value", None])
+
+    def _close(self, bracket):
+        if not self._stack:
+            return
+        top = self._stack[-1]
+        if top[0] + bracket not in ("{}", "[]"):
+            self.repairs["mismatched_bracket"] += 1
+        if top[0] == "{" and top[1] in ("colon", "value") and top[2] is not None:
+            # A key without a value.
+            del self._out[top[2]:]
+            self.repairs["dangling_key"] += 1
+        if self._out[-1] == ",":
+            self._out.pop()
+            self.repairs["trailing_comma"] += 1
+        self._out.append("}" if top[0] == "{" else "]")
+        self._stack.pop()
+        self._after_value()
+
+    def _is_key_position(self):
+        return bool(self._stack) and self._stack[-1][0] == "{" and self._stack[-1][1] in ("key", "comma")
+
+    def _begin_key(self):
+        top = self._stack[-1]
+        if top[1] == "comma":
+            self._out.append(",")
+            self.repairs["missing_comma"] += 1
+        top[2] = len(self._out)
+        self._is_key = True
+
+    def _before_value(self):
+        if not self._stack:
+            return
+        top = self._stack[-1]
+        if top[1] == "comma":
+            # Arrays only: a missing comma between two values.
+            self._out.append(",")
+            self.repairs["missing_comma"] += 1
+        elif top[1] == "colon":
+            self._out.append(":")
+            self.repairs["missing_colon"] += 1
+        self._is_key = False
+
+    def _after_value(self):
+        if not self._stack:
+            self._end = self._pos
+        elif self._is_key:
+            self._stack[-1][1] = "colon"
+            self._is_key = False
+        else:
+            self._stack[-1][1] = "comma"
+            self._stack[-1][2] = None
+
+    def _begin_string(self, quote):
+        if self._is_key_position():
+            self._begin_key()
+        else:
+            self._before_value()
+        self._out.append('"')
+        self._quote = quote
+
+    def _string_char(self, c):
+        if self._escape:
+            self._escape = False
+            if c in _VALID_ESCAPES:
+                self._out.append("\\" + c)
+            elif c == "'":
+                self._out.append("'")
+            else:
+                self._out.append("\\\\" + _CONTROL_ESCAPES.get(c, c))
+                self.repairs["bad_escape"] += 1
+        elif c == "\\":
+            self._escape = True
+        elif c == self._quote:
+            self._out.append('"')
+            self._quote = None
+            self._after_value()
+        elif c == '"':
+            self._out.append('\\"')
+        elif c < " ":
+            self._out.append(_CONTROL_ESCAPES.get(c) or f"\\u{ord(c):04x}")
+            self.repairs["control_char"] += 1
+        else:
+            self._out.append(c)
+
+    def _begin_token(self, c):
+        if self._is_key_position():
+            self._begin_key()
+        else:
+            self._before_value()
+        self._token = [c]
+
+    def _token_json(self, token):
+        """The JSON text for a bare word or number, or ``None`` if it is neither."""
+        if token in LITERALS:
+            return LITERALS[token]
+        try:
+            json.loads(token)
+            return token
+        except ValueError:
+            pass
+        try:
+            number = float(token)
+        except ValueError:
+            return None
+        return json.dumps(number) if number == number and abs(number) != float("inf") else "null"
+
+    def _end_token(self):
+        token = "".join(self._token)
+        self._token = None
+        value = None if self._is_key else self._token_json(token)
+        if value is None:
+            value = json.dumps(token)
+            self.repairs["unquoted"] += 1
+        elif value != token:
+            self.repairs["literal"] += 1
+        self._out.append(value)
+        self._after_value()
+
+    def _closed(self):
+        """The repaired text with everything still open closed, or ``None`` before the value starts."""
+        if self._start is None:
+            return None
+        out = list(self._out)
+        stack = [list(entry) for entry in self._stack]
+        if self._quote is not None or self._token is not None:
+            token = "".join(self._token) if self._token is not None else None
+            value = None if token is None or self._is_key else self._token_json(token)
+            if self._is_key:
+                # A key cut off mid-way: drop it.
+                del out[stack[-1][2]:]
+                stack[-1][1] = "key"
+            elif token is not None:
+                if value is not None:
+                    out.append(value)
+                    stack[-1][1] = "comma"
+            else:
+                text = _PARTIAL_UNICODE.sub("", "".join(out))
+                out = [text, '"']
+                stack[-1][1] = "comma"
+        for bracket, state, key_start in reversed(stack):
+            if bracket == "{" and state in ("colon", "value") and key_start is not None:
+                del out[key_start:]
+            if out[-1] == ",":
+                out.pop()
+            out.append("}" if bracket == "{" else "]")
+        return "".join(out)
+
+    def partial(self):
+        """The value parsed so far with open strings and brackets closed, or ``None``."""
+        if self._partial[0] == len(self.text):
+            return self._partial[1]
+        text = self._closed()
+        try:
+            value = None if text is None else json.loads(text)
+        except ValueError:
+            value = None
+        self._partial = (len(self.text), value)
+        return value
+
+    def finish(self, accept=None):
+        """The complete value; raises ``OutputParserException`` if there is none.
+
+        With ``accept``, if the first bracket does not start a value that
+        ``accept`` returns true for, the next few are tried before settling
+        on the first one that parsed. ``truncated`` is set when the response
+        ended inside the value.
+        """
+        first, error, start = None, None, 0
+        parser = self
+        for _ in range(MAX_STARTS):
+            try:
+                value = parser._value()
+            except OutputParserException as e:
+                error = error or e
+            else:
+                if accept is None or accept(value):
+                    self._adopt(parser)
+                    return value
+                if first is None:
+                    first = (value, parser)
+            if accept is None or parser._start is None:
+                break
+            start += parser._start + 1
+            parser = JsonStreamParser().feed(self.text[start:])
+        if first is not None:
+            self._adopt(first[1])
+            return first[0]
+        raise error
+
+    def _adopt(self, parser):
+        if parser is not self:
+            self.repairs = parser.repairs + Counter(preamble=1)
+            self.truncated = parser.truncated
+
+    def _value(self):
+        if self._start is None:
+            raise OutputParserException(f"No JSON object or array in the response: {self.text[:200]!r}")
+        if not self.done:
+            self.truncated = True
+            self.repairs["truncated"] += 1
+        elif self.text[self._end + 1:].replace("```", "").strip():
+            self.repairs["trailing_text"] += 1
+        text = self._closed()
+        try:
+            return json.loads(text)
+        except ValueError as e:
+            raise OutputParserException(f"Invalid JSON in the response ({e}): {self.text[:200]!r}")
+
+
+def parse_json(text, accept=None):
+    """The first JSON object or array in ``text``, repaired; see ``JsonStreamParser.finish``."""
+    return JsonStreamParser().feed(text).finish(accept)
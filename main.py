@@ -1,14 +1,22 @@
 import streamlit as st
+import json
 import os
-from langchain_community.document_loaders import WebBaseLoader
+import time
 
-from chains import Chain
+from llm_cache import get_llm_cache
+from pipeline import Pipeline
+from resume_features import get_resume_features
 # from portfolio import Portfolio
-from utils import clean_text, extract_text_from_resume
+from job_store import get_job_store
+from tracing import tracer
+from work_queue import DONE, FAILED, FINISHED, RUNNING, get_work_queue, run_analysis, write_emails
 import plotly.graph_objects as go
 os.environ["PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION"] = "python"
 
-def show_resume_radar_chart(category_scores):
+# Seconds between reruns while a submitted analysis is still running.
+POLL_INTERVAL = 0.5
+
+def show_resume_radar_chart(category_scores, key=None):
     labels = list(category_scores.keys())
     values = list(category_scores.values())
 
@@ -31,7 +39,7 @@ def show_resume_radar_chart(category_scores):
       title="📊 Resume Strength Radar"
     )
 
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(fig, use_container_width=True, key=key)
 
 def create_streamlit_app():
     """Streamlit entry‑point for the Cold Email Generator."""
@@ -58,8 +66,9 @@ def create_streamlit_app():
 
     if st.button("Save API Key"):
         if api_key_input:
+            # Kept per session and passed to each run; never put in os.environ,
+            # which every session of this server shares.
             st.session_state.api_key = api_key_input
-            os.environ["GROQ_API_KEY"] = api_key_input
             st.success("API key saved successfully!")
         else:
             st.warning("Please enter a valid API key.")
@@ -69,141 +78,416 @@ def create_streamlit_app():
         "Enter a Job Post URL:",
         value="https://www.amazon.jobs/en/jobs/2993489/data-scientist-data-and-machine-learning-wwps-proserve",
     )
+    use_cache = st.checkbox("♻️ Reuse cached LLM responses", value=True)
+    combined = st.checkbox(
+        "⚡ Single-call analysis per job (fewer tokens)", value=True,
+        help="Ask for attribution, suggestions and the email in one LLM call instead of three.",
+    )
+    fuzzy_matching = st.checkbox(
+        "🧠 Fuzzy skill matching", value=False,
+        help="Also count near-synonyms (e.g. GCP / Google Cloud Platform) towards the fit score.",
+    )
+    reuse_duplicates = st.checkbox(
+        "🔁 Reuse analyses of near-duplicate jobs", value=True,
+        help="A posting already analysed for this resume, e.g. under another URL or on an aggregator, "
+             "is not sent to the LLM again.",
+    )
+    full_resume = st.checkbox(
+        "📄 Send the full resume with every job", value=False,
+        help="By default each per-job prompt gets a compact profile of the parsed resume "
+             "(skills, experience, projects, certifications). Tick this if the suggestions miss details.",
+    )
+    with st.sidebar:
+        show_debug = st.checkbox("🐞 Show tracing debug panel", value=False)
+    pipeline = Pipeline(st.session_state)
+    api_key = st.session_state.api_key or os.getenv("GROQ_API_KEY")
+    queue = get_work_queue()
     if st.button("Generate Analysis & Email"):
         if not resume_file:
             st.warning("Please upload your resume before generating.")
             st.stop()
-        if "GROQ_API_KEY" not in os.environ:
+        if not api_key and os.getenv("LLM_BACKEND", "groq") == "groq":
             st.warning("Please enter your GROQ API Key in the sidebar.")
             st.stop()
+        # The pipeline runs on the shared worker pool; this script only polls it.
+        # The run id goes into the URL so a refresh or reconnect reattaches.
+        run_id = queue.submit(run_analysis, {
+            "resume_bytes": resume_file.getvalue(),
+            "resume_name": resume_file.name,
+            "url": url_input,
+            "use_cache": use_cache,
+            "combined": combined,
+            "fuzzy_matching": fuzzy_matching,
+            "reuse_duplicates": reuse_duplicates,
+            "full_resume": full_resume,
+        }, secrets={"api_key": api_key})
+        st.query_params["run"] = run_id
 
-        # ---------- Instantiate LLM Chain ---------- #
-        llm = Chain()
-
-        # ---------- Parse inputs ---------- #
-        resume_text = extract_text_from_resume(resume_file)
-        job_html = WebBaseLoader([url_input]).load().pop().page_content
-        job_clean = clean_text(job_html)
-
-        parsed_resume = llm.extract_resume_sections(resume_text)
-        user_skills = parsed_resume.get("skills", [])
-        jobs = llm.extract_jobs(job_clean)
-
-        # ---------- Display Top Resume Skills ---------- #
-        st.subheader("🎯 Top Skills in Resume")
-        skills = [s.strip().title() for s in parsed_resume.get("skills", []) if isinstance(s, str)]
-        skills = sorted(set(skills))
-        # st.subheader("🎯 Top Resume Skills")
-        if skills:
-            st.markdown(" ".join([f"`{s}`" for s in skills]))
-        else:
-            st.warning("No skills were extracted from the resume.")
-        # for sk in user_skills:
-        #     st.markdown(f"`{sk}` ", unsafe_allow_html=True)
-
-        # ---------- Iterate over extracted jobs ---------- #
-        for idx, job in enumerate(jobs, start=1):
-            st.markdown("---")
-            st.header(f"📝 Analysis for Job #{idx}: {job.get('role', 'N/A')}")
-
-            # --- Skill Matching & Explanation via LLM --- #
-            skill_match = llm.skill_matching(user_skills, job.get("skills", []))
-            explanation = llm.explain_skill_match(resume_text, job.get("skills", []))
-            improvements = llm.improve_resume(resume_text, job_description=job.get("description", ""), job_skills=job.get("skills", []))
-            email_body = llm.write_mail(job, resume_text=resume_text)
-
-            # ---------- Tabbed UI ---------- #
-            summary_tab, explain_tab, improve_tab, email_tab, resume_radar, skill_simulator = st.tabs([
-                "📊 Summary",
-                "🔍 Skill Attribution",
-                "🛠️ Resume Suggestions",
-                "✉️ Cold Email",
-                "📈 Resume Radar Chart",
-                "🧪\"What-If\" Skill Simulator"
-            ])
-
-            with summary_tab:
-                st.subheader("📋 Match Summary")
-                st.metric(
-                    label="Skill Fit Percentage",
-                    value=f"{skill_match.get('fit_percentage', 0)}%",
-                )
-                matched = skill_match.get("matched_skills", [])
-                if matched:
-                    st.caption("✅ Matched Skills: " + ", ".join(matched))
+    run_id = st.query_params.get("run")
+    if not run_id:
+        # Nothing to show yet: start the workers now so the first run does not wait for them.
+        queue.warm_up()
+        return
+    run = queue.status(run_id)
+    if run is None:
+        st.warning("That analysis is no longer available; please generate it again.")
+        return
+    # A stored run renders from its results alone; a Chain (and an API key) is
+    # only needed once the user asks for something new from the LLM.
+    llm = SessionLLM(api_key, use_cache, full_resume)
+    waiting = render_run(run, llm, pipeline, fuzzy_matching)
+    if show_debug:
+        with st.sidebar:
+            render_debug_panel(run_id, run["stages"].get("trace", {}).get("value") or [])
+    if run["status"] not in FINISHED or waiting:
+        time.sleep(POLL_INTERVAL)
+        st.rerun()
+
+
+class SessionLLM:
+    """The session's way to the LLM: call it for a ``Chain``, or ``submit`` work to the worker pool.
+
+    Both return ``None`` after asking for an API key when there is none.
+    """
+
+    def __init__(self, api_key, use_cache, full_resume):
+        self.api_key = api_key
+        self.use_cache = use_cache
+        self.full_resume = full_resume
+
+    def _secrets(self):
+        if not self.api_key and os.getenv("LLM_BACKEND", "groq") == "groq":
+            st.warning("🔑 Enter and save your GROQ API key above to use this.")
+            return None
+        return {"api_key": self.api_key}
+
+    def __call__(self):
+        if self._secrets() is None:
+            return None
+        # Imported on first use: LangChain and Groq are not needed to draw a stored run.
+        from chains import get_chain
+
+        return get_chain(self.api_key, cache=get_llm_cache() if self.use_cache else None,
+                         full_resume=self.full_resume)
+
+    def submit(self, fn, params):
+        """Queue ``fn`` on the worker pool (see ``WorkQueue.submit``) and return the run id."""
+        secrets = self._secrets()
+        if secrets is None:
+            return None
+        params = dict(params, use_cache=self.use_cache, full_resume=self.full_resume)
+        return get_work_queue().submit(fn, params, secrets=secrets)
+
+
+def render_run(run, llm, pipeline, fuzzy_matching):
+    """Draw whatever the run has finished so far; unfinished parts show as pending.
+
+    ``llm`` is the session's ``SessionLLM``, only used for actions that need
+    the LLM. Returns whether work started from the page is still running.
+    """
+    from chains import match_resume_skills
+
+    stages, job_results = run["stages"], run["jobs"]
+    jobs = stages.get("jobs", {}).get("value") if stages.get("jobs", {}).get("status") == DONE else None
+    total = 3 + (len(jobs) * len(RENDERERS) if jobs else 0)
+    finished = sum(stages.get(name, {}).get("status") in FINISHED for name in ("resume", "page", "jobs"))
+    finished += sum(r["status"] in FINISHED for results in job_results.values() for r in results.values())
+    if run["status"] not in FINISHED:
+        running = [name for name, stage in stages.items() if stage["status"] == RUNNING] or ["queued"]
+        st.progress(min(finished / total, 1.0), text=f"⏳ {', '.join(running)} ({finished}/{total} steps)")
+    if run["status"] == FAILED:
+        st.error(f"Analysis failed: {run['error']}")
+    for name in ("resume", "page", "jobs"):
+        if stages.get(name, {}).get("status") == FAILED:
+            st.error(f"Failed at {name}: {stages[name]['value']}")
+
+    if stages.get("resume", {}).get("status") != DONE:
+        return
+    resume_text = stages["resume"]["value"]["text"]
+    parsed_resume = stages["resume"]["value"]["sections"]
+    user_skills = parsed_resume.get("skills", [])
+
+    # ---------- Display Top Resume Skills ---------- #
+    st.subheader("🎯 Top Skills in Resume")
+    skills = [s.strip().title() for s in parsed_resume.get("skills", []) if isinstance(s, str)]
+    skills = sorted(set(skills))
+    # st.subheader("🎯 Top Resume Skills")
+    if skills:
+        st.markdown(" ".join([f"`{s}`" for s in skills]))
+    else:
+        st.warning("No skills were extracted from the resume.")
+    # for sk in user_skills:
+    #     st.markdown(f"`{sk}` ", unsafe_allow_html=True)
+
+    waiting = render_stored_job_ranking(user_skills, llm, resume_text, parsed_resume, pipeline)
+    # What the base fit scores were computed from: parsed skills plus those found in the text.
+    resume_skills = get_resume_features(resume_text).skills(user_skills)
+
+    page = stages.get("page", {})
+    if page.get("status") == DONE:
+        st.caption(
+            f"🌐 Job page {'unchanged (cached)' if page['value']['from_cache'] else 'fetched'} "
+            f"in {page['value']['elapsed']:.2f}s"
+        )
+    if jobs is None:
+        return waiting
+
+    # The radar chart depends only on the resume, so it was scored once for all jobs.
+    category_scores = stages.get("categories", {}).get("value") or {}
+    resume_key = pipeline.item_key(resume_text)
+
+    # ---------- A section per job ---------- #
+    for idx, job in enumerate(jobs):
+        job_key = pipeline.item_key(job, resume_key)
+        results = job_results.get(idx, {})
+        # Fit scores are local; redo them if the matching mode changed since the run.
+        if fuzzy_matching != run["params"].get("fuzzy_matching") and "skill_match" in results:
+            results["skill_match"] = {
+                "status": DONE, "value": match_resume_skills(resume_skills, job.get("skills", []), fuzzy_matching),
+            }
+        st.markdown("---")
+        st.header(f"📝 Analysis for Job #{idx + 1}: {job.get('role', 'N/A')}")
+
+        # ---------- Tabbed UI ---------- #
+        summary_tab, explain_tab, improve_tab, email_tab, resume_radar, skill_simulator = st.tabs([
+            "📊 Summary",
+            "🔍 Skill Attribution",
+            "🛠️ Resume Suggestions",
+            "✉️ Cold Email",
+            "📈 Resume Radar Chart",
+            "🧪\"What-If\" Skill Simulator"
+        ])
+        tabs = {"skill_match": summary_tab, "explanation": explain_tab, "improvements": improve_tab, "email": email_tab}
+        for task, tab in tabs.items():
+            with tab:
+                result = results.get(task)
+                if result is None:
+                    st.info("⏳ Generating...")
+                elif result["status"] == FAILED:
+                    st.error(f"Failed to generate {task.replace('_', ' ')}: {result['value']}")
+                elif result["status"] == RUNNING:
+                    RENDERERS[task](result["value"], streaming=True)
                 else:
-                    st.caption("⚠️ No matched skills found.")
-
-            with explain_tab:
-                st.subheader("🔍 Skill Attribution")
-                for m in explanation.get("matched_skills", []):
-                    st.markdown(f"✅ **{m['skill']}** – Found in _{m['location']}_")
-                if explanation.get("unmatched_skills"):
-                    st.markdown("#### ❌ Unmatched Skills & Suggestions")
-                    for miss in explanation["unmatched_skills"]:
-                        st.markdown(f"🔧 **{miss['skill']}** – _{miss['suggestion']}_")
-
-            with improve_tab:
-                st.subheader("🛠️ Resume Improvement Suggestions")
-                for suggestion in improvements.get("suggested_changes", []):
-                    st.markdown(f"▪️ {suggestion}")
-                enhancer = llm.improve_resume(
-                    resume_text=resume_text,
-                    job_description=job.get("description", ""),
-                    job_skills=job.get("skills", [])
-                )
-
-                st.subheader("💡 Smart Resume Enhancement Suggestions")
-
-                st.markdown("### ❌ Missing Skills")
-                for skill in enhancer.get("missing_skills", []):
-                    st.markdown(f"- {skill}")
-
-                st.markdown("### ✍️ Suggested Changes")
-                for change in enhancer.get("suggested_changes", []):
-                    st.markdown(f"- {change}")
-
-                st.markdown("### ➕ New Section Ideas")
-                for idea in enhancer.get("new_section_ideas", []):
-                    st.markdown(f"- {idea}")
-
-            with email_tab:
-                st.subheader("✉️ Generated Cold Email")
-                st.code(email_body, language="markdown")
-            
-            with resume_radar:
-                st.subheader("📈 Resume Strength Radar Chart")
-                category_scores = llm.analyze_resume_categories(resume_text, skills)
-                show_resume_radar_chart(category_scores)
-            
-            with skill_simulator:
-                st.subheader("🧪 What-If Skill Simulator")
-                if "added_skills" not in st.session_state:
-                    st.session_state.added_skills = []
-                missing = [m["skill"] for m in explanation.get("unmatched_skills", [])]
-                added_skills = st.multiselect(
-                    "Add hypothetical skills to your resume:",
-                    options=missing,
-                    default=st.session_state.added_skills,
-                    key="skill_sim_input"
-                )
-                st.session_state.added_skills = added_skills
-                simulated_resume_skills = list(set(skills + added_skills))  # original resume + what-if
-                if added_skills:
-                    sim_fit = llm.skill_matching(simulated_resume_skills, job.get("skills", []))
-                    st.metric("🔁 Simulated Fit %", f"{sim_fit['fit_percentage']}%")
-                    matched_skills = sim_fit.get("matched_skills", [])
-                    st.markdown("✅ Matched Skills With Simulation:")
-                    st.markdown(", ".join(matched_skills))
-
-                    if st.button("Generate Email with Simulated Skills"):
-                        simulated_email = llm.write_mail(job, resume_text="; ".join(simulated_resume_skills))
-                        st.subheader("📧 Simulated Cold Email")
-                        st.code(simulated_email, language="markdown")
+                    RENDERERS[task](result["value"])
+
+        with resume_radar:
+            st.subheader("📈 Resume Strength Radar Chart")
+            show_resume_radar_chart(category_scores, key=f"radar_{job_key}")
+
+        with skill_simulator:
+            explanation = results.get("explanation")
+            if explanation is None or explanation["status"] == RUNNING:
+                st.info("⏳ Generating...")
+            elif explanation["status"] == FAILED:
+                st.error(f"Skill simulator unavailable: {explanation['value']}")
+            else:
+                render_skill_simulator(llm, pipeline, job_key, job, resume_skills, explanation["value"], fuzzy_matching)
+    return waiting
+
+
+# Short stored jobs per prompt when writing emails for several at once.
+EMAILS_PER_PROMPT = 5
+
+
+def render_stored_job_ranking(resume_skills, llm, resume_text, parsed_resume, pipeline):
+    """Rank the stored jobs for the resume; returns whether emails for them are still being written."""
+    store = get_job_store()
+    emails = pipeline.items("stored_job_emails")
+    # Emails are written on the worker pool; collect whatever the last request has finished.
+    waiting = collect_stored_job_emails(emails)
+    with st.expander(f"🏆 Best matches among {store.stats()['jobs']} stored jobs"):
+        query = st.text_input("Only jobs mentioning (full-text search):", key="stored_jobs_query")
+        ids = store.search(query, limit=1000) if query.strip() else None
+        ranked = store.rank(resume_skills, k=10, ids=ids)
+        if not ranked:
+            st.info("No stored jobs match.")
+            return waiting
+        table = st.dataframe([
+            {
+                "fit %": entry["fit_percentage"],
+                "role": entry["job"].get("role", "N/A"),
+                "matched skills": ", ".join(entry["matched_skills"]),
+                "url": entry["url"],
+            }
+            for entry in ranked
+        ], hide_index=True, on_select="rerun", selection_mode="multi-row", key="stored_jobs_table")
+        selected = [ranked[row] for row in table.selection.rows if row < len(ranked)]
+        if not selected:
+            st.caption("Select rows to write cold emails for several jobs at once.")
+            return waiting
+        pack = st.checkbox(
+            "📦 Pack short jobs into shared prompts", value=True, key="stored_jobs_pack",
+            help=f"Up to {EMAILS_PER_PROMPT} short postings per LLM call instead of one call each.",
+        )
+        resume_key = pipeline.item_key(resume_text)
+        keys = [pipeline.item_key(entry["id"], resume_key) for entry in selected]
+        if st.button(f"✉️ Write emails for {len(selected)} selected jobs", key="stored_jobs_emails", disabled=waiting):
+            todo = [(key, entry) for key, entry in zip(keys, selected) if key not in emails]
+            run_id = llm.submit(write_emails, {
+                "jobs": [entry["job"] for _, entry in todo],
+                "resume_text": resume_text,
+                "resume_sections": parsed_resume,
+                "pack": EMAILS_PER_PROMPT if pack else 1,
+            }) if todo else None
+            if run_id is not None:
+                st.session_state.stored_jobs_email_run = {"id": run_id, "keys": [key for key, _ in todo]}
+                waiting = True
+        if waiting:
+            st.info(f"⏳ Writing {len(st.session_state.stored_jobs_email_run['keys'])} emails...")
+        for key, entry in zip(keys, selected):
+            if key in emails:
+                st.markdown(f"**📧 {entry['job'].get('role', 'N/A')}**")
+                st.code(emails[key], language="markdown")
+    return waiting
+
+
+def collect_stored_job_emails(emails):
+    """Move finished emails of the session's email run into ``emails``; True while the run is going."""
+    pending = st.session_state.get("stored_jobs_email_run")
+    if not pending:
+        return False
+    run = get_work_queue().status(pending["id"])
+    if run is None:
+        del st.session_state.stored_jobs_email_run
+        return False
+    if run["status"] not in FINISHED:
+        return True
+    for idx, key in enumerate(pending["keys"]):
+        result = run["jobs"].get(idx, {}).get("email")
+        if result is not None and result["status"] == DONE:
+            emails[key] = result["value"]
+        elif result is not None:
+            st.error(f"Could not write an email: {result['value']}")
+    if run["status"] == FAILED:
+        st.error(f"Writing emails failed: {run['error']}")
+    del st.session_state.stored_jobs_email_run
+    return False
+
+
+def render_summary(skill_match):
+    st.subheader("📋 Match Summary")
+    st.metric(
+        label="Skill Fit Percentage",
+        value=f"{skill_match.get('fit_percentage', 0)}%",
+    )
+    matched = skill_match.get("matched_skills", [])
+    if matched:
+        st.caption("✅ Matched Skills: " + ", ".join(matched))
+    else:
+        st.caption("⚠️ No matched skills found.")
+    similar = skill_match.get("similar_skills", {})
+    if similar:
+        st.caption("≈ Similar: " + ", ".join(
+            f"{job_skill} ~ {resume_skill} ({score:.2f})" for job_skill, (resume_skill, score) in similar.items()
+        ))
+
+
+def render_explanation(explanation):
+    st.subheader("🔍 Skill Attribution")
+    for m in explanation.get("matched_skills", []):
+        st.markdown(f"✅ **{m['skill']}** – Found in _{m['location']}_")
+    if explanation.get("unmatched_skills"):
+        st.markdown("#### ❌ Unmatched Skills & Suggestions")
+        for miss in explanation["unmatched_skills"]:
+            st.markdown(f"🔧 **{miss['skill']}** – _{miss['suggestion']}_")
+
+
+def render_improvements(enhancer, streaming=False):
+    st.subheader("💡 Smart Resume Enhancement Suggestions")
+
+    st.markdown("### ❌ Missing Skills")
+    for skill in enhancer.get("missing_skills", []):
+        st.markdown(f"- {skill}")
+
+    st.markdown("### ✍️ Suggested Changes")
+    for change in enhancer.get("suggested_changes", []):
+        st.markdown(f"- {change}")
+
+    st.markdown("### ➕ New Section Ideas")
+    for idea in enhancer.get("new_section_ideas", []):
+        st.markdown(f"- {idea}")
+
+
+def render_email(email_body, streaming=False):
+    st.subheader("✉️ Generated Cold Email")
+    st.code(email_body + (" ▌" if streaming else ""), language="markdown")
+
+
+def render_skill_simulator(llm, pipeline, job_key, job, skills, explanation, fuzzy_matching=False):
+    from chains import match_resume_skills
+
+    st.subheader("🧪 What-If Skill Simulator")
+    state_key = f"added_skills_{job_key}"
+    if state_key not in st.session_state:
+        st.session_state[state_key] = []
+    missing = [m["skill"] for m in explanation.get("unmatched_skills", [])]
+    added_skills = st.multiselect(
+        "Add hypothetical skills to your resume:",
+        options=missing,
+        default=[s for s in st.session_state[state_key] if s in missing],
+        key=f"skill_sim_input_{job_key}"
+    )
+    st.session_state[state_key] = added_skills
+    simulated_resume_skills = sorted(set(skills + added_skills))  # original resume + what-if
+    if added_skills:
+        sim_fit = match_resume_skills(simulated_resume_skills, job.get("skills", []), fuzzy_matching)
+        st.metric("🔁 Simulated Fit %", f"{sim_fit['fit_percentage']}%")
+        matched_skills = sim_fit.get("matched_skills", [])
+        st.markdown("✅ Matched Skills With Simulation:")
+        st.markdown(", ".join(matched_skills))
+
+        simulated_emails = pipeline.items("simulated_emails")
+        email_key = pipeline.item_key(job_key, simulated_resume_skills)
+        if st.button("Generate Email with Simulated Skills", key=f"sim_email_{job_key}"):
+            chain = llm()
+            if chain is not None:
+                simulated_emails[email_key] = chain.write_mail(job, resume_text="; ".join(simulated_resume_skills))
+        if email_key in simulated_emails:
+            st.subheader("📧 Simulated Cold Email")
+            st.code(simulated_emails[email_key], language="markdown")
+
+
+def render_debug_panel(request_id, worker_spans=()):
+    st.header("🐞 Tracing")
+    st.caption(f"Request `{request_id}`")
+    # Pipeline spans are recorded in the worker process and arrive with the finished run.
+    tracer.extend(worker_spans)
+    stages = tracer.snapshot(request_id)
+    if not stages:
+        st.info("No spans recorded for this run.")
+        return
+    totals = tracer.totals(request_id)
+    st.metric("Tokens (prompt + completion)", totals["prompt_tokens"] + totals["completion_tokens"])
+    st.metric("LLM cache hits", totals["cache_hits"])
+    st.metric("Resume tokens saved by the profile", totals["resume_tokens_saved"])
+    st.metric("JSON responses repaired / unparseable", f"{totals['parse_repairs']} / {totals['parse_failures']}")
+    st.dataframe([{"stage": name, **metrics} for name, metrics in stages.items()], hide_index=True)
+    from chains import tier_report
+
+    st.markdown("**Model tiers** (all runs on this server)")
+    st.dataframe(tier_report(tracer.snapshot()), hide_index=True)
+    with st.expander("All runs on this server (p50/p95)"):
+        st.dataframe([{"stage": name, **metrics} for name, metrics in tracer.snapshot().items()], hide_index=True)
+    spans = tracer.spans(request_id)
+    with st.expander(f"Spans ({len(spans)})"):
+        st.json(spans, expanded=False)
+    st.download_button(
+        "Download spans (JSON lines)",
+        "\n".join(json.dumps(span, default=str) for span in spans),
+        file_name=f"trace-{request_id}.jsonl",
+    )
 
 
+RENDERERS = {
+    "skill_match": render_summary,
+    "explanation": render_explanation,
+    "improvements": render_improvements,
+    "email": render_email,
+}
 
 
 if __name__ == "__main__":
     # portfolio = Portfolio()  # kept for future portfolio querying if needed
-    create_streamlit_app()
+    # Every span recorded during this rerun is grouped under one request id.
+    with tracer.request():
+        create_streamlit_app()
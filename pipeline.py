@@ -0,0 +1,30 @@
+import hashlib
+import json
+
+
+def fingerprint(value):
+    """Stable content hash for JSON-like values (strings, lists, dicts, numbers)."""
+    payload = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Pipeline:
+    """Results of the app's own follow-up actions, kept across Streamlit reruns.
+
+    The analysis itself runs on the work queue and is read back from its
+    SQLite store; what lives here is what the user asks for afterwards
+    (What-If emails, emails for stored jobs). Results are grouped and keyed
+    by a content hash of whatever they were computed from, in ``state``
+    (normally ``st.session_state``).
+    """
+
+    def __init__(self, state, namespace="pipeline"):
+        if namespace not in state:
+            state[namespace] = {"items": {}}
+        self.memo = state[namespace]
+
+    def item_key(self, *parts):
+        return fingerprint(parts)
+
+    def items(self, group):
+        return self.memo["items"].setdefault(group, {})
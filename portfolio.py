@@ -1,22 +1,85 @@
-import pandas as pd
-import chromadb
-import uuid
+import hashlib
 import os
 os.environ["PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION"] = "python"
 
 class Portfolio:
-    def __init__(self, file_path="resource/my_portfolio.csv"):
+    def __init__(self, file_path="resource/my_portfolio.csv", batch_size=5000):
         self.file_path = file_path
-        self.data = pd.read_csv(file_path)
-        self.chroma_client = chromadb.PersistentClient('vectorstore')
-        self.collection = self.chroma_client.get_or_create_collection(name="portfolio")
+        self.batch_size = batch_size
+        self._data = None
+        self._client = None
+        self._collection = None
+
+    # pandas and chromadb take over a second to import and the vector store
+    # opens its files on connect, so both wait until the portfolio is used.
+    @property
+    def data(self):
+        if self._data is None:
+            import pandas as pd
+
+            self._data = pd.read_csv(self.file_path)
+        return self._data
+
+    @property
+    def chroma_client(self):
+        if self._client is None:
+            import chromadb
+
+            self._client = chromadb.PersistentClient('vectorstore')
+        return self._client
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            self._collection = self.chroma_client.get_or_create_collection(name="portfolio")
+        return self._collection
+
+    @staticmethod
+    def row_id(techstack, links):
+        # Content-hash ids: an unchanged row keeps its id across reloads, an
+        # edited row gets a new one.
+        return hashlib.sha256(f"{techstack}\x1f{links}".encode("utf-8")).hexdigest()
 
     def load_portfolio(self):
-        if not self.collection.count():
-            for _, row in self.data.iterrows():
-                self.collection.add(documents=row["Techstack"],
-                                    metadatas={"links": row["Links"]},
-                                    ids=[str(uuid.uuid4())])
-
-    def query_links(self, skills):
-        return self.collection.query(query_texts=skills, n_results=2).get('metadatas', [])
\ No newline at end of file
+        """Sync the collection with the CSV, touching only rows that changed.
+
+        New or edited rows are upserted in batches, and rows that are no
+        longer in the CSV are deleted. Returns ``(added, deleted)`` counts.
+        """
+        rows = {}
+        for techstack, links in zip(self.data["Techstack"].astype(str), self.data["Links"].astype(str)):
+            rows[self.row_id(techstack, links)] = (techstack, links)
+
+        existing = set(self.collection.get(include=[])["ids"])
+        added = [row_id for row_id in rows if row_id not in existing]
+        deleted = [row_id for row_id in existing if row_id not in rows]
+
+        batch_size = min(self.batch_size, self.chroma_client.get_max_batch_size())
+        for start in range(0, len(deleted), batch_size):
+            self.collection.delete(ids=deleted[start:start + batch_size])
+        for start in range(0, len(added), batch_size):
+            ids = added[start:start + batch_size]
+            self.collection.upsert(
+                ids=ids,
+                documents=[rows[row_id][0] for row_id in ids],
+                metadatas=[{"links": rows[row_id][1]} for row_id in ids],
+            )
+        return len(added), len(deleted)
+
+    def query_links(self, skills, n_results=2):
+        """Portfolio links for a skill list, or for a list of skill lists (one per job).
+
+        A batch is sent to the vector store as a single query and split back
+        into one result per job.
+        """
+        batched = bool(skills) and all(isinstance(s, (list, tuple)) for s in skills)
+        if not batched:
+            return self.collection.query(query_texts=skills, n_results=n_results).get('metadatas', [])
+
+        texts = [str(skill) for job_skills in skills for skill in job_skills]
+        metadatas = self.collection.query(query_texts=texts, n_results=n_results).get('metadatas', []) if texts else []
+        results, pos = [], 0
+        for job_skills in skills:
+            results.append(metadatas[pos:pos + len(job_skills)])
+            pos += len(job_skills)
+        return results
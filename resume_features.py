@@ -0,0 +1,98 @@
+import re
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+
+from skill_matcher import get_taxonomy
+
+# Lowercase word tokens; "+" and "#" stay attached so "c++" and "c#" survive.
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+MAX_NGRAM = 3
+
+# Radar chart categories, scored by how many of their keywords the resume
+# mentions as whole words (so "git" no longer matches "digital").
+CATEGORY_KEYWORDS = {
+    "Tools & Frameworks": ["tensorflow", "pytorch", "keras", "docker", "git", "onnx", "scikit", "opencv"],
+    "Cloud Experience": ["aws", "azure", "gcp", "google cloud", "s3", "lambda"],
+    "NLP / LLM Relevance": ["nlp", "bert", "gpt", "llm", "langchain", "transformers"],
+    "Soft Skills": ["communication", "leadership", "collaboration", "team", "initiative"],
+}
+PROJECT_TOKENS = ("project", "projects")
+
+# Heading line (lowercased, without punctuation) -> section name.
+SECTION_HEADINGS = {
+    "summary": "summary", "profile": "summary", "objective": "summary", "professional summary": "summary",
+    "experience": "experience", "work experience": "experience", "professional experience": "experience",
+    "employment": "experience", "employment history": "experience", "work history": "experience",
+    "education": "education", "academic background": "education",
+    "skills": "skills", "technical skills": "skills", "core skills": "skills", "key skills": "skills",
+    "projects": "projects", "personal projects": "projects", "academic projects": "projects",
+    "certifications": "certifications", "certificates": "certifications", "licenses and certifications": "certifications",
+}
+
+
+@dataclass
+class ResumeFeatures:
+    text: str          # the resume with blank lines dropped and runs of spaces collapsed
+    tokens: list       # lowercase word tokens in reading order
+    ngrams: Counter    # 1- to MAX_NGRAM-grams (within a line) -> count
+    skill_hits: dict   # canonical skill -> number of mentions in the text
+    sections: dict     # section name -> (start, end) character offsets into ``text``
+
+    def count(self, phrase):
+        """Whole-word occurrences of ``phrase``."""
+        return self.ngrams[" ".join(TOKEN_PATTERN.findall(phrase.lower()))]
+
+    def section(self, name):
+        start, end = self.sections.get(name, (0, 0))
+        return self.text[start:end]
+
+    def categories(self, skills_list):
+        """Radar chart scores; "Technical Skills" is the number of parsed skills."""
+        scores = {"Technical Skills": len(skills_list)}
+        for category, keywords in CATEGORY_KEYWORDS.items():
+            scores[category] = sum(1 for keyword in keywords if self.count(keyword))
+        scores["Projects"] = sum(self.ngrams[t] for t in PROJECT_TOKENS)
+        return scores
+
+    def skills(self, listed=()):
+        """Canonical resume skills: the ``listed`` ones (e.g. parsed by the LLM) plus those found in the text."""
+        skills = get_taxonomy().canonicalize(listed)
+        skills.extend(skill for skill in self.skill_hits if skill not in skills)
+        return skills
+
+
+def build_resume_features(resume_text):
+    """Index a resume in one pass over its lines, plus one skill-automaton pass."""
+    lines, tokens, ngrams, sections = [], [], Counter(), {}
+    offset, current = 0, None
+    for raw in resume_text.splitlines():
+        line = " ".join(raw.split())
+        if not line:
+            continue
+        line_tokens = TOKEN_PATTERN.findall(line.lower())
+        heading = SECTION_HEADINGS.get(" ".join(line_tokens)) if len(line_tokens) <= 4 else None
+        if heading:
+            if current:
+                sections[current] = (sections[current][0], offset)
+            current = heading
+            # A repeated heading extends the section rather than replacing it.
+            sections.setdefault(heading, (offset + len(line) + 1, None))
+        tokens.extend(line_tokens)
+        for n in range(1, MAX_NGRAM + 1):
+            for i in range(len(line_tokens) - n + 1):
+                ngrams[" ".join(line_tokens[i:i + n])] += 1
+        lines.append(line)
+        offset += len(line) + 1
+    text = "\n".join(lines)
+    if current:
+        sections[current] = (sections[current][0], len(text))
+    sections = {name: (start, max(start, end)) for name, (start, end) in sections.items()}
+    skill_hits = Counter(canonical for _, _, canonical in get_taxonomy().find(text))
+    return ResumeFeatures(text, tokens, ngrams, dict(skill_hits), sections)
+
+
+@lru_cache(maxsize=32)
+def get_resume_features(resume_text):
+    """``build_resume_features`` memoized on the text, so every job reuses one index."""
+    return build_resume_features(resume_text)
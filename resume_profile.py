@@ -0,0 +1,122 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from utils import estimate_tokens
+
+# Token budget of the profile sent in per-job prompts instead of the resume.
+PROFILE_TOKENS = 600
+# Longest single entry (one role, project or degree), in characters.
+MAX_ITEM_CHARS = 240
+# Parsed sections in the order they appear in the profile; entries are taken
+# round-robin across them, so a long experience list cannot crowd out projects.
+PROFILE_SECTIONS = [
+    ("experience", "Experience"),
+    ("projects", "Projects"),
+    ("certifications", "Certifications"),
+    ("education", "Education"),
+]
+
+
+@dataclass
+class ResumeProfile:
+    text: str          # what the per-job prompts get in place of the resume
+    tokens: int        # estimated tokens of ``text``
+    full_tokens: int   # estimated tokens of the full resume text
+
+    @property
+    def saved(self):
+        """Tokens saved in every prompt that carries the profile instead of the resume."""
+        return max(self.full_tokens - self.tokens, 0)
+
+
+def _entry(value):
+    # The LLM returns entries as strings, or as objects ({"role", "company", ...}) or lists.
+    if isinstance(value, dict):
+        value = ", ".join(_entry(v) for v in value.values() if v)
+    elif isinstance(value, (list, tuple)):
+        value = ", ".join(_entry(v) for v in value if v)
+    text = " ".join(str(value).split())
+    return text if len(text) <= MAX_ITEM_CHARS else text[:MAX_ITEM_CHARS - 1].rstrip() + "…"
+
+
+def _entries(value):
+    if not value:
+        return []
+    if not isinstance(value, (list, tuple)):
+        value = [value]
+    return [entry for entry in map(_entry, value) if entry]
+
+
+def build_resume_profile(resume_text, sections, max_tokens=PROFILE_TOKENS):
+    """A compact resume from ``Chain.extract_resume_sections`` output, within ``max_tokens``.
+
+    Name and skills come first, then entries of the other sections in
+    turn until the budget is spent. If the resume was not parsed, or the
+    profile would not be shorter, the full text is returned unchanged.
+    """
+    sections = sections or {}
+    full_tokens = estimate_tokens(resume_text)
+    lines = []
+    if sections.get("name"):
+        lines.append(f"Name: {_entry(sections['name'])}")
+    skills = _entries(sections.get("skills"))
+    if skills:
+        lines.append("Skills: " + ", ".join(skills))
+    # Skills alone may already be over budget; drop the last ones until they fit.
+    while skills and estimate_tokens("\n".join(lines)) > max_tokens:
+        skills.pop()
+        lines[-1] = "Skills: " + ", ".join(skills)
+
+    pending = {name: _entries(sections.get(name)) for name, _ in PROFILE_SECTIONS}
+    chosen = {name: [] for name, _ in PROFILE_SECTIONS}
+    used = estimate_tokens("\n".join(lines))
+    while any(pending.values()):
+        for name, title in PROFILE_SECTIONS:
+            if not pending[name]:
+                continue
+            entry = pending[name].pop(0)
+            # The section heading is paid for with its first entry.
+            cost = estimate_tokens(f"- {entry}") + (0 if chosen[name] else estimate_tokens(f"{title}:"))
+            if used + cost > max_tokens:
+                pending[name] = []
+                continue
+            chosen[name].append(entry)
+            used += cost
+    for name, title in PROFILE_SECTIONS:
+        if chosen[name]:
+            lines.append(f"{title}:")
+            lines.extend(f"- {entry}" for entry in chosen[name])
+
+    if not skills and not any(chosen.values()):
+        return ResumeProfile(resume_text, full_tokens, full_tokens)
+    text = "\n".join(lines)
+    tokens = estimate_tokens(text)
+    if tokens >= full_tokens:
+        return ResumeProfile(resume_text, full_tokens, full_tokens)
+    return ResumeProfile(text, tokens, full_tokens)
+
+
+# Profiles by a hash of the resume, its parsed sections and the budget.
+MAX_CACHED_PROFILES = 64
+_profiles = OrderedDict()
+_profiles_lock = threading.Lock()
+
+
+def get_resume_profile(resume_text, sections, max_tokens=PROFILE_TOKENS):
+    """``build_resume_profile`` cached per resume, so every job and rerun reuses one profile."""
+    payload = json.dumps([resume_text, sections, max_tokens], sort_keys=True, default=str)
+    key = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    with _profiles_lock:
+        profile = _profiles.get(key)
+        if profile is not None:
+            _profiles.move_to_end(key)
+            return profile
+    profile = build_resume_profile(resume_text, sections, max_tokens)
+    with _profiles_lock:
+        _profiles[key] = profile
+        while len(_profiles) > MAX_CACHED_PROFILES:
+            _profiles.popitem(last=False)
+    return profile
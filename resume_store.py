@@ -0,0 +1,102 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from utils import extract_text_from_resume
+
+
+@dataclass
+class IngestedResume:
+    digest: str          # SHA-256 of the uploaded bytes
+    text: str
+    sections: dict       # Chain.extract_resume_sections output ({} if not parsed)
+
+
+class ResumeStore:
+    """Cache resume text and parsed sections by a content hash of the file bytes.
+
+    Entries live in a small in-memory LRU in front of JSON files under
+    ``cache_dir``, so submitting the same resume again -- in this session,
+    another session or a batch run -- skips both PDF extraction and the
+    ``extract_resume_sections`` LLM call.
+    """
+
+    def __init__(self, cache_dir=".cache/resumes", max_memory_entries=64):
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        os.makedirs(cache_dir, exist_ok=True)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, digest):
+        return os.path.join(self.cache_dir, digest + ".json")
+
+    def _load(self, digest):
+        with self._lock:
+            if digest in self._memory:
+                self._memory.move_to_end(digest)
+                return self._memory[digest]
+        try:
+            with open(self._path(digest), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            entry = {}
+        self._remember(digest, entry)
+        return entry
+
+    def _save(self, digest, entry):
+        self._remember(digest, entry)
+        path = self._path(digest)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+    def _remember(self, digest, entry):
+        with self._lock:
+            self._memory[digest] = entry
+            self._memory.move_to_end(digest)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def ingest(self, file, chain=None):
+        """Return an ``IngestedResume`` for ``file`` (an upload or open binary file).
+
+        When ``chain`` is given the parsed sections are cached per model too.
+        """
+        data = file.getvalue() if hasattr(file, "getvalue") else file.read()
+        digest = hashlib.sha256(data).hexdigest()
+        entry = dict(self._load(digest))
+        changed = False
+        if "text" not in entry:
+            buffer = io.BytesIO(data)
+            buffer.name = file.name
+            entry["text"] = extract_text_from_resume(buffer)
+            changed = True
+        sections = {}
+        if chain is not None:
+            model = chain.model_for("extract_resume_sections")
+            by_model = entry["sections"] = dict(entry.get("sections", {}))
+            if model not in by_model:
+                by_model[model] = chain.extract_resume_sections(entry["text"])
+                changed = True
+            sections = by_model[model]
+        if changed:
+            self._save(digest, entry)
+        return IngestedResume(digest, entry["text"], sections)
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_resume_store():
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = ResumeStore()
+        return _default_store
@@ -0,0 +1,322 @@
+import heapq
+import itertools
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from llm_cache import _Transaction
+from tracing import tracer
+
+# Priorities: lower runs first. The Streamlit app uses INTERACTIVE, batch.py BATCH.
+INTERACTIVE = 0
+BATCH = 1
+
+# Completion tokens reserved per call before the real usage is known.
+EXPECTED_COMPLETION_TOKENS = 500
+# Where get_scheduler keeps the requests/min and tokens/min budgets, shared by
+# every process on the machine (app workers, the Streamlit process, batch.py).
+SHARED_BUCKETS_PATH = ".cache/rate_limits.sqlite3"
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = {"APIConnectionError", "APITimeoutError", "ConnectionError", "Timeout", "ReadTimeout", "ConnectTimeout"}
+
+
+def status_code(e):
+    code = getattr(e, "status_code", None)
+    if code is None:
+        code = getattr(getattr(e, "response", None), "status_code", None)
+    return code
+
+
+def retry_after(e):
+    """Seconds from a ``Retry-After`` header on the error's response, if any."""
+    headers = getattr(getattr(e, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(e):
+    return status_code(e) in RETRYABLE_STATUS or type(e).__name__ in RETRYABLE_ERRORS
+
+
+class TokenBucket:
+    """Allows ``per_minute`` units a minute, refilled continuously; ``None`` means unlimited.
+
+    Not thread-safe on its own; ``LLMScheduler`` guards it with its lock.
+    """
+
+    def __init__(self, per_minute=None):
+        self.capacity = per_minute
+        self.level = float(per_minute or 0)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        if self.capacity:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        if not self.capacity:
+            return 0.0
+        self._refill(now)
+        # A request bigger than the whole bucket waits for a full bucket instead of forever.
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing * 60 / self.capacity)
+
+    def take(self, amount, now):
+        if self.capacity:
+            self._refill(now)
+            self.level -= amount
+
+    def adjust(self, amount):
+        # Real usage differed from the reservation; the level may go negative (debt).
+        if self.capacity:
+            self.level -= amount
+
+
+class SharedTokenBucket:
+    """``TokenBucket`` whose level is kept in SQLite, so several processes draw on one budget.
+
+    The level is refilled from wall-clock time when read; the ``now``
+    arguments (a process's own monotonic clock) are ignored. Checking and
+    taking are separate steps, so processes admitted at the same moment can
+    overdraw by a call each; the debt delays the calls after them.
+    """
+
+    def __init__(self, name, per_minute=None, path=SHARED_BUCKETS_PATH):
+        self.name = name
+        self.capacity = per_minute
+        self.path = path
+        self._local = threading.local()
+        if not per_minute:
+            return
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with _Transaction(self._connect()) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, level REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            conn.execute("INSERT OR IGNORE INTO buckets VALUES (?, ?, ?)", (name, float(per_minute), time.time()))
+
+    def _connect(self):
+        # One connection per thread and per process, as in LLMCache.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _level(self, conn):
+        level, updated = conn.execute("SELECT level, updated FROM buckets WHERE name = ?", (self.name,)).fetchone()
+        return min(self.capacity, level + max(0.0, time.time() - updated) * self.capacity / 60)
+
+    @property
+    def level(self):
+        return self._level(self._connect()) if self.capacity else 0.0
+
+    def wait_time(self, amount, now=None):
+        if not self.capacity:
+            return 0.0
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing * 60 / self.capacity)
+
+    def take(self, amount, now=None):
+        self.adjust(amount)
+
+    def adjust(self, amount):
+        if not self.capacity:
+            return
+        with _Transaction(self._connect()) as conn:
+            conn.execute("UPDATE buckets SET level = ?, updated = ? WHERE name = ?",
+                         (self._level(conn) - amount, time.time(), self.name))
+
+
+class LLMScheduler:
+    """Admission control shared by every ``Chain`` call in a process.
+
+    A call waits until it is first in line (``INTERACTIVE`` before ``BATCH``,
+    FIFO within a priority), a concurrency slot is free, and both the
+    requests/min and tokens/min buckets can pay for it. The concurrency
+    limit follows AIMD: +1 per window of successful calls, halved on a 429
+    or (with ``target_latency``) a slow call. Rate-limited and transient
+    failures are retried with full-jitter exponential backoff, honouring
+    ``Retry-After``, which also pauses every other caller.
+
+    With ``shared_path``, the requests/min and tokens/min buckets are kept
+    in that SQLite file (``SharedTokenBucket``) and drawn on by every
+    process using it; priorities and the concurrency limit stay per process.
+    """
+
+    def __init__(self, rpm=None, tpm=None, max_concurrency=16, min_concurrency=1, initial_concurrency=None,
+                 target_latency=None, max_retries=5, base_delay=0.5, max_delay=30.0, shared_path=None):
+        if shared_path:
+            self.requests = SharedTokenBucket("requests", rpm, shared_path)
+            self.tokens = SharedTokenBucket("tokens", tpm, shared_path)
+        else:
+            self.requests = TokenBucket(rpm)
+            self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(initial_concurrency or max_concurrency)
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.in_flight = 0
+        self.stats = {"calls": 0, "retries": 0, "rate_limited": 0, "failures": 0}
+        self._waiters = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+
+    def _acquire(self, tokens, priority):
+        entry = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = None
+                    if self._waiters[0] == entry and self.in_flight < max(1, int(self.limit)):
+                        wait = max(
+                            self._paused_until - now,
+                            self.requests.wait_time(1, now),
+                            self.tokens.wait_time(tokens, now),
+                        )
+                        if wait <= 0:
+                            self.requests.take(1, now)
+                            self.tokens.take(tokens, now)
+                            self.in_flight += 1
+                            return
+                    self._cond.wait(wait)
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def _release(self, latency, ok, rate_limited=False, pause=None):
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            self.stats["calls"] += 1
+            if rate_limited:
+                self.stats["rate_limited"] += 1
+            elif not ok:
+                self.stats["failures"] += 1
+            if pause:
+                self._paused_until = max(self._paused_until, now + pause)
+            slow = ok and self.target_latency and latency > self.target_latency
+            if rate_limited or slow:
+                # Decrease at most once per call duration, so a burst of 429s from
+                # calls already in flight counts as one congestion signal.
+                if now - self._last_decrease > latency:
+                    self.limit = max(self.min_concurrency, self.limit / 2)
+                    self._last_decrease = now
+            elif ok:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def _backoff(self, attempt, e):
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return max(delay, retry_after(e) or 0)
+
+    def _failed(self, attempt, e, latency):
+        """Record a failed attempt; return the delay before retrying, or re-raise."""
+        rate_limited = status_code(e) == 429
+        self._release(latency, ok=False, rate_limited=rate_limited, pause=retry_after(e) if rate_limited else None)
+        if not is_retryable(e) or attempt >= self.max_retries:
+            raise e
+        with self._cond:
+            self.stats["retries"] += 1
+        tracer.annotate(retries=1)
+        return self._backoff(attempt, e)
+
+    def call(self, fn, tokens=EXPECTED_COMPLETION_TOKENS, priority=INTERACTIVE):
+        """Run ``fn()`` once admitted, retrying rate-limited and transient failures."""
+        for attempt in itertools.count():
+            self._acquire(tokens, priority)
+            start = time.monotonic()
+            try:
+                result = fn()
+            except Exception as e:
+                time.sleep(self._failed(attempt, e, time.monotonic() - start))
+                continue
+            self._release(time.monotonic() - start, ok=True)
+            return result
+
+    def stream(self, fn, tokens=EXPECTED_COMPLETION_TOKENS, priority=INTERACTIVE):
+        """Like ``call`` for an ``fn`` returning an iterator; yields its items.
+
+        Only failures before the first item are retried; the slot is held
+        until the stream ends. Latency is measured to the first item.
+        """
+        end = object()
+        for attempt in itertools.count():
+            self._acquire(tokens, priority)
+            start = time.monotonic()
+            try:
+                iterator = iter(fn())
+                first = next(iterator, end)
+            except Exception as e:
+                time.sleep(self._failed(attempt, e, time.monotonic() - start))
+                continue
+            break
+        latency = time.monotonic() - start
+        ok = False
+        try:
+            if first is not end:
+                yield first
+                yield from iterator
+            ok = True
+        finally:
+            self._release(latency, ok=ok)
+
+    def charge(self, tokens):
+        """Correct the tokens/min bucket once a call's real usage is known (``tokens`` may be negative)."""
+        with self._cond:
+            self.tokens.adjust(tokens)
+            self._cond.notify_all()
+
+    def snapshot(self):
+        with self._cond:
+            return dict(self.stats, limit=round(self.limit, 2), in_flight=self.in_flight, waiting=len(self._waiters))
+
+
+def _env_number(name):
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Process-wide scheduler, configured from ``LLM_RPM``, ``LLM_TPM`` and ``LLM_MAX_CONCURRENCY``.
+
+    ``LLM_RPM`` and ``LLM_TPM`` are machine-wide: their buckets live in
+    ``SHARED_BUCKETS_PATH``, so the app's worker processes, the Streamlit
+    process and ``batch.py`` together stay within them. Unset limits are
+    not enforced up front; 429s are still retried and shrink the
+    concurrency limit.
+    """
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = LLMScheduler(
+                rpm=_env_number("LLM_RPM"),
+                tpm=_env_number("LLM_TPM"),
+                max_concurrency=int(_env_number("LLM_MAX_CONCURRENCY") or 16),
+                target_latency=_env_number("LLM_TARGET_LATENCY"),
+                shared_path=SHARED_BUCKETS_PATH,
+            )
+        return _default_scheduler
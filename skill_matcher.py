@@ -0,0 +1,229 @@
+from collections import deque
+from functools import lru_cache
+
+COMMON_SKILLS = [
+    # Machine Learning
+    "Machine Learning", "Deep Learning", "Neural Networks", "Computer Vision",
+    "Supervised Learning", "Unsupervised Learning", "Scikit-learn", "TensorFlow", "Keras",
+    "PyTorch", "Model Evaluation", "Feature Engineering", "Cross-Validation", "Hyperparameter Tuning",
+    "XGBoost", "LightGBM", "Gradient Descent", "Overfitting", "Regularization", "ML Pipelines",
+
+    # Data Science
+    "Python", "R", "SQL", "Pandas", "NumPy", "Matplotlib", "Seaborn", "Jupyter Notebook",
+    "Data Cleaning", "Exploratory Data Analysis", "Statistics", "Hypothesis Testing", "Probability",
+    "A/B Testing", "Predictive Modeling", "Time Series Analysis", "Business Intelligence",
+
+    # Data Analysis
+    "Excel", "Power BI", "Tableau", "Pivot Tables", "VLOOKUP", "XLOOKUP", "Data Wrangling",
+    "Descriptive Statistics", "Report Writing", "Google Sheets", "Data Visualization", "KPI Analysis",
+    "SQL Joins", "SQL Aggregations",
+
+    # Data Engineering
+    "PostgreSQL", "MySQL", "MongoDB", "Apache Spark", "Apache Kafka", "ETL", "ELT Pipelines",
+    "Airflow", "Data Warehousing", "Redshift", "Snowflake", "BigQuery", "dbt", "AWS S3", "AWS Lambda",
+    "AWS Glue", "Azure Data Factory", "Data Lake", "Docker", "Kubernetes",
+
+    # Natural Language Processing
+    "Natural Language Processing",
+    "Text Preprocessing", "Tokenization", "Lemmatization", "TF-IDF", "Word2Vec", "FastText",
+    "Transformers", "BERT", "RoBERTa", "GPT", "Named Entity Recognition", "Sentiment Analysis",
+    "Text Classification", "Hugging Face Transformers", "spaCy", "NLTK",
+
+    # LLMs & Agents
+    "OpenAI GPT", "LLaMA", "Claude", "Gemini", "LangChain", "Prompt Engineering",
+    "Retrieval-Augmented Generation", "Pinecone", "ChromaDB", "Weaviate", "Vector Embeddings",
+    "Agent Frameworks", "LangGraph", "CrewAI", "AutoGen", "Tool Use", "Tool Calling",
+    "Memory Management", "Guardrails", "Output Parsing", "Chain of Thought", "ReAct Prompting", "Streaming Outputs",
+    "Chat Completion APIs",
+
+    # Programming & Web
+    "Java", "JavaScript", "TypeScript", "C++", "C#", "Node.js", "React",
+
+    # General Tools
+    "Git", "GitHub", "APIs", "REST", "GraphQL", "FastAPI", "Flask", "Linux", "Bash",
+    "CI/CD", "Cloud Platforms", "AWS", "Azure", "GCP", "VS Code", "Testing", "Pytest", "Unit Testing"
+]
+
+# alias -> canonical skill name
+SKILL_ALIASES = {
+    "sklearn": "Scikit-learn",
+    "scikit": "Scikit-learn",
+    "k8s": "Kubernetes",
+    "ml": "Machine Learning",
+    "dl": "Deep Learning",
+    "nlp": "Natural Language Processing",
+    "ner": "Named Entity Recognition",
+    "rag": "Retrieval-Augmented Generation",
+    "eda": "Exploratory Data Analysis",
+    "postgres": "PostgreSQL",
+    "spark": "Apache Spark",
+    "pyspark": "Apache Spark",
+    "kafka": "Apache Kafka",
+    "apache airflow": "Airflow",
+    "jupyter": "Jupyter Notebook",
+    "powerbi": "Power BI",
+    "ab testing": "A/B Testing",
+    "cicd": "CI/CD",
+    "ci cd": "CI/CD",
+    "rest api": "REST",
+    "restful": "REST",
+    "google cloud": "GCP",
+    "google cloud platform": "GCP",
+    "amazon web services": "AWS",
+    "microsoft azure": "Azure",
+    "s3": "AWS S3",
+    "huggingface": "Hugging Face Transformers",
+    "hugging face": "Hugging Face Transformers",
+    "llama": "LLaMA",
+    "chatgpt": "OpenAI GPT",
+    "vscode": "VS Code",
+    "js": "JavaScript",
+    "nodejs": "Node.js",
+    "cpp": "C++",
+    "csharp": "C#",
+    "reactjs": "React",
+    "react.js": "React",
+    "tfidf": "TF-IDF",
+    "react agents": "ReAct Prompting",
+    "react framework": "ReAct Prompting",
+}
+
+# Groups of distinct skills that jobs and resumes often use interchangeably.
+# Only the fuzzy similarity index (skill_similarity.py) uses them; exact
+# matching keeps them apart.
+SKILL_SYNONYMS = [
+    ("Deep Learning", "Neural Networks"),
+    ("Machine Learning", "Supervised Learning", "Predictive Modeling"),
+    ("Data Cleaning", "Data Wrangling"),
+    ("Statistics", "Descriptive Statistics", "Probability"),
+    ("Hypothesis Testing", "A/B Testing"),
+    ("Data Visualization", "Matplotlib", "Seaborn", "Tableau", "Power BI"),
+    ("Business Intelligence", "Power BI", "Tableau"),
+    ("Excel", "Google Sheets", "Pivot Tables", "VLOOKUP", "XLOOKUP"),
+    ("ETL", "ELT Pipelines"),
+    ("Data Warehousing", "Redshift", "Snowflake", "BigQuery"),
+    ("Cloud Platforms", "AWS", "Azure", "GCP"),
+    ("Text Preprocessing", "Tokenization", "Lemmatization"),
+    ("Transformers", "Hugging Face Transformers"),
+    ("OpenAI GPT", "GPT", "Chat Completion APIs"),
+    ("Pinecone", "ChromaDB", "Weaviate"),
+    ("Agent Frameworks", "LangGraph", "CrewAI", "AutoGen"),
+    ("Tool Use", "Tool Calling"),
+    ("APIs", "REST", "GraphQL"),
+    ("Git", "GitHub"),
+    ("Testing", "Unit Testing", "Pytest"),
+]
+
+# Skills that are also everyday words; only matched in running text with this exact casing.
+CASE_SENSITIVE_SKILLS = {"R", "REST"}
+# Spellings that name another skill than their lowercase form does: "ReAct"
+# (the LLM agent pattern) is not the "React" front-end library.
+CASE_SENSITIVE_ALIASES = {"ReAct": "ReAct Prompting"}
+
+
+def normalize_skill(text):
+    """Lowercase and map separators to spaces without changing the string length."""
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        lowered = "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+    return lowered.translate(_SEPARATORS)
+
+
+_SEPARATORS = str.maketrans({"-": " ", "_": " ", "\n": " ", "\t": " ", "\r": " "})
+
+
+class _Automaton:
+    """Aho-Corasick automaton: finds every pattern occurrence in one pass over the text."""
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        for pattern, value in patterns.items():
+            node = 0
+            for ch in pattern:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                    self.goto[node][ch] = nxt
+                node = nxt
+            self.out[node].append((len(pattern), value))
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def iter(self, text):
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, value in out[node]:
+                yield i - length + 1, i + 1, value
+
+
+class SkillTaxonomy:
+    """Canonical skill names plus aliases, matched on word boundaries."""
+
+    def __init__(self, skills=COMMON_SKILLS, aliases=SKILL_ALIASES):
+        self.lookup = {normalize_skill(s): s for s in skills}
+        for alias, canonical in aliases.items():
+            self.lookup.setdefault(normalize_skill(alias), canonical)
+        self.skills = sorted(set(self.lookup.values()))
+        self.automaton = _Automaton(self.lookup)
+        self._canonical_cache = {}
+
+    def find(self, text):
+        """Yield ``(start, end, canonical)`` for every whole-word skill mention in ``text``."""
+        normalized = normalize_skill(text)
+        for start, end, canonical in self.automaton.iter(normalized):
+            # A leading "." keeps "js" from matching inside "node.js".
+            if start > 0 and (normalized[start - 1].isalnum() or normalized[start - 1] == "."):
+                continue
+            if end < len(normalized) and normalized[end].isalnum():
+                continue
+            if canonical in CASE_SENSITIVE_SKILLS and end - start == len(canonical) and text[start:end] != canonical:
+                continue
+            yield start, end, CASE_SENSITIVE_ALIASES.get(text[start:end], canonical)
+
+    def extract(self, text):
+        return sorted({canonical for _, _, canonical in self.find(text)})
+
+    def canonical(self, skill):
+        """Map one skill string to its canonical names (a phrase may name several)."""
+        cached = self._canonical_cache.get(skill)
+        if cached is None:
+            key = " ".join(normalize_skill(skill).split())
+            if skill.strip() in CASE_SENSITIVE_ALIASES:
+                cached = [CASE_SENSITIVE_ALIASES[skill.strip()]]
+            elif key in self.lookup:
+                cached = [self.lookup[key]]
+            else:
+                cached = self.extract(skill) or [skill.strip()]
+            self._canonical_cache[skill] = cached
+        return cached
+
+    def canonicalize(self, skills):
+        result = []
+        for skill in skills:
+            if isinstance(skill, str) and skill.strip():
+                result.extend(c for c in self.canonical(skill) if c not in result)
+        return result
+
+
+@lru_cache(maxsize=1)
+def get_taxonomy():
+    return SkillTaxonomy()
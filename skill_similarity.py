@@ -0,0 +1,216 @@
+import hashlib
+import json
+import math
+import os
+import threading
+import zlib
+
+import numpy as np
+
+from skill_matcher import SKILL_ALIASES, SKILL_SYNONYMS, get_taxonomy, normalize_skill
+
+# Bump when the vectorizer changes so saved vectors are rebuilt.
+INDEX_VERSION = 1
+NGRAM_RANGE = (2, 4)
+DIMENSIONS = 2 ** 12
+# How much a skill's row borrows from its synonyms; how close free text must
+# be to a taxonomy name to be pulled towards that skill; and the similarity
+# that counts as a fuzzy match.
+SYNONYM_WEIGHT = 0.5
+CONCEPT_THRESHOLD = 0.5
+FUZZY_THRESHOLD = 0.6
+EMBED_CACHE_SIZE = 4096
+
+
+def _grams(text):
+    words = " ".join(normalize_skill(text).split())
+    padded = f" {words} "
+    grams = [padded[i:i + n] for n in range(NGRAM_RANGE[0], NGRAM_RANGE[1] + 1) for i in range(len(padded) - n + 1)]
+    grams.extend("w:" + word for word in words.split())
+    return grams
+
+
+def _buckets(text):
+    counts = {}
+    for gram in _grams(text):
+        bucket = zlib.crc32(gram.encode("utf-8")) & (DIMENSIONS - 1)
+        counts[bucket] = counts.get(bucket, 0) + 1
+    return counts
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+class SkillSimilarityIndex:
+    """Character n-gram TF-IDF vectors for the skill taxonomy, matched with NumPy.
+
+    Every taxonomy name and alias is an L2-normalised row of hashed 2-4
+    character n-grams plus whole words, IDF-weighted over the taxonomy.
+    Each skill also gets a row summing its names, blended with its
+    ``SKILL_SYNONYMS`` so "Deep Learning" sits next to "Neural Networks".
+    The matrices are saved once and then opened memory-mapped.
+    """
+
+    def __init__(self, labels, idf, names, name_labels, skills):
+        self.labels = labels
+        self.idf = idf
+        self.names = names              # (names, DIMENSIONS): one row per name or alias
+        self.name_labels = name_labels  # index into ``labels`` for each name row
+        self.skills = skills            # (labels, DIMENSIONS): names + synonyms per skill
+        self._embedded = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, taxonomy=None):
+        taxonomy = taxonomy or get_taxonomy()
+        labels = taxonomy.skills
+        position = {label: row for row, label in enumerate(labels)}
+        names = [(label, position[label]) for label in labels]
+        names.extend((alias, position[canonical]) for alias, canonical in SKILL_ALIASES.items() if canonical in position)
+
+        df = np.zeros(DIMENSIONS, dtype=np.float32)
+        for name, _ in names:
+            df[list(_buckets(name))] += 1
+        idf = (np.log((1 + len(names)) / (1 + df)) + 1).astype(np.float32)
+
+        index = cls(labels, idf, None, np.array([row for _, row in names]), None)
+        index.names = index.vectorize([name for name, _ in names])
+        concepts = np.zeros((len(labels), DIMENSIONS), dtype=np.float32)
+        np.add.at(concepts, index.name_labels, index.names)
+        concepts = _normalize_rows(concepts)
+
+        weights = np.eye(len(labels), dtype=np.float32)
+        for group in SKILL_SYNONYMS:
+            rows = [position[s] for s in group if s in position]
+            for i in rows:
+                for j in rows:
+                    if i != j:
+                        weights[i, j] = SYNONYM_WEIGHT
+        index.skills = _normalize_rows(weights @ concepts)
+        return index
+
+    @staticmethod
+    def fingerprint():
+        taxonomy = get_taxonomy()
+        payload = json.dumps([INDEX_VERSION, NGRAM_RANGE, DIMENSIONS, SYNONYM_WEIGHT, taxonomy.skills,
+                              sorted(SKILL_ALIASES.items()), SKILL_SYNONYMS])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    @classmethod
+    def load_or_build(cls, cache_dir=".cache/skill_vectors"):
+        """Open the saved vectors memory-mapped, building and saving them first if needed."""
+        base = os.path.join(cache_dir, f"skills-{cls.fingerprint()}")
+        try:
+            with open(base + ".json", encoding="utf-8") as f:
+                meta = json.load(f)
+            return cls(
+                meta["labels"],
+                np.load(base + ".idf.npy"),
+                np.load(base + ".names.npy", mmap_mode="r"),
+                np.array(meta["name_labels"]),
+                np.load(base + ".npy", mmap_mode="r"),
+            )
+        except (OSError, ValueError, KeyError):
+            pass
+        index = cls.build()
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = f"{base}.{os.getpid()}.{threading.get_ident()}.tmp"
+        # Matrices first and metadata last: a reader that finds the metadata finds everything.
+        for suffix, matrix in ((".npy", index.skills), (".names.npy", index.names), (".idf.npy", index.idf)):
+            with open(tmp, "wb") as f:
+                np.save(f, matrix)
+            os.replace(tmp, base + suffix)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"labels": index.labels, "name_labels": index.name_labels.tolist()}, f)
+        os.replace(tmp, base + ".json")
+        return index
+
+    def vectorize(self, texts):
+        """L2-normalised TF-IDF rows for ``texts``."""
+        matrix = np.zeros((len(texts), DIMENSIONS), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for bucket, count in _buckets(str(text)).items():
+                matrix[row, bucket] = 1 + math.log(count)
+        return _normalize_rows(matrix * self.idf)
+
+    def top_k(self, texts, k=5):
+        """The ``k`` most similar taxonomy skills for each text, as ``[(skill, score), ...]``."""
+        if not texts:
+            return []
+        scores = self.vectorize(texts) @ self.skills.T
+        k = min(k, len(self.labels))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in enumerate(top):
+            ranked = candidates[np.argsort(-scores[row, candidates])]
+            results.append([(self.labels[i], round(float(scores[row, i]), 4)) for i in ranked])
+        return results
+
+    def embed(self, texts):
+        """Skill vectors pulled towards their closest taxonomy skill (and so its synonyms).
+
+        A text that closely matches a taxonomy name or alias is represented
+        mostly by that skill's row; unknown skills keep their own n-grams.
+        Rows are cached per text, so a resume's skills are embedded once.
+        """
+        if not texts:
+            return np.zeros((0, DIMENSIONS), dtype=np.float32)
+        with self._lock:
+            rows = {t: self._embedded[t] for t in texts if t in self._embedded}
+        missing = [t for t in dict.fromkeys(texts) if t not in rows]
+        if missing:
+            vectors = self.vectorize(missing)
+            scores = vectors @ self.names.T
+            best = scores.argmax(axis=1)
+            weight = scores[np.arange(len(missing)), best]
+            weight = np.where(weight >= CONCEPT_THRESHOLD, weight, 0)[:, None]
+            new_rows = _normalize_rows((1 - weight) * vectors + weight * self.skills[self.name_labels[best]])
+            rows.update(zip(missing, new_rows))
+            with self._lock:
+                if len(self._embedded) + len(missing) > EMBED_CACHE_SIZE:
+                    self._embedded.clear()
+                self._embedded.update(zip(missing, new_rows))
+        return np.stack([rows[t] for t in texts])
+
+    def fuzzy_match(self, resume_skills, job_skills, threshold=FUZZY_THRESHOLD):
+        """Score a whole job's skill list against the resume with one matrix product.
+
+        A job skill counts as matched when some resume skill is at least
+        ``threshold`` similar. Returns the ``match_skills`` keys plus
+        ``similar_skills``: ``{job skill: [closest resume skill, score]}``
+        for matches that are not exact.
+        """
+        resume = [s for s in resume_skills if isinstance(s, str) and s.strip()]
+        job = list(dict.fromkeys(s for s in job_skills if isinstance(s, str) and s.strip()))
+        if not job or not resume:
+            return {"fit_percentage": 0.0, "matched_skills": [], "similar_skills": {}}
+        scores = self.embed(job) @ self.embed(resume).T
+        best = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(job)), best]
+        matched, similar = [], {}
+        for i, skill in enumerate(job):
+            if best_scores[i] < threshold:
+                continue
+            matched.append(skill)
+            closest = resume[best[i]]
+            if normalize_skill(closest).strip() != normalize_skill(skill).strip():
+                similar[skill] = [closest, round(float(best_scores[i]), 3)]
+        return {
+            "fit_percentage": round(len(matched) / len(job) * 100, 2),
+            "matched_skills": matched,
+            "similar_skills": similar,
+        }
+
+
+_default_index = None
+_default_lock = threading.Lock()
+
+
+def get_similarity_index():
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            _default_index = SkillSimilarityIndex.load_or_build()
+        return _default_index
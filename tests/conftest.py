@@ -0,0 +1,52 @@
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import fetcher
+import job_index
+import job_store
+import llm_cache
+import resume_store
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """Run every test in its own directory, so ``.cache/`` and the process-wide stores start empty."""
+    monkeypatch.chdir(tmp_path)
+    for module in (fetcher, job_index, job_store, llm_cache, resume_store):
+        for name in ("_default_fetcher", "_default_index", "_default_store", "_default_cache"):
+            if hasattr(module, name):
+                monkeypatch.setattr(module, name, None)
+
+
+@contextmanager
+def serve(handle):
+    """Serve ``handle(request_handler)`` for every GET and POST on a local HTTP server; yields the base URL."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            handle(self)
+
+        do_POST = do_GET
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def reply(handler, status, body=b"", headers=()):
+    handler.send_response(status)
+    for name, value in dict(headers).items():
+        handler.send_header(name, value)
+    handler.send_header("Content-Length", str(len(body)))
+    handler.end_headers()
+    handler.wfile.write(body)
@@ -0,0 +1,130 @@
+import json
+from collections import Counter
+
+import pytest
+from docx import Document
+
+import batch
+from chains import Chain
+from conftest import reply, serve
+from llm_backends import FakeChatModel
+from scheduler import LLMScheduler
+
+N_JOBS = 4
+
+
+def careers_page(n_jobs):
+    return "".join(
+        f"<article><h2>Data Scientist {i}</h2><p>Job ID {i}. Python, SQL and Kubernetes.</p></article>"
+        for i in range(n_jobs)
+    )
+
+
+@pytest.fixture
+def site():
+    pages = {"/a": careers_page(N_JOBS), "/b": careers_page(N_JOBS)}
+
+    def handle(handler):
+        body = pages.get(handler.path, "").encode("utf-8")
+        reply(handler, 200 if body else 404, body, {"Content-Type": "text/html; charset=utf-8"})
+
+    with serve(handle) as base_url:
+        yield [base_url + "/a", base_url + "/b"]
+
+
+@pytest.fixture
+def resumes(tmp_path):
+    paths = []
+    for name in ("alex", "sam"):
+        doc = Document()
+        doc.add_paragraph(f"{name.title()} Doe")
+        doc.add_paragraph("Skills: Python, SQL, Docker")
+        path = tmp_path / f"{name}.docx"
+        doc.save(path)
+        paths.append(str(path))
+    return paths
+
+
+def make_chain():
+    return Chain(llm=FakeChatModel(), scheduler=LLMScheduler())
+
+
+def records(path):
+    out = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                out.append(json.loads(line))
+            except json.JSONDecodeError:
+                pass
+    return out
+
+
+def pair_counts(path):
+    return Counter(
+        (r["resume"], r["url"], r["job_index"]) for r in records(path) if not r.get("errors") and r.get("job_index") is not None
+    )
+
+
+class Killed(BaseException):
+    """Stands in for the process being killed mid-run."""
+
+
+def test_interrupted_batch_resumes_without_duplicates(tmp_path, site, resumes, monkeypatch):
+    output = tmp_path / "results.jsonl"
+    analyze_pair = batch.analyze_pair
+    calls = []
+
+    def dies_after_three(*args, **kwargs):
+        calls.append(args)
+        if len(calls) > 3:
+            raise Killed()
+        return analyze_pair(*args, **kwargs)
+
+    monkeypatch.setattr(batch, "analyze_pair", dies_after_three)
+    with pytest.raises(Killed):
+        batch.run_batch(make_chain(), resumes, site, str(output), workers=1, log=lambda msg: None)
+    finished = pair_counts(output)
+    assert 0 < len(finished) < 2 * 2 * N_JOBS
+
+    # The crash also tore the line being written.
+    with open(output, "a", encoding="utf-8") as f:
+        f.write('{"resume": "torn')
+
+    monkeypatch.setattr(batch, "analyze_pair", analyze_pair)
+    written = batch.run_batch(make_chain(), resumes, site, str(output), workers=4, log=lambda msg: None)
+
+    counts = pair_counts(output)
+    assert written == 2 * 2 * N_JOBS - len(finished)
+    assert len(counts) == 2 * 2 * N_JOBS
+    assert set(counts.values()) == {1}
+
+
+def test_finished_batch_is_not_rerun(tmp_path, site, resumes):
+    output = tmp_path / "results.jsonl"
+    batch.run_batch(make_chain(), resumes, site, str(output), workers=4, log=lambda msg: None)
+    size = output.stat().st_size
+
+    chain = make_chain()
+    assert batch.run_batch(chain, resumes, site, str(output), workers=4, log=lambda msg: None) == 0
+    assert output.stat().st_size == size
+    assert chain.llm.stats["calls"] == 0
+
+
+def test_progress_ignores_torn_and_failed_records(tmp_path):
+    output = tmp_path / "results.jsonl"
+    lines = [
+        {"resume": "r", "url": "u", "job_index": 0, "job_count": 2, "errors": {}},
+        {"resume": "r", "url": "u", "job_index": 1, "job_count": 2, "errors": {"email": "timeout"}},
+        {"resume": "r", "url": None, "job_index": None, "errors": {"load": "404"}},
+    ]
+    output.write_text("".join(json.dumps(line) + "\n" for line in lines) + '{"resume": "r", "url": "u", "job_in')
+
+    progress = batch.load_progress(str(output))
+    assert progress == {("r", "u"): (2, {0})}
+    assert not batch.is_complete(progress, "r", "u")
+    assert not batch.is_complete(progress, "r", "other")
+
+    with batch.open_output(str(output)) as out:
+        out.write(json.dumps(dict(lines[1], errors={})) + "\n")
+    assert batch.is_complete(batch.load_progress(str(output)), "r", "u")
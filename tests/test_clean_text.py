@@ -0,0 +1,74 @@
+import pytest
+
+from utils import clean_text
+
+JOB = (
+    "<h1>Senior Data Scientist</h1><p>Build ML models with Python, SQL and C++ on AWS. "
+    + "We ship models to production every week. " * 5 + "</p>"
+)
+CHROME = "<nav>Home Careers About</nav><div class='cookie-banner'>We use cookies</div><footer>Privacy</footer>"
+
+
+@pytest.mark.parametrize("page", [
+    f"<html><body class='page has-sidebar'>{CHROME}{JOB}</body></html>",
+    f"<html><body class='modal-open'>{CHROME}{JOB}</body></html>",
+    f"<html><body><div class='with-nav'>{CHROME}<main>{JOB}</main></div></body></html>",
+    f"<html><body><div class='with-nav'>{JOB}</div></body></html>",
+    f"<html><body>{CHROME}<div class='job-description has-sidebar'>{JOB}</div></body></html>",
+    f"<html><body><article class='share-card'>{JOB}</article></body></html>",
+])
+def test_layout_classes_do_not_empty_the_page(page):
+    text = clean_text(page)
+    assert "Senior Data Scientist" in text
+    assert "C++ on AWS" in text
+    assert "Home Careers" not in text
+
+
+def test_main_content_drops_marked_chrome():
+    page = f"<html><body>{CHROME}<main><div class='social-share'>Share on X</div>{JOB}</main></body></html>"
+    text = clean_text(page)
+    assert text.startswith("Senior Data Scientist")
+    assert "Share on X" not in text
+    assert "cookies" not in text
+
+
+@pytest.mark.parametrize("page, kept, dropped", [
+    ("<ul><li class='share'>Share on X<li>Python<li>SQL</ul>", "Python\nSQL", "Share on X"),
+    ("<div class='social'><p>Follow us<p>Like us</div><p>Remote friendly", "Remote friendly", "Follow us"),
+    ("<table><tr class='menu'><td>Menu<td>Jobs<tr><td>Python<td>SQL</table>", "Python\nSQL", "Menu"),
+    ("<dl><dt class='breadcrumb'>Jobs<dd>Python<dt>SQL</dl>", "Python\nSQL", "Jobs"),
+])
+def test_omitted_end_tags_do_not_swallow_the_rest(page, kept, dropped):
+    text = clean_text(f"<html><body>{page}{JOB}</body></html>")
+    assert kept in text
+    assert "Senior Data Scientist" in text
+    assert dropped not in text
+
+
+@pytest.mark.parametrize("page", [
+    f"<html><body><form id='aspnetForm'><div id='content'>{JOB}</div></form></body></html>",
+    f"<html><body><form id='aspnetForm'>{CHROME}<main>{JOB}</main></form></body></html>",
+])
+def test_page_wrapped_in_a_form_keeps_its_text(page):
+    text = clean_text(page)
+    assert text.startswith("Senior Data Scientist")
+    assert "Home Careers" not in text
+
+
+def test_search_form_is_dropped():
+    page = f"<html><body><form role='form'><label>Keyword</label><input name='q'><textarea>x</textarea></form>{JOB}</body></html>"
+    text = clean_text(page)
+    assert text.startswith("Senior Data Scientist")
+    assert "Keyword" not in text
+
+
+def test_short_page_falls_back_to_unfiltered_text():
+    assert clean_text("<html><body><div class='job-sidebar'>Data Scientist, Python</div></body></html>") == (
+        "Data Scientist, Python"
+    )
+
+
+def test_chunked_input_matches_whole_page():
+    page = f"<html><body><div class='with-nav'>{CHROME}<main>{JOB}</main></div></body></html>"
+    chunks = [page[i:i + 7] for i in range(0, len(page), 7)]
+    assert clean_text(chunks) == clean_text(page)
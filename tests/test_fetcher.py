@@ -0,0 +1,94 @@
+import pytest
+import requests
+
+from conftest import reply, serve
+from fetcher import PageFetcher
+
+PAGE = "<html><body><main><h1>Data Scientist</h1><p>Python and SQL.</p></main></body></html>"
+
+
+@pytest.fixture
+def site():
+    """A page served with validators; records the conditional headers of every request."""
+    state = {"etag": '"v1"', "last_modified": "Wed, 01 Jan 2025 00:00:00 GMT", "html": PAGE, "requests": []}
+
+    def handle(handler):
+        if handler.path != "/careers":
+            return reply(handler, 404)
+        sent = {name: handler.headers.get(name) for name in ("If-None-Match", "If-Modified-Since")}
+        state["requests"].append(sent)
+        headers = {"Content-Type": "text/html; charset=utf-8"}
+        if state["etag"]:
+            headers["ETag"] = state["etag"]
+        if state["last_modified"]:
+            headers["Last-Modified"] = state["last_modified"]
+        if (state["etag"] and sent["If-None-Match"] == state["etag"]) or (
+                not state["etag"] and sent["If-Modified-Since"] == state["last_modified"]):
+            reply(handler, 304, headers=headers)
+        else:
+            reply(handler, 200, state["html"].encode("utf-8"), headers)
+
+    with serve(handle) as base_url:
+        state["url"] = base_url + "/careers"
+        yield state
+
+
+def test_second_fetch_revalidates_and_reuses_body(site):
+    fetcher = PageFetcher()
+    first = fetcher.fetch(site["url"])
+    second = fetcher.fetch(site["url"])
+
+    assert site["requests"][0] == {"If-None-Match": None, "If-Modified-Since": None}
+    assert site["requests"][1] == {"If-None-Match": '"v1"', "If-Modified-Since": site["last_modified"]}
+    assert (first.status, first.from_cache) == (200, False)
+    assert (second.status, second.from_cache, second.bytes) == (304, True, 0)
+    assert second.html == first.html == PAGE
+    assert second.text == first.text
+    assert "Data Scientist" in second.text
+
+
+def test_changed_page_is_fetched_again(site):
+    fetcher = PageFetcher()
+    fetcher.fetch(site["url"])
+    site["etag"], site["html"] = '"v2"', PAGE.replace("Data Scientist", "ML Engineer")
+
+    changed = fetcher.fetch(site["url"])
+    assert (changed.status, changed.from_cache) == (200, False)
+    assert "ML Engineer" in changed.text
+    assert site["requests"][-1]["If-None-Match"] == '"v1"'
+    assert fetcher.fetch(site["url"]).from_cache
+
+
+def test_last_modified_alone_is_used(site):
+    site["etag"] = None
+    fetcher = PageFetcher()
+    fetcher.fetch(site["url"])
+    second = fetcher.fetch(site["url"])
+
+    assert site["requests"][1] == {"If-None-Match": None, "If-Modified-Since": site["last_modified"]}
+    assert second.from_cache
+
+
+def test_page_without_validators_is_not_cached(site):
+    site["etag"] = site["last_modified"] = None
+    fetcher = PageFetcher()
+    fetcher.fetch(site["url"])
+    fetcher.fetch(site["url"])
+
+    assert site["requests"][1] == {"If-None-Match": None, "If-Modified-Since": None}
+
+
+def test_cache_is_shared_across_fetchers(site):
+    PageFetcher().fetch(site["url"])
+    assert PageFetcher().fetch(site["url"]).from_cache
+
+
+def test_errors_are_raised_and_fetch_many_yields_them(site):
+    fetcher = PageFetcher()
+    missing = site["url"].replace("/careers", "/missing")
+    with pytest.raises(requests.HTTPError):
+        fetcher.fetch(missing)
+
+    results = {result.url: result for result in fetcher.fetch_many([site["url"], missing])}
+    assert results[site["url"]].text
+    assert isinstance(results[missing], requests.HTTPError)
@@ -0,0 +1,53 @@
+from chains import Chain
+from job_index import JobIndex
+from llm_backends import FakeChatModel
+from scheduler import LLMScheduler
+
+DESCRIPTION = (
+    "We are hiring a backend engineer to build and run our web services. You will design APIs, "
+    "review code, mentor juniors and work with product on the roadmap for the payments platform."
+)
+STORED = {"role": "Backend Engineer", "description": DESCRIPTION, "skills": ["Python", "Django"]}
+
+
+def make_chain(index):
+    return Chain(llm=FakeChatModel(), scheduler=LLMScheduler(), job_index=index)
+
+
+def analyze(chain, jobs):
+    results = {}
+    for idx, task, result in chain.analyze_jobs(jobs, "Alex Doe. Python, Django.", ["Python", "Django"]):
+        results.setdefault(idx, {})[task] = result
+    return results
+
+
+def test_near_duplicate_with_same_skills_reuses_llm_tasks():
+    index = JobIndex(".cache/job_index.sqlite3")
+    first = analyze(make_chain(index), [STORED])
+
+    chain = make_chain(index)
+    again = analyze(chain, [dict(STORED, description=DESCRIPTION + " Apply now.")])
+    assert chain.llm.stats["calls"] == 0
+    assert again[0]["email"] == first[0]["email"]
+    assert again[0]["skill_match"]["fit_percentage"] == 100.0
+
+
+def test_near_duplicate_with_other_skills_is_scored_and_analysed_again():
+    index = JobIndex(".cache/job_index.sqlite3")
+    analyze(make_chain(index), [STORED])
+    changed = dict(STORED, skills=["Python", "Django", "Kubernetes", "Go", "Rust"])
+    assert index.find(changed)[1] >= index.threshold
+
+    chain = make_chain(index)
+    results = analyze(chain, [changed])
+    assert results[0]["skill_match"]["fit_percentage"] == 40.0
+    assert chain.llm.stats["calls"] > 0
+
+
+def test_copies_within_a_call_get_their_own_skill_match():
+    index = JobIndex(".cache/job_index.sqlite3")
+    changed = dict(STORED, skills=["Python", "Django", "Kubernetes", "Go", "Rust"])
+    results = analyze(make_chain(index), [STORED, dict(STORED, description=DESCRIPTION + " Apply now."), changed])
+
+    assert [results[i]["skill_match"]["fit_percentage"] for i in range(3)] == [100.0, 100.0, 40.0]
+    assert results[1]["email"] == results[0]["email"]
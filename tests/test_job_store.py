@@ -0,0 +1,55 @@
+import pytest
+
+from job_store import JobStore
+
+JOBS = [
+    {"role": "Data Scientist", "description": "Models for fraud detection.", "skills": ["Python", "SQL", "PyTorch"]},
+    {"role": "Data Analyst", "description": "Dashboards for sales.", "skills": "Python, SQL"},
+    {"role": "Frontend Engineer", "description": "Web apps.", "skills": ["React", "TypeScript"]},
+]
+
+
+@pytest.fixture(params=[True, False], ids=["fts5", "like"])
+def store(request):
+    store = JobStore(".cache/job_store.sqlite3")
+    store.full_text = request.param
+    store.add(JOBS, url="https://example.com/careers")
+    return store
+
+
+def test_exact_copies_are_stored_once(store):
+    ids = store.add(JOBS[:1] + [dict(JOBS[0], role="ML Engineer")])
+    assert ids[0] == 1 and ids[1] == 4
+    assert store.stats()["jobs"] == 4
+    assert store.get([2])[2]["job"] == JOBS[1]
+
+
+@pytest.mark.parametrize("query, roles", [
+    ("python", {"Data Scientist", "Data Analyst"}),
+    ("sales python", {"Data Analyst"}),
+    ("kotlin", set()),
+    ('"', set()),
+    ("  ", {"Data Scientist", "Data Analyst", "Frontend Engineer"}),
+    ("", {"Data Scientist", "Data Analyst", "Frontend Engineer"}),
+])
+def test_search(store, query, roles):
+    found = store.get(store.search(query))
+    assert {entry["job"]["role"] for entry in found.values()} == roles
+
+
+def test_rank_by_fit(store):
+    ranked = store.rank(["Python", "SQL", "Docker"], k=2)
+    assert [(entry["job"]["role"], entry["fit_percentage"]) for entry in ranked] == [
+        ("Data Analyst", 100.0), ("Data Scientist", 66.67),
+    ]
+
+
+def test_rank_reads_skills_given_as_one_string(store):
+    analyst = store.rank(["Python", "SQL"], ids=[2])[0]
+    assert (analyst["fit_percentage"], analyst["matched_skills"]) == (100.0, ["Python", "SQL"])
+
+
+def test_rank_sees_jobs_added_by_another_store(store):
+    store.rank(["Python"])
+    JobStore(".cache/job_store.sqlite3").add([{"role": "Go Developer", "skills": ["Go", "Python"]}])
+    assert store.rank(["Go"], k=1)[0]["job"]["role"] == "Go Developer"
@@ -0,0 +1,87 @@
+import sqlite3
+import threading
+
+import pytest
+
+import llm_cache
+from llm_cache import LLMCache
+
+PATH = ".cache/llm_cache.sqlite3"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Wall-clock time as seen by the cache, moved by hand."""
+    now = [1_000_000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = LLMCache(PATH, ttl=60)
+    cache.set("a", "1")
+    clock[0] += 59
+    assert cache.get("a") == "1"
+    clock[0] += 2
+    assert cache.get("a") is None
+    cache.set("b", "2")
+    assert cache.stats()["entries"] == 1
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    cache = LLMCache(PATH, max_entries=2)
+    cache.set("a", "1")
+    clock[0] += 1
+    cache.set("b", "2")
+    # A hit counts as an access once the entry's access time is stale.
+    clock[0] += llm_cache.TOUCH_INTERVAL + 1
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == ("1", None, "3")
+
+
+def test_size_limit_evicts_oldest_entries(clock):
+    cache = LLMCache(PATH, max_entries=None, max_bytes=10)
+    for key in "abc":
+        clock[0] += 1
+        cache.set(key, "x" * 4)
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 8
+
+
+def test_counters_are_shared_through_the_file():
+    first, second = LLMCache(PATH), LLMCache(PATH)
+    first.set("a", "1")
+    first.get("a")
+    first.get("missing")
+    second.get("a")
+
+    stats = second.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 0)
+    # first has not flushed yet; its lookups are counted once it does.
+    assert (stats["total_hits"], stats["total_misses"]) == (1, 0)
+    first.flush()
+    assert (second.stats()["total_hits"], second.stats()["total_misses"]) == (2, 1)
+
+
+def test_counters_are_flushed_every_few_lookups():
+    cache = LLMCache(PATH)
+    for _ in range(llm_cache.FLUSH_EVERY):
+        cache.get("missing")
+    assert LLMCache(PATH).stats()["total_misses"] == llm_cache.FLUSH_EVERY
+
+
+def test_lookups_do_not_wait_for_a_writer():
+    cache = LLMCache(PATH)
+    cache.set("a", "1")
+    writer = sqlite3.connect(PATH, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        found = []
+        thread = threading.Thread(target=lambda: found.append(cache.get("a")))
+        thread.start()
+        thread.join(2)
+        assert found == ["1"]
+    finally:
+        writer.execute("ROLLBACK")
+        thread.join()
@@ -0,0 +1,34 @@
+from chains import _completed_items
+from llm_json import JsonStreamParser
+
+RESPONSE = '{"missing_skills": ["JAX", "Spark"], "suggested_changes": ["Add a JAX project", {"text": "Reword"}]}'
+
+
+def snapshots(text):
+    """``_completed_items`` after every character, as the stream renders them."""
+    parser, seen = JsonStreamParser(), []
+    for i, c in enumerate(text):
+        partial = _completed_items(parser.feed(c).partial(), parser)
+        if partial and (not seen or partial != seen[-1][1]):
+            seen.append((i, partial))
+    return seen
+
+
+def first_shown(seen, key, item):
+    return next(i for i, partial in seen if item in partial.get(key, []))
+
+
+def test_list_item_is_shown_once_it_closes():
+    seen = snapshots(RESPONSE)
+    assert first_shown(seen, "missing_skills", "JAX") == RESPONSE.index('"JAX"') + 4
+    # The last item of a list does not wait for the closing bracket or the next key.
+    assert first_shown(seen, "missing_skills", "Spark") == RESPONSE.index('"Spark"') + 6
+    assert first_shown(seen, "suggested_changes", {"text": "Reword"}) == RESPONSE.index("}")
+
+
+def test_partly_written_item_is_held_back():
+    for text in ('{"missing_skills": ["JAX", "Sp', '{"changes": [{"text": "A"}, {"text": "Rew', '{"scores": [1, 2'):
+        parser = JsonStreamParser().feed(text)
+        partial = _completed_items(parser.partial(), parser)
+        assert parser.item_open
+        assert len(list(partial.values())[-1]) == 1
@@ -0,0 +1,189 @@
+import json
+import multiprocessing
+import threading
+import time
+import types
+
+import pytest
+
+from chains import Chain
+from conftest import reply, serve
+from llm_backends import fake_response, make_llm
+from scheduler import BATCH, INTERACTIVE, LLMScheduler
+
+
+class ApiError(Exception):
+    """Shaped like the Groq client's status errors: ``status_code`` and ``response.headers``."""
+
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        headers = {} if retry_after is None else {"retry-after": str(retry_after)}
+        self.response = types.SimpleNamespace(status_code=status_code, headers=headers)
+
+
+def failing(*errors, result="ok"):
+    """A call that raises ``errors`` in turn, then returns ``result``; ``calls`` counts attempts."""
+    pending = list(errors)
+
+    def fn():
+        fn.calls += 1
+        if pending:
+            raise pending.pop(0)
+        return result
+
+    fn.calls = 0
+    return fn
+
+
+def test_rate_limited_call_is_retried_and_halves_concurrency():
+    scheduler = LLMScheduler(max_concurrency=8, base_delay=0.01)
+    fn = failing(ApiError(429), ApiError(429))
+
+    assert scheduler.call(fn) == "ok"
+    assert fn.calls == 3
+    stats = scheduler.snapshot()
+    assert (stats["retries"], stats["rate_limited"], stats["in_flight"]) == (2, 2, 0)
+    assert stats["limit"] < 8
+
+
+def test_successes_grow_concurrency_back_additively():
+    scheduler = LLMScheduler(max_concurrency=8, initial_concurrency=2)
+    for _ in range(2):
+        scheduler.call(lambda: None)
+    # +1/limit per success: 2 -> 2.5 -> 2.9.
+    assert scheduler.snapshot()["limit"] == pytest.approx(2.9)
+    for _ in range(200):
+        scheduler.call(lambda: None)
+    assert scheduler.snapshot()["limit"] == 8
+
+
+def test_concurrency_never_drops_below_minimum():
+    scheduler = LLMScheduler(max_concurrency=16, min_concurrency=2, max_retries=0)
+    for _ in range(5):
+        with pytest.raises(ApiError):
+            scheduler.call(failing(ApiError(429)))
+        time.sleep(0.002)
+    assert scheduler.snapshot()["limit"] == 2
+
+
+def test_retry_after_is_honoured():
+    scheduler = LLMScheduler(base_delay=0.0)
+    start = time.monotonic()
+    scheduler.call(failing(ApiError(429, retry_after=0.3)))
+    assert time.monotonic() - start >= 0.3
+
+
+def test_transient_errors_are_retried_but_client_errors_are_not():
+    scheduler = LLMScheduler(base_delay=0.0)
+    assert scheduler.call(failing(ApiError(503))) == "ok"
+
+    fn = failing(ApiError(400))
+    with pytest.raises(ApiError):
+        scheduler.call(fn)
+    assert fn.calls == 1
+    assert scheduler.snapshot()["failures"] == 2
+
+
+def test_gives_up_after_max_retries():
+    scheduler = LLMScheduler(max_retries=2, base_delay=0.0)
+    fn = failing(*[ApiError(429)] * 5)
+    with pytest.raises(ApiError):
+        scheduler.call(fn)
+    assert fn.calls == 3
+    assert scheduler.snapshot()["in_flight"] == 0
+
+
+def test_interactive_calls_are_admitted_before_batch():
+    scheduler = LLMScheduler(max_concurrency=1)
+    release, order = threading.Event(), []
+
+    holder = threading.Thread(target=scheduler.call, args=(release.wait,))
+    holder.start()
+    while scheduler.snapshot()["in_flight"] == 0:
+        time.sleep(0.001)
+
+    def queue(name, priority, waiting):
+        thread = threading.Thread(target=scheduler.call, args=(lambda: order.append(name), 0, priority))
+        thread.start()
+        while scheduler.snapshot()["waiting"] < waiting:
+            time.sleep(0.001)
+        return thread
+
+    threads = [queue("batch", BATCH, 1), queue("interactive", INTERACTIVE, 2)]
+    release.set()
+    for thread in [holder] + threads:
+        thread.join(5)
+    assert order == ["interactive", "batch"]
+
+
+@pytest.fixture
+def stand_in_groq():
+    """A local stand-in for Groq's chat completions API that rate-limits the first requests."""
+    state = {"limited": 2, "requests": 0, "429": 0}
+    lock = threading.Lock()
+
+    def handle(handler):
+        body = json.loads(handler.rfile.read(int(handler.headers.get("Content-Length", 0))) or b"{}")
+        with lock:
+            state["requests"] += 1
+            limited = state["429"] < state["limited"]
+            if limited:
+                state["429"] += 1
+        if limited:
+            payload = {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}}
+            return reply(handler, 429, json.dumps(payload).encode("utf-8"),
+                         {"Content-Type": "application/json", "Retry-After": "0"})
+        prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+        payload = {
+            "id": "chatcmpl-test", "object": "chat.completion", "created": int(time.time()), "model": body.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": fake_response(prompt)},
+                         "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20},
+        }
+        reply(handler, 200, json.dumps(payload).encode("utf-8"), {"Content-Type": "application/json"})
+
+    with serve(handle) as base_url:
+        state["url"] = base_url
+        yield state
+
+
+def test_chain_recovers_from_429s_of_the_provider(stand_in_groq):
+    scheduler = LLMScheduler(max_concurrency=4, base_delay=0.01)
+    llm = make_llm("groq", api_key="stand-in", groq_api_base=stand_in_groq["url"])
+    chain = Chain(llm=llm, scheduler=scheduler)
+
+    result = chain.explain_skill_match("Python developer", ["Python", "Kubernetes"])
+
+    assert result["matched_skills"][0]["skill"] == "Python"
+    assert stand_in_groq["429"] == 2
+    assert stand_in_groq["requests"] == 3
+    stats = scheduler.snapshot()
+    assert (stats["rate_limited"], stats["retries"]) == (2, 2)
+    assert stats["limit"] < 4
+
+
+def _take_one(path):
+    # Runs in a separate process.
+    LLMScheduler(rpm=6, shared_path=path).call(lambda: None)
+
+
+def test_rate_budget_is_shared_across_processes(tmp_path):
+    path = str(tmp_path / "rate_limits.sqlite3")
+    # One request per 10 s once the 6 of the first minute are spent.
+    scheduler = LLMScheduler(rpm=6, shared_path=path)
+    for _ in range(5):
+        scheduler.call(lambda: None)
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        pool.apply(_take_one, (path,))
+
+    # The other process spent the last of them; a third scheduler has to wait.
+    assert LLMScheduler(rpm=6, shared_path=path).requests.wait_time(1) > 5
+
+
+def test_unshared_schedulers_keep_their_own_budget():
+    first, second = LLMScheduler(rpm=6), LLMScheduler(rpm=6)
+    for _ in range(6):
+        first.call(lambda: None)
+    assert first.requests.wait_time(1, time.monotonic()) > 5
+    assert second.requests.wait_time(1, time.monotonic()) == 0
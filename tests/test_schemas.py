@@ -0,0 +1,29 @@
+import pytest
+from langchain_core.exceptions import OutputParserException
+
+from chains import SCHEMAS, _json_validator
+
+
+def test_missing_or_null_lists_default_to_empty():
+    parse = _json_validator(SCHEMAS["improvements"])
+    assert parse('{"missing_skills": ["Go"], "suggested_changes": null}') == {
+        "missing_skills": ["Go"], "suggested_changes": [], "new_section_ideas": [],
+    }
+    assert parse_explanation('{"matched_skills": [{"skill": "SQL", "location": "Skills"}]}')["unmatched_skills"] == []
+
+
+@pytest.mark.parametrize("schema", ["explanation", "improvements"])
+def test_empty_object_is_not_an_answer(schema):
+    with pytest.raises(OutputParserException):
+        _json_validator(SCHEMAS[schema])("{}")
+
+
+def test_indexed_item_keys_are_still_required():
+    with pytest.raises(OutputParserException):
+        parse_explanation('{"matched_skills": [{"skill": "SQL"}]}')
+    with pytest.raises(OutputParserException):
+        parse_explanation('{"unmatched_skills": "none"}')
+
+
+def parse_explanation(text):
+    return _json_validator(SCHEMAS["explanation"])(text)
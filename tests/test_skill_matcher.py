@@ -0,0 +1,30 @@
+import pytest
+
+from skill_matcher import get_taxonomy
+from utils import match_skills
+
+
+@pytest.mark.parametrize("text, skills", [
+    ("Built ReAct agents with LangChain", ["LangChain", "ReAct Prompting"]),
+    ("ReAct prompting and tool calling", ["ReAct Prompting", "Tool Calling"]),
+    ("React and TypeScript front ends", ["React", "TypeScript"]),
+    ("REACT developer, react.js", ["React"]),
+])
+def test_react_agents_are_not_the_react_library(text, skills):
+    assert get_taxonomy().extract(text) == skills
+
+
+def test_react_agent_skills_are_matched():
+    assert get_taxonomy().canonicalize(["ReAct", "React", "reactjs"]) == ["ReAct Prompting", "React"]
+    assert match_skills(["ReAct", "LangChain"], ["ReAct Prompting"])["fit_percentage"] == 100.0
+    assert match_skills(["React"], ["ReAct"])["matched_skills"] == []
+
+
+@pytest.mark.parametrize("text, skills", [
+    ("Python, sklearn and k8s", ["Kubernetes", "Python", "Scikit-learn"]),
+    ("C++, C# and Node.js", ["C#", "C++", "Node.js"]),
+    ("Experience with R and REST APIs", ["APIs", "R", "REST"]),
+    ("a rest day for r", []),
+])
+def test_extract(text, skills):
+    assert get_taxonomy().extract(text) == skills
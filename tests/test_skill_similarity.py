@@ -0,0 +1,51 @@
+import pytest
+
+from skill_similarity import FUZZY_THRESHOLD, SkillSimilarityIndex
+from utils import match_skills
+
+
+@pytest.fixture(scope="module")
+def index():
+    return SkillSimilarityIndex.build()
+
+
+@pytest.mark.parametrize("resume_skill, job_skill", [
+    ("GCP", "Google Cloud Platform"),
+    ("Deep Learning", "Neural Networks"),
+    ("Machine Learning", "Predictive Modeling"),
+    ("Kubernetes", "k8s"),
+    ("Scikit learn", "sklearn"),
+])
+def test_related_skills_match(index, resume_skill, job_skill):
+    result = index.fuzzy_match([resume_skill], [job_skill])
+    assert result["matched_skills"] == [job_skill]
+    closest, score = result["similar_skills"][job_skill]
+    assert closest == resume_skill and score >= FUZZY_THRESHOLD
+
+
+@pytest.mark.parametrize("resume_skill, job_skill", [
+    ("Python", "SQL"),
+    ("TensorFlow", "Keras"),
+    ("Java", "JavaScript"),
+])
+def test_unrelated_skills_do_not_match(index, resume_skill, job_skill):
+    assert index.fuzzy_match([resume_skill], [job_skill])["fit_percentage"] == 0.0
+
+
+def test_exact_matches_are_not_listed_as_similar(index):
+    result = index.fuzzy_match(["Python", "Deep Learning"], ["python", "Neural Networks", "Rust"])
+    assert result["fit_percentage"] == 66.67
+    assert list(result["similar_skills"]) == ["Neural Networks"]
+
+
+@pytest.mark.parametrize("resume_skills, job_skills", [([], ["Python"]), (["Python"], []), ([], [])])
+def test_empty_lists_score_like_match_skills(index, resume_skills, job_skills):
+    fuzzy = index.fuzzy_match(resume_skills, job_skills)["fit_percentage"]
+    exact = match_skills(resume_skills, job_skills)["fit_percentage"]
+    assert fuzzy == exact == 0.0
+    assert type(fuzzy) is type(exact) is float
+
+
+def test_top_k_finds_taxonomy_names(index):
+    assert index.top_k(["google cloud"], k=1)[0][0][0] == "GCP"
+    assert index.top_k([]) == []
@@ -0,0 +1,194 @@
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+logger = logging.getLogger("resuintel.trace")
+
+_request_id = contextvars.ContextVar("trace_request_id", default=None)
+_job = contextvars.ContextVar("trace_job", default=None)
+_span = contextvars.ContextVar("trace_span", default=None)
+
+# Numeric span attributes that are summed into the metrics snapshot.
+COUNTERS = ("prompt_tokens", "completion_tokens", "cache_hits", "retries", "escalations", "resume_tokens_saved",
+            "parse_repairs", "parse_failures")
+
+
+class Span(dict):
+    """One timed stage. A dict so it logs and serialises as-is.
+
+    Counters are inclusive: ``add`` also adds to every enclosing span.
+    """
+
+    def __init__(self, parent=None, **fields):
+        super().__init__(**fields)
+        self["parent"] = parent["name"] if parent else None
+        self._parent = parent
+        self._lock = threading.Lock()
+
+    def add(self, **counts):
+        with self._lock:
+            for key, value in counts.items():
+                self[key] = self.get(key, 0) + value
+        if self._parent is not None:
+            self._parent.add(**counts)
+
+
+class Tracer:
+    """Records spans (wall time, tokens, cache hits, retries) grouped by request and job.
+
+    Finished spans go to the ``resuintel.trace`` logger as one JSON object
+    per line and into a bounded in-memory buffer that backs ``snapshot()``
+    (per-stage p50/p95) and ``spans()``.
+    """
+
+    def __init__(self, max_spans=10000):
+        self._spans = deque(maxlen=max_spans)
+        self._imported = set()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def request(self, request_id=None):
+        """Group every span started inside this block (and its worker threads) under one id."""
+        request_id = request_id or uuid.uuid4().hex[:12]
+        token = _request_id.set(request_id)
+        try:
+            yield request_id
+        finally:
+            _request_id.reset(token)
+
+    @contextmanager
+    def job(self, job):
+        token = _job.set(job)
+        try:
+            yield
+        finally:
+            _job.reset(token)
+
+    @contextmanager
+    def span(self, name, **attrs):
+        parent = _span.get()
+        span = Span(parent, name=name, request_id=_request_id.get(), job=_job.get(), **attrs)
+        token = _span.set(span)
+        start = time.perf_counter()
+        span["start"] = time.time()
+        try:
+            yield span
+        except GeneratorExit:
+            # A streaming consumer stopped early; that is not a failure.
+            raise
+        except BaseException as e:
+            span["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span["duration_s"] = round(time.perf_counter() - start, 6)
+            _span.reset(token)
+            with self._lock:
+                self._spans.append(span)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(json.dumps(span, default=str))
+
+    def annotate(self, **counts):
+        """Add counters (tokens, cache hits, retries) to the innermost open span and its parents."""
+        span = _span.get()
+        if span is not None:
+            span.add(**counts)
+
+    def spans(self, request_id=None):
+        with self._lock:
+            spans = list(self._spans)
+        return [dict(s) for s in spans if request_id is None or s.get("request_id") == request_id]
+
+    def totals(self, request_id=None):
+        """Counters summed over top-level spans, so nested work is counted once."""
+        spans = [s for s in self.spans(request_id) if s["parent"] is None]
+        return {key: sum(s.get(key, 0) for s in spans) for key in COUNTERS}
+
+    def snapshot(self, request_id=None):
+        """Per-stage metrics: count, errors, p50/p95/max wall time and summed counters."""
+        by_name = defaultdict(list)
+        for span in self.spans(request_id):
+            by_name[span["name"]].append(span)
+        metrics = {}
+        for name, spans in sorted(by_name.items()):
+            durations = sorted(s["duration_s"] for s in spans)
+            metrics[name] = {
+                "count": len(spans),
+                "errors": sum(1 for s in spans if "error" in s),
+                "p50_s": _percentile(durations, 50),
+                "p95_s": _percentile(durations, 95),
+                "max_s": durations[-1],
+                **{key: sum(s.get(key, 0) for s in spans) for key in COUNTERS},
+            }
+        return metrics
+
+    def extend(self, spans):
+        """Add spans recorded elsewhere (e.g. in a worker process).
+
+        Requests already imported are skipped, so the same spans can be passed again.
+        """
+        with self._lock:
+            spans = [s for s in spans if s.get("request_id") not in self._imported]
+            self._spans.extend(spans)
+            self._imported.update(s.get("request_id") for s in spans)
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+            self._imported.clear()
+
+
+def _percentile(values, pct):
+    # Nearest-rank percentile of an already sorted list.
+    index = max(0, min(len(values) - 1, int(round(pct / 100 * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+def current_request():
+    return _request_id.get()
+
+
+def traced(name=None):
+    """Decorator: run the function inside a span named ``name`` (default: its qualified name).
+
+    For generator functions the span stays open until the generator is exhausted.
+    """
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with tracer.span(span_name):
+                    yield from fn(*args, **kwargs)
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with tracer.span(span_name):
+                    return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def propagate(fn):
+    """Bind ``fn`` to the caller's trace context so spans from a worker thread keep their request/job."""
+    context = contextvars.copy_context()
+    return functools.partial(context.run, fn)
+
+
+def usage_from(message):
+    """Prompt/completion token counts from a LangChain message, if the provider reported them."""
+    usage = getattr(message, "usage_metadata", None) or {}
+    return {
+        "prompt_tokens": usage.get("input_tokens", 0),
+        "completion_tokens": usage.get("output_tokens", 0),
+    }
+
+
+tracer = Tracer()
@@ -1,35 +1,254 @@
+import io
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from itertools import repeat
+
 import pdfplumber
 from docx import Document
 
+from skill_matcher import get_taxonomy
+from tracing import traced
+
+# Elements whose whole subtree is dropped.
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "iframe", "head", "button", "select", "textarea", "nav", "aside"}
+# Filtered like an element with a boilerplate class/id: a search or newsletter
+# form is chrome, but some sites (e.g. ASP.NET WebForms) wrap the whole page in one.
+SOFT_SKIP_TAGS = {"form"}
+# Dropped only outside <main>/<article>, where they are site chrome rather than the posting's own header.
+CHROME_TAGS = {"header", "footer"}
+BLOCK_TAGS = {
+    "p", "div", "section", "article", "main", "li", "ul", "ol", "br", "tr", "td", "th", "table",
+    "h1", "h2", "h3", "h4", "h5", "h6", "dd", "dt", "dl", "blockquote", "pre", "hr",
+}
+VOID_TAGS = {"br", "hr", "img", "input", "meta", "link", "area", "base", "col", "embed", "source", "track", "wbr"}
+BOILERPLATE_MARKERS = {
+    "cookie", "cookies", "consent", "gdpr", "navbar", "nav", "menu", "footer", "breadcrumb", "breadcrumbs",
+    "sidebar", "social", "share", "newsletter", "modal", "popup", "skip",
+}
+# Page-level elements whose class/id says nothing about their own content
+# (e.g. <body class="modal-open">), so markers are not matched on them.
+MARKER_EXEMPT_TAGS = {"html", "body", "main", "article"}
+BOILERPLATE_ROLES = {"navigation", "banner", "contentinfo", "dialog", "alertdialog", "search"}
+URL_PATTERN = re.compile(r"https?://\S+")
+# If <main>/<article> holds at least this much text, everything outside it is dropped.
+# Text left by the class/id markers must reach it too, or the page is used without them.
+MIN_MAIN_CHARS = 200
+# Optional end tags: a start tag closes the nearest open element of the first
+# set, unless one of the second set is found first (HTML's implied end tags).
+IMPLIED_END_TAGS = {
+    "li": ({"li"}, {"ul", "ol", "menu"}),
+    "dt": ({"dt", "dd"}, {"dl"}),
+    "dd": ({"dt", "dd"}, {"dl"}),
+    "tr": ({"tr"}, {"table", "thead", "tbody", "tfoot"}),
+    "td": ({"td", "th"}, {"tr", "table"}),
+    "th": ({"td", "th"}, {"tr", "table"}),
+    "option": ({"option"}, {"select", "datalist"}),
+}
+# Start tags that close an open <p>.
+P_CLOSING_TAGS = {
+    "address", "article", "aside", "blockquote", "details", "div", "dl", "dd", "dt", "fieldset", "figcaption",
+    "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "menu", "nav",
+    "ol", "p", "pre", "section", "table", "ul",
+}
+P_SCOPE_TAGS = {"html", "body", "table", "td", "th", "caption", "button", "template", "object"}
+
+class HTMLTextExtractor(HTMLParser):
+    """Single-pass HTML to text converter for careers pages.
+
+    Drops scripts, navigation, cookie banners, footers and similar chrome,
+    keeps block structure as line breaks, and leaves punctuation alone so
+    tokens like "C++", "C#", "Node.js" and "CI/CD" survive. Input can be
+    fed in chunks; work is linear in the size of the page.
+
+    Open elements are kept on a stack, with end tags HTML lets pages omit
+    (``<li>``, ``<p>``, table cells) closed implicitly. Elements flagged only
+    by a class/id marker are filtered softly: an element that turns out to
+    hold the main content keeps its text, and if the markers leave too
+    little text the page is used without them.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        # Open elements as [tag, kind]; kind is "skip", "marked", "main" or None.
+        self.stack = []
+        self.skip_depth = 0
+        self.marked_depth = 0
+        self.main_depth = 0
+        # Text everywhere / in <main>, with and without the marked elements.
+        self.all_lines = [[]]
+        self.main_lines = [[]]
+        self.unmarked_lines = [[]]
+        self.unmarked_main_lines = [[]]
+        # Text of the current run; a word split across two fed chunks stays one word.
+        self.pending = []
+
+    def _kind(self, tag, attrs):
+        if tag in SKIP_TAGS or (tag in CHROME_TAGS and not self.main_depth):
+            return "skip"
+        attrs = dict(attrs)
+        if (attrs.get("role") or "").lower() in BOILERPLATE_ROLES or "hidden" in attrs or attrs.get("aria-hidden") == "true":
+            return "skip"
+        if tag in ("main", "article") or attrs.get("role") == "main":
+            return "main"
+        if tag in MARKER_EXEMPT_TAGS:
+            return None
+        if tag in SOFT_SKIP_TAGS:
+            return "marked"
+        markers = re.split(r"[\s_-]+", f"{attrs.get('id') or ''} {attrs.get('class') or ''}".lower())
+        return "marked" if any(marker in BOILERPLATE_MARKERS for marker in markers) else None
+
+    def _push(self, tag, kind):
+        if kind == "main" and self.marked_depth:
+            # Marked ancestors of the main content are layout wrappers, not chrome.
+            for entry in self.stack:
+                entry[1] = None if entry[1] == "marked" else entry[1]
+            self.marked_depth = 0
+        self.stack.append([tag, kind])
+        self._count(kind, 1)
+
+    def _pop_to(self, index):
+        while len(self.stack) > index:
+            _, kind = self.stack.pop()
+            self._count(kind, -1)
+
+    def _count(self, kind, step):
+        if kind == "skip":
+            self.skip_depth += step
+        elif kind == "marked":
+            self.marked_depth += step
+        elif kind == "main":
+            self.main_depth += step
+
+    def _close_implied(self, tag):
+        if tag in IMPLIED_END_TAGS:
+            self._close_nearest(*IMPLIED_END_TAGS[tag])
+        if tag in P_CLOSING_TAGS:
+            self._close_nearest({"p"}, P_SCOPE_TAGS)
+
+    def _close_nearest(self, closes, scope):
+        for index in range(len(self.stack) - 1, -1, -1):
+            open_tag = self.stack[index][0]
+            if open_tag in closes:
+                self._pop_to(index)
+                return
+            if open_tag in scope:
+                return
+
+    def _sinks(self):
+        if self.skip_depth:
+            return ()
+        sinks = [self.all_lines]
+        if not self.marked_depth:
+            sinks.append(self.unmarked_lines)
+        if self.main_depth:
+            sinks.append(self.main_lines)
+            if not self.marked_depth:
+                sinks.append(self.unmarked_main_lines)
+        return sinks
+
+    def _flush(self):
+        words = URL_PATTERN.sub(" ", "".join(self.pending)).split()
+        self.pending = []
+        for lines in self._sinks() if words else ():
+            lines[-1].extend(words)
+
+    def _break(self):
+        for lines in self._sinks():
+            if lines[-1]:
+                lines.append([])
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        self._close_implied(tag)
+        if tag in BLOCK_TAGS:
+            self._break()
+        if tag in VOID_TAGS:
+            return
+        self._push(tag, None if self.skip_depth else self._kind(tag, attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self._flush()
+        if tag in BLOCK_TAGS:
+            self._break()
+
+    def handle_endtag(self, tag):
+        self._flush()
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index][0] == tag:
+                if tag in BLOCK_TAGS:
+                    self._break()
+                self._pop_to(index)
+                return
+        if tag == "br":
+            self._break()
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.pending.append(data)
+
+    def text(self):
+        self.close()
+        self._flush()
+        for lines in (self.unmarked_main_lines, self.main_lines, self.unmarked_lines):
+            text = "\n".join(" ".join(line) for line in lines if line)
+            if len(text) >= MIN_MAIN_CHARS:
+                return text
+        # Too little text once the markers are applied: they matched the page itself.
+        return "\n".join(" ".join(line) for line in self.all_lines if line)
+
+@traced("clean_text")
 def clean_text(text):
-    # Remove HTML tags
-    text = re.sub(r'<[^>]*?>', '', text)
-    # Remove URLs
-    text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
-    # Remove special characters
-    text = re.sub(r'[^a-zA-Z0-9 ]', '', text)
-    # Replace multiple spaces with a single space
-    text = re.sub(r'\s{2,}', ' ', text)
-    # Trim leading and trailing whitespace
-    text = text.strip()
-    # Remove extra whitespace
-    text = ' '.join(text.split())
-    return text
+    """Turn a scraped page (raw HTML or already-extracted text) into compact LLM input.
 
-def extract_text_from_resume(file):
+    ``text`` may also be an iterable of chunks, e.g. a streamed response body.
+    """
+    extractor = HTMLTextExtractor()
+    for chunk in ([text] if isinstance(text, str) else text):
+        extractor.feed(chunk)
+    return extractor.text()
+
+# PDFs with at least this many pages are extracted in a process pool,
+# PDF_PAGES_PER_TASK pages per worker task.
+PARALLEL_PDF_PAGES = 8
+PDF_PAGES_PER_TASK = 4
 
+def _extract_pdf_pages(data, start, stop):
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        return [pdf.pages[i].extract_text() or "" for i in range(start, stop)]
+
+def iter_resume_pages(file):
+    """Yield the resume text one PDF page (or DOCX paragraph) at a time."""
     if file.name.endswith(".pdf"):
         with pdfplumber.open(file) as pdf:
-            return "\n".join(page.extract_text() for page in pdf.pages if page.extract_text())
+            page_count = len(pdf.pages)
+            if page_count < PARALLEL_PDF_PAGES:
+                for page in pdf.pages:
+                    text = page.extract_text()
+                    if text:
+                        yield text
+                return
+        file.seek(0)
+        data = file.read()
+        starts = range(0, page_count, PDF_PAGES_PER_TASK)
+        stops = [min(start + PDF_PAGES_PER_TASK, page_count) for start in starts]
+        with ProcessPoolExecutor(max_workers=min(len(starts), os.cpu_count() or 1)) as pool:
+            for texts in pool.map(_extract_pdf_pages, repeat(data), starts, stops):
+                yield from (text for text in texts if text)
 
     elif file.name.endswith(".docx"):
         doc = Document(file)
-        return "\n".join([para.text for para in doc.paragraphs])
+        for para in doc.paragraphs:
+            yield para.text
 
     else:
         raise ValueError("Unsupported file format.")
 
+@traced("extract_text_from_resume")
+def extract_text_from_resume(file):
+    return "\n".join(iter_resume_pages(file))
+
 def extract_resume_sections(text):
     sections = {
         "experience": "",
@@ -54,62 +273,93 @@ def extract_resume_sections(text):
     return sections
 
 def extract_skills_from_text(text):
-    # You can make this list more comprehensive
-    # common_skills = [
-    #     "python", "java", "sql", "excel", "pandas", "numpy", "machine learning",
-    #     "deep learning", "data analysis", "communication", "leadership", "tableau",
-    #     "power bi", "aws", "git", "tensorflow", "keras", "flask", "django"
-    # ]
-    common_skills = [
-        # Machine Learning
-        "Supervised Learning", "Unsupervised Learning", "Scikit-learn", "TensorFlow", "Keras",
-        "PyTorch", "Model Evaluation", "Feature Engineering", "Cross-Validation", "Hyperparameter Tuning",
-        "XGBoost", "LightGBM", "Gradient Descent", "Overfitting", "Regularization", "ML Pipelines",
-
-        # Data Science
-        "Python", "R", "SQL", "Pandas", "NumPy", "Matplotlib", "Seaborn", "Jupyter Notebook",
-        "Data Cleaning", "Exploratory Data Analysis", "Statistics", "Hypothesis Testing", "Probability",
-        "A/B Testing", "Predictive Modeling", "Time Series Analysis", "Business Intelligence",
-
-        # Data Analysis
-        "Excel", "Power BI", "Tableau", "Pivot Tables", "VLOOKUP", "XLOOKUP", "Data Wrangling",
-        "Descriptive Statistics", "Report Writing", "Google Sheets", "Data Visualization", "KPI Analysis",
-        "SQL Joins", "SQL Aggregations",
-
-        # Data Engineering
-        "PostgreSQL", "MySQL", "MongoDB", "Apache Spark", "Apache Kafka", "ETL", "ELT Pipelines",
-        "Airflow", "Data Warehousing", "Redshift", "Snowflake", "BigQuery", "dbt", "AWS S3", "AWS Lambda",
-        "AWS Glue", "Azure Data Factory", "Data Lake", "Docker", "Kubernetes",
-
-        # Natural Language Processing
-        "Text Preprocessing", "Tokenization", "Lemmatization", "TF-IDF", "Word2Vec", "FastText",
-        "Transformers", "BERT", "RoBERTa", "GPT", "Named Entity Recognition", "NER", "Sentiment Analysis",
-        "Text Classification", "Hugging Face Transformers", "spaCy", "NLTK",
-
-        # LLMs & Agents
-        "OpenAI GPT", "LLaMA", "Claude", "Gemini", "LangChain", "Prompt Engineering",
-        "Retrieval-Augmented Generation", "RAG", "Pinecone", "ChromaDB", "Weaviate", "Vector Embeddings",
-        "Agent Frameworks", "LangGraph", "CrewAI", "AutoGen", "Tool Use", "Tool Calling",
-        "Memory Management", "Guardrails", "Output Parsing", "Chain of Thought", "ReAct", "Streaming Outputs",
-        "Chat Completion APIs",
-
-        # General Tools
-        "Git", "GitHub", "Docker", "APIs", "REST", "GraphQL", "FastAPI", "Flask", "Linux", "Bash",
-        "CI/CD", "Cloud Platforms", "AWS", "Azure", "GCP", "VS Code", "Testing", "Pytest", "Unit Testing"
-    ]
-
-    found_skills = []
-    text_lower = text.lower()
-    print(f"Extracting skills from text: {text_lower[:100]}...")  # Debugging line to check the text
-    for skill in common_skills:
-        if skill in text_lower:
-            found_skills.append(skill)
-    return sorted(set(found_skills))
+    # One Aho-Corasick pass over the text; see skill_matcher.COMMON_SKILLS for the taxonomy.
+    return get_taxonomy().extract(text)
 
 def calculate_fit_percentage(resume_skills, job_skills):
     resume_skills_set = set(skill.lower() for skill in resume_skills)
     job_skills_set = set(skill.lower() for skill in job_skills)
 
     matched = resume_skills_set.intersection(job_skills_set)
-    fit_score = len(matched) / len(job_skills_set) * 100 if job_skills_set else 0
-    return round(fit_score, 2), list(matched)
\ No newline at end of file
+    fit_score = len(matched) / len(job_skills_set) * 100 if job_skills_set else 0.0
+    return round(fit_score, 2), list(matched)
+
+def match_skills(resume_skills, job_skills):
+    """Local, deterministic replacement for the LLM skill matcher.
+
+    Both lists are mapped onto the canonical taxonomy (so "sklearn" matches
+    "Scikit-learn") before scoring with ``calculate_fit_percentage``.
+    """
+    taxonomy = get_taxonomy()
+    resume = taxonomy.canonicalize(resume_skills)
+    job = taxonomy.canonicalize(job_skills)
+    fit_percentage, matched = calculate_fit_percentage(resume, job)
+    matched = set(matched)
+    return {
+        "fit_percentage": fit_percentage,
+        "matched_skills": [skill for skill in job if skill.lower() in matched],
+    }
+
+def estimate_tokens(text):
+    # ~4 characters per token for English text; good enough for budgeting prompts.
+    return len(text) // 4 + 1
+
+# Phrases that usually open or close a job posting on a careers page. Chunks
+# are cut just before one of these (or at a line break) whenever possible.
+POSTING_BOUNDARY = re.compile(
+    r"\n\s*\n|\n|(?i:\b(?:apply now|job id|job req|req id|requisition id|posted on|posted|view job|learn more|see details)\b)"
+)
+
+def split_job_postings(text, max_tokens):
+    """Split page text into chunks of at most ``max_tokens``, preferring posting boundaries."""
+    max_chars = max_tokens * 4
+    chunks = []
+    pos = 0
+    while len(text) - pos > max_chars:
+        end = pos + max_chars
+        cut = None
+        for match in POSTING_BOUNDARY.finditer(text, pos + max_chars // 2, end):
+            cut = match.start()
+        if cut is None:
+            cut = text.rfind(" ", pos + max_chars // 2, end)
+            if cut <= pos:
+                cut = end
+        chunks.append(text[pos:cut].strip())
+        pos = cut
+    chunks.append(text[pos:].strip())
+    return [chunk for chunk in chunks if chunk] or [text]
+
+def _words(text):
+    return set(re.findall(r"\w+", str(text).lower()))
+
+def merge_jobs(job_lists):
+    """Merge per-chunk job lists, folding together postings that were seen twice.
+
+    Two jobs are the same posting when their roles match and their
+    descriptions overlap (Jaccard >= 0.5, or one is empty). Skills are
+    unioned and the longer description is kept.
+    """
+    merged = []
+    for jobs in job_lists:
+        for job in jobs:
+            if not isinstance(job, dict):
+                continue
+            role = " ".join(str(job.get("role", "")).lower().split())
+            words = _words(job.get("description", ""))
+            for existing, existing_role, existing_words in merged:
+                if role != existing_role:
+                    continue
+                overlap = len(words & existing_words) / len(words | existing_words) if words and existing_words else 1
+                if overlap >= 0.5:
+                    for skill in job.get("skills", []) or []:
+                        if skill not in existing.setdefault("skills", []):
+                            existing["skills"].append(skill)
+                    if len(str(job.get("description", ""))) > len(str(existing.get("description", ""))):
+                        existing["description"] = job["description"]
+                        existing_words |= words
+                    for key, value in job.items():
+                        existing.setdefault(key, value)
+                    break
+            else:
+                merged.append((dict(job, skills=list(job.get("skills", []) or [])), role, words))
+    return [job for job, _, _ in merged]
@@ -0,0 +1,300 @@
+import io
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+from llm_cache import _Transaction
+from tracing import tracer
+
+# Run and stage states.
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+FINISHED = (DONE, FAILED)
+
+# Stage rows that belong to the run rather than to one job.
+RUN_LEVEL = -1
+# Streaming snapshots of a job task are written at most this often (seconds).
+PARTIAL_INTERVAL = 0.25
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class RunProgress:
+    """Progress writer used inside a worker process for one run."""
+
+    def __init__(self, path, run_id):
+        self.run_id = run_id
+        self.conn = _connect(path)
+
+    def set_status(self, status, error=None):
+        with _Transaction(self.conn) as conn:
+            conn.execute("UPDATE runs SET status = ?, error = ?, updated = ? WHERE id = ?",
+                         (status, error, time.time(), self.run_id))
+
+    def update(self, name, status, value=None, job=RUN_LEVEL):
+        with _Transaction(self.conn) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO stages VALUES (?, ?, ?, ?, ?, ?)",
+                (self.run_id, job, name, status, json.dumps(value, default=str), time.time()),
+            )
+
+    @contextmanager
+    def stage(self, name, job=RUN_LEVEL):
+        """Mark a stage running; an exception inside marks it failed (and propagates)."""
+        self.update(name, RUNNING, job=job)
+        try:
+            yield
+        except Exception as e:
+            self.update(name, FAILED, f"{type(e).__name__}: {e}", job=job)
+            raise
+
+
+def _run(path, run_id, fn, params, secrets):
+    # Entry point in the worker process. Secrets arrive as arguments, never
+    # through os.environ, so runs for different users cannot see each other's.
+    progress = RunProgress(path, run_id)
+    progress.set_status(RUNNING)
+    with tracer.request(run_id):
+        try:
+            fn(progress, params, secrets)
+        except Exception as e:
+            progress.set_status(FAILED, f"{type(e).__name__}: {e}")
+        else:
+            progress.set_status(DONE)
+        finally:
+            progress.update("trace", DONE, tracer.spans(run_id))
+
+
+class WorkQueue:
+    """Runs pipeline functions on a pool of worker processes and tracks their progress.
+
+    ``submit`` returns a run id straight away; the run's status and the
+    result of every stage (and every per-job task) are written to SQLite as
+    they finish, so any session -- including one reconnecting after a
+    browser refresh -- can poll ``status(run_id)``. The pool is shared by
+    every session of the server; ``secrets`` such as the user's API key are
+    passed to each run directly and are not stored.
+    """
+
+    def __init__(self, path=".cache/work_queue.sqlite3", max_workers=None):
+        self.path = path
+        self.max_workers = max_workers or int(os.getenv("WORKER_PROCESSES", "2"))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pool = None
+        self._warm = False
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with _Transaction(self._connect()) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, params TEXT, error TEXT, "
+                "created REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS stages ("
+                "run_id TEXT NOT NULL, job INTEGER NOT NULL, name TEXT NOT NULL, status TEXT NOT NULL, "
+                "value TEXT, updated REAL NOT NULL, PRIMARY KEY (run_id, job, name)) WITHOUT ROWID"
+            )
+            # Runs left unfinished by a previous server process will never finish.
+            conn.execute(
+                "UPDATE runs SET status = ?, error = 'interrupted by a server restart', updated = ? "
+                "WHERE status IN (?, ?)",
+                (FAILED, time.time(), QUEUED, RUNNING),
+            )
+
+    def _connect(self):
+        # One connection per thread, as in LLMCache.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = _connect(self.path)
+        return conn
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                # "spawn": forking a server that runs many threads is not safe.
+                self._pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def submit(self, fn, params, secrets=None):
+        """Queue ``fn(progress, params, secrets)`` on a worker process and return the run id.
+
+        ``fn`` must be a module-level function; ``params`` other than bytes
+        are stored with the run.
+        """
+        run_id = uuid.uuid4().hex
+        now = time.time()
+        stored = {key: value for key, value in params.items() if not isinstance(value, bytes)}
+        with _Transaction(self._connect()) as conn:
+            conn.execute("INSERT INTO runs VALUES (?, ?, ?, NULL, ?, ?)",
+                         (run_id, QUEUED, json.dumps(stored, default=str), now, now))
+        future = self._executor().submit(_run, self.path, run_id, fn, params, secrets or {})
+        future.add_done_callback(lambda f: self._crashed(run_id, f))
+        return run_id
+
+    def _crashed(self, run_id, future):
+        # _run records its own failures; this only fires if the run was
+        # cancelled or its worker process died.
+        error = "cancelled" if future.cancelled() else future.exception()
+        if error is None:
+            return
+        if isinstance(error, BrokenProcessPool):
+            with self._lock:
+                self._pool = None  # start a fresh pool on the next submit
+        message = error if isinstance(error, str) else f"{type(error).__name__}: {error}"
+        with _Transaction(self._connect()) as conn:
+            conn.execute("UPDATE runs SET status = ?, error = ?, updated = ? WHERE id = ? AND status != ?",
+                         (FAILED, message, time.time(), run_id, DONE))
+
+    def status(self, run_id):
+        """The run's state, or ``None`` for an unknown id.
+
+        ``{"status", "error", "params", "stages": {name: {"status", "value"}},
+        "jobs": {job index: {task: {"status", "value"}}}}``
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT status, error, params FROM runs WHERE id = ?", (run_id,)).fetchone()
+        if row is None:
+            return None
+        run = {"id": run_id, "status": row[0], "error": row[1], "params": json.loads(row[2] or "{}"),
+               "stages": {}, "jobs": {}}
+        for job, name, status, value in conn.execute(
+            "SELECT job, name, status, value FROM stages WHERE run_id = ?", (run_id,)
+        ):
+            target = run["stages"] if job == RUN_LEVEL else run["jobs"].setdefault(job, {})
+            target[name] = {"status": status, "value": json.loads(value) if value else None}
+        return run
+
+    def warm_up(self):
+        """Start every worker process and import the pipeline there, ahead of the first run."""
+        with self._lock:
+            if self._warm:
+                return
+            self._warm = True
+        pool = self._executor()
+        for _ in range(self.max_workers):
+            pool.submit(_import_pipeline)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+def _import_pipeline():
+    # The heavy imports (LangChain, Groq, PDF/DOCX readers) happen once per worker.
+    import chains, fetcher, resume_store  # noqa: F401
+
+
+class _Upload(io.BytesIO):
+    # resume_store and extract_text_from_resume read the file type from ``name``.
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+
+def run_analysis(progress, params, secrets):
+    """The app's whole pipeline, run in a worker: resume -> page -> jobs -> per-job analyses.
+
+    ``params``: ``resume_bytes``, ``resume_name``, ``url``, ``use_cache``,
+    ``combined``, ``fuzzy_matching``, ``reuse_duplicates``, ``full_resume``.
+    """
+    # Imported here, in the worker, so the Streamlit process starts without them.
+    from chains import Partial, get_chain
+    from fetcher import get_fetcher
+    from job_index import get_job_index
+    from job_store import get_job_store
+    from llm_cache import get_llm_cache
+    from resume_store import get_resume_store
+
+    chain = get_chain(
+        api_key=secrets.get("api_key"),
+        cache=get_llm_cache() if params.get("use_cache", True) else None,
+        fuzzy_matching=params.get("fuzzy_matching", False),
+        job_index=get_job_index() if params.get("reuse_duplicates", True) else None,
+        full_resume=params.get("full_resume", False),
+    )
+    with progress.stage("resume"):
+        resume = get_resume_store().ingest(_Upload(params["resume_bytes"], params["resume_name"]), chain=chain)
+        progress.update("resume", DONE, {"text": resume.text, "sections": resume.sections})
+    user_skills = resume.sections.get("skills", [])
+    skills = sorted({s.strip().title() for s in user_skills if isinstance(s, str)})
+    progress.update("categories", DONE, chain.analyze_resume_categories(resume.text, skills))
+
+    with progress.stage("page"):
+        page = get_fetcher().fetch(params["url"])
+        progress.update("page", DONE, {"from_cache": page.from_cache, "elapsed": page.elapsed})
+    with progress.stage("jobs"):
+        jobs = chain.extract_jobs(page.text)
+        get_job_store().add(jobs, url=params["url"])
+        progress.update("jobs", DONE, jobs)
+
+    written = {}
+    for idx, task, result in chain.analyze_jobs(
+        jobs, resume.text, user_skills, stream=True, combined=params.get("combined", True),
+        resume_sections=resume.sections,
+    ):
+        if isinstance(result, Partial):
+            now = time.monotonic()
+            if now - written.get((idx, task), 0) >= PARTIAL_INTERVAL:
+                written[(idx, task)] = now
+                progress.update(task, RUNNING, result.value, job=idx)
+        elif isinstance(result, Exception):
+            progress.update(task, FAILED, f"{type(result).__name__}: {result}", job=idx)
+        else:
+            progress.update(task, DONE, result, job=idx)
+
+
+def write_emails(progress, params, secrets):
+    """Cold emails for jobs picked from the job store, written in a worker.
+
+    ``params``: ``jobs``, ``resume_text``, ``resume_sections``, ``pack``,
+    ``use_cache``, ``full_resume``. Each job's email (or error) is its
+    ``email`` task.
+    """
+    from chains import get_chain
+    from llm_cache import get_llm_cache
+
+    chain = get_chain(
+        api_key=secrets.get("api_key"),
+        cache=get_llm_cache() if params.get("use_cache", True) else None,
+        full_resume=params.get("full_resume", False),
+    )
+    with progress.stage("emails"):
+        written = chain.write_mails(params["jobs"], params["resume_text"], pack=params.get("pack", 1),
+                                    resume_sections=params.get("resume_sections"))
+        progress.update("emails", DONE)
+    for idx, email in enumerate(written):
+        if isinstance(email, Exception):
+            progress.update("email", FAILED, f"{type(email).__name__}: {email}", job=idx)
+        else:
+            progress.update("email", DONE, email, job=idx)
+
+
+_default_queue = None
+_default_lock = threading.Lock()
+
+
+def get_work_queue():
+    global _default_queue
+    with _default_lock:
+        if _default_queue is None:
+            _default_queue = WorkQueue()
+        return _default_queue